@@ -0,0 +1,57 @@
+"""
+LLMEasy construction cost and batch_process scheduling overhead
+"""
+import asyncio
+import random
+from typing import Callable, Dict, Optional
+from llmeasy import LLMEasy
+from llmeasy.base import BaseProvider
+from .harness import benchmark
+
+LATENCY_DISTRIBUTIONS: Dict[str, Callable[[random.Random], float]] = {
+    'zero': lambda rng: 0.0,
+    'constant': lambda rng: 0.001,
+    'uniform': lambda rng: rng.uniform(0.0, 0.002),
+    'lognormal': lambda rng: min(rng.lognormvariate(-7.0, 1.0), 0.05),
+}
+
+class LatencyProvider(BaseProvider):
+    """Offline provider that answers after a latency drawn from a distribution"""
+
+    def __init__(self, distribution: str = 'zero', seed: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.model = 'latency-mock'
+        self.latency = LATENCY_DISTRIBUTIONS[distribution]
+        self.rng = random.Random(seed)
+
+    async def query(self, prompt: str, system: Optional[str] = None, **kwargs) -> str:
+        await asyncio.sleep(self.latency(self.rng))
+        return prompt
+
+    async def stream(self, prompt: str, system: Optional[str] = None, **kwargs):
+        await asyncio.sleep(self.latency(self.rng))
+        yield prompt
+
+@benchmark('core.construct', number=20, provider=['openai', 'claude'])
+def bench_construct(provider: str):
+    def case():
+        LLMEasy(provider=provider, api_key='benchmark')
+
+    return case
+
+@benchmark(
+    'core.batch_process',
+    distribution=list(LATENCY_DISTRIBUTIONS),
+    max_concurrent=[4, 32],
+    mode=['query', 'stream'],
+)
+def bench_batch_process(distribution: str, max_concurrent: int, mode: str):
+    llm = LLMEasy(provider='openai', api_key='benchmark')
+    prompts = [f"prompt {i}" for i in range(200)]
+
+    async def case():
+        llm.provider = LatencyProvider(distribution=distribution)
+        async for _ in llm.batch_process(prompts, max_concurrent=max_concurrent, mode=mode):
+            pass
+
+    return case
@@ -0,0 +1,12 @@
+"""
+Import and first-construction time, each measured in a fresh interpreter
+"""
+from .harness import benchmark
+from .import_time import SCENARIOS, run_once
+
+@benchmark('import_time', self_timed=True, scenario=list(SCENARIOS))
+def bench_import(scenario: str):
+    def case():
+        return run_once(SCENARIOS[scenario])['seconds']
+
+    return case
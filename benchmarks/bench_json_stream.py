@@ -0,0 +1,67 @@
+"""
+JSONStreamHelper.process_stream throughput
+"""
+import json
+from typing import AsyncGenerator, List
+from llmeasy.utils.json_helper import JSONStreamHelper
+from llmeasy.utils.json_template import JSONTemplate
+from .harness import benchmark
+
+def make_response(size: int) -> str:
+    """Build a stream of JSON objects roughly `size` bytes long"""
+    objects = []
+    length = 0
+    index = 0
+    while length < size:
+        text = json.dumps({
+            "id": index,
+            "name": f"item {index}",
+            "tags": ["alpha", "beta", "gamma"],
+            "details": {"score": index * 0.5, "note": "escaped \"quote\" and {braces}"},
+        })
+        objects.append(text)
+        length += len(text) + 1
+        index += 1
+    return "\n".join(objects)
+
+def make_chunks(text: str, chunk_size: int) -> List[str]:
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+@benchmark(
+    'json_stream.process_stream',
+    throughput=lambda params: params['size'],
+    size=[10_000, 100_000, 500_000],
+    chunk_size=[16, 256, 4096],
+)
+def bench_process_stream(size: int, chunk_size: int):
+    chunks = make_chunks(make_response(size), chunk_size)
+
+    async def stream() -> AsyncGenerator[str, None]:
+        for chunk in chunks:
+            yield chunk
+
+    async def case():
+        helper = JSONStreamHelper()
+        async for _ in helper.process_stream(stream()):
+            pass
+
+    return case
+
+TEMPLATE = {
+    "id": "integer",
+    "name": "string",
+    "tags": ["string"],
+    "details": {"score": "number", "note": "string"},
+}
+
+@benchmark('json_stream.template', number=10, coerce=[False, True])
+def bench_template(coerce: bool):
+    objects = [json.loads(line) for line in make_response(100_000).splitlines()]
+    template = JSONTemplate(TEMPLATE)
+    check = template.coerce if coerce else template
+
+    def case():
+        for obj in objects:
+            check(obj)
+
+    return case
@@ -0,0 +1,42 @@
+"""
+PromptTemplate rendering cost
+"""
+from llmeasy.templates import PromptTemplate, render_template
+from .harness import benchmark
+
+@benchmark('template.format', number=1000, variables=[1, 5, 20])
+def bench_format(variables: int):
+    names = [f"var{i}" for i in range(variables)]
+    template = PromptTemplate(" ".join(f"Field {name}: ${name}." for name in names))
+    values = {name: f"value {i}" for i, name in enumerate(names)}
+
+    def case():
+        template.format(**values)
+
+    return case
+
+@benchmark('template.render_cached', number=1000, variables=[1, 5, 20])
+def bench_render_cached(variables: int):
+    names = [f"var{i}" for i in range(variables)]
+    template = {
+        'system': "You are a $var0 assistant.",
+        'prompt': " ".join(f"Field {name}: ${name}." for name in names),
+    }
+    values = {name: f"value {i}" for i, name in enumerate(names)}
+
+    def case():
+        render_template(template, values)
+
+    return case
+
+@benchmark('template.format_many', number=10, rows=[10000], variables=[1, 5, 20])
+def bench_format_many(rows: int, variables: int):
+    names = [f"var{i}" for i in range(variables)]
+    template = PromptTemplate(" ".join(f"Field {name}: ${name}." for name in names))
+    columns = {name: [f"value {row}" for row in range(rows)] for name in names}
+
+    def case():
+        for _ in template.format_many(**columns):
+            pass
+
+    return case
@@ -0,0 +1,139 @@
+"""
+Minimal benchmark harness
+
+Benchmarks are registered with the `benchmark` decorator. A benchmark function
+takes one combination of its parameters, does any setup, and returns the
+callable (sync or async) to time. Self-timed benchmarks return a callable that
+measures itself and returns the elapsed seconds.
+"""
+import asyncio
+import itertools
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class Benchmark:
+    """A registered benchmark and its parameter grid"""
+    name: str
+    func: Callable[..., Callable]
+    params: Dict[str, List[Any]] = field(default_factory=dict)
+    throughput: Optional[Callable[[Dict[str, Any]], int]] = None
+    self_timed: bool = False
+    number: int = 1
+
+    def cases(self):
+        """Yield every combination of parameters"""
+        names = list(self.params)
+        for values in itertools.product(*(self.params[name] for name in names)):
+            yield dict(zip(names, values))
+
+BENCHMARKS: List[Benchmark] = []
+
+def benchmark(
+    name: str,
+    throughput: Optional[Callable[[Dict[str, Any]], int]] = None,
+    self_timed: bool = False,
+    number: int = 1,
+    **params: List[Any]
+):
+    """
+    Register a benchmark
+
+    Args:
+        name: Benchmark name, used to match results between runs
+        throughput: Returns the number of bytes processed by one call, to report MB/s
+        self_timed: The returned callable measures itself and returns seconds
+        number: Calls per sample, for very fast operations
+        **params: Parameter name -> list of values to run
+    """
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, params, throughput, self_timed, number))
+        return func
+    return decorator
+
+def _sample(case: Callable, loop: asyncio.AbstractEventLoop, self_timed: bool, number: int) -> float:
+    """Time `number` calls of a case and return seconds per call"""
+    is_async = asyncio.iscoroutinefunction(case)
+    if self_timed:
+        total = 0.0
+        for _ in range(number):
+            total += loop.run_until_complete(case()) if is_async else case()
+        return total / number
+    if is_async:
+        async def timed():
+            start = time.perf_counter()
+            for _ in range(number):
+                await case()
+            return time.perf_counter() - start
+        return loop.run_until_complete(timed()) / number
+    start = time.perf_counter()
+    for _ in range(number):
+        case()
+    return (time.perf_counter() - start) / number
+
+def run_benchmark(bench: Benchmark, params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Run one parameter combination of a benchmark and summarize its timings"""
+    loop = asyncio.new_event_loop()
+    try:
+        case = bench.func(**params)
+        # Warm up caches and lazy imports before measuring
+        _sample(case, loop, bench.self_timed, 1)
+        samples = [_sample(case, loop, bench.self_timed, bench.number) for _ in range(repeat)]
+    finally:
+        loop.close()
+    result = {
+        'name': bench.name,
+        'params': params,
+        'repeat': repeat,
+        'min_s': min(samples),
+        'median_s': statistics.median(samples),
+        'mean_s': statistics.fmean(samples),
+        'stdev_s': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+    if bench.throughput is not None:
+        result['throughput_mb_s'] = bench.throughput(params) / result['median_s'] / 1e6
+    return result
+
+def metadata() -> Dict[str, Any]:
+    """Describe the environment results were produced in"""
+    import llmeasy
+    return {
+        'llmeasy_version': llmeasy.__version__,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def result_key(result: Dict[str, Any]) -> str:
+    """Identify a result by benchmark name and parameters"""
+    params = ', '.join(f"{k}={v}" for k, v in sorted(result['params'].items()))
+    return f"{result['name']}[{params}]"
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare two result files by median time
+
+    Returns:
+        Keys of results that got slower by more than `threshold` (e.g. 0.1 for 10%)
+    """
+    previous = {result_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        ratio = result['median_s'] / previous[key]['median_s']
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            marker = '  improved'
+        print(f"{key:<72} {ratio:6.2f}x{marker}")
+    return regressions
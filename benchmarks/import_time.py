@@ -0,0 +1,91 @@
+"""
+Import-time benchmark for llmeasy
+
+Every measurement runs in a fresh interpreter so module caches do not leak
+between runs. Reports the median wall time and which provider SDKs ended up
+imported, as JSON.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SDK_MODULES = ['anthropic', 'openai', 'google.generativeai', 'mistralai']
+
+SCENARIOS = {
+    'import llmeasy': "import llmeasy",
+    'LLMEasy(provider="claude")': (
+        "from llmeasy import LLMEasy\n"
+        "LLMEasy(provider='claude', api_key='benchmark')"
+    ),
+    'LLMEasy(provider="openai")': (
+        "from llmeasy import LLMEasy\n"
+        "LLMEasy(provider='openai', api_key='benchmark')"
+    ),
+}
+
+_TIMER = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, '<benchmark>', 'exec'))
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'sdks': [m for m in {sdks!r} if m in sys.modules],
+}}))
+"""
+
+def run_once(code: str) -> Dict[str, Any]:
+    """Run a snippet in a fresh interpreter and return its timing"""
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    result = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', _TIMER.format(code=code, sdks=SDK_MODULES)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_benchmark(runs: int = 10) -> List[Dict[str, Any]]:
+    """Run every scenario `runs` times"""
+    results = []
+    for name, code in SCENARIOS.items():
+        samples = [run_once(code) for _ in range(runs)]
+        seconds = [sample['seconds'] for sample in samples]
+        results.append({
+            'name': name,
+            'runs': runs,
+            'median_ms': statistics.median(seconds) * 1000,
+            'min_ms': min(seconds) * 1000,
+            'sdks_imported': samples[-1]['sdks'],
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs)
+    for result in results:
+        print(
+            f"{result['name']:<32} median {result['median_ms']:8.1f} ms  "
+            f"min {result['min_ms']:8.1f} ms  sdks: {', '.join(result['sdks_imported']) or '-'}"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Run the offline benchmark suite
+
+No network access or API keys are needed; providers are replaced by local
+mocks. Results are written as JSON and can be compared against a previous run.
+
+Usage:
+    python -m benchmarks.run [--filter NAME] [--repeat N] [--output results.json]
+                             [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import sys
+
+if __package__ in (None, ''):
+    # Allow `python benchmarks/run.py` as well as `python -m benchmarks.run`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'benchmarks'
+
+from .harness import BENCHMARKS, compare, metadata, result_key, run_benchmark
+from . import bench_core, bench_import, bench_json_stream, bench_templates  # noqa: F401
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the llmeasy benchmark suite")
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5, help="Samples per benchmark case")
+    parser.add_argument('--output', help="Write JSON results to this file")
+    parser.add_argument('--compare', help="Compare median times against a previous results file")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Relative slowdown reported as a regression (default 0.1)")
+    args = parser.parse_args()
+
+    results = []
+    for bench in BENCHMARKS:
+        if args.filter not in bench.name:
+            continue
+        for params in bench.cases():
+            result = run_benchmark(bench, params, args.repeat)
+            results.append(result)
+            line = f"{result_key(result):<72} {result['median_s'] * 1000:10.3f} ms"
+            if 'throughput_mb_s' in result:
+                line += f"  {result['throughput_mb_s']:8.2f} MB/s"
+            print(line, flush=True)
+
+    report = {'metadata': metadata(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
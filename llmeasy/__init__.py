@@ -7,10 +7,44 @@ __author__ = "Your Name"
 __license__ = "Apache License 2.0"
 
 from .core import LLMEasy
-from .providers import *  # noqa
+from .router import Router
+from .conversation import Conversation, Message
+from .templates import PromptTemplate
+from .utils.cache import CacheBackend, MemoryCache, SQLiteCache
+from .utils.single_flight import SingleFlight
+from .utils.rate_limit import RateLimiter
+from .utils.retry import RetryPolicy, RetryBudget
+from .utils.hedge import HedgePolicy
+from .utils.circuit_breaker import CircuitBreaker
+from .utils.instrumentation import CallMetrics
+from .utils.json_helper import StreamAbortPolicy
+from .utils.json_template import JSONTemplate
+from . import providers as _providers
+
+def __getattr__(name: str):
+    """Expose provider classes without importing every provider SDK up front"""
+    if name in _providers.__all__:
+        return getattr(_providers, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "LLMEasy",
+    "Router",
+    "Conversation",
+    "Message",
+    "PromptTemplate",
+    "CacheBackend",
+    "MemoryCache",
+    "SQLiteCache",
+    "SingleFlight",
+    "RateLimiter",
+    "RetryPolicy",
+    "RetryBudget",
+    "HedgePolicy",
+    "CircuitBreaker",
+    "CallMetrics",
+    "StreamAbortPolicy",
+    "JSONTemplate",
     "__version__",
     "__author__",
     "__license__",
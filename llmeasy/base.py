@@ -1,5 +1,7 @@
 from typing import Optional, AsyncGenerator, Any, Dict
 from abc import ABC, abstractmethod
+from .utils.json_helper import parse_json_response
+from .exceptions import JSONResponseError
 
 class BaseProvider(ABC):
     """Base class for LLM providers"""
@@ -32,11 +34,17 @@ class BaseProvider(ABC):
         
     def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
         """Parse and validate response format"""
+        if output_format == 'json':
+            return parse_json_response(response)
         return response
         
     def validate_response(self, response: str, output_format: Optional[str]) -> bool:
         """Validate response format"""
-        return True
+        try:
+            self._parse_response(response, output_format)
+            return True
+        except JSONResponseError:
+            return False
         
     async def cleanup(self):
         """Cleanup any resources"""
@@ -0,0 +1,236 @@
+"""
+Multi-turn conversations
+
+A `Conversation` keeps the turns of a chat and sends them to the provider as
+message history (`history=` on `LLMEasy.query` and `stream`), which each
+provider maps onto its native message format. A token budget bounds the
+history: once it is exceeded, the oldest turns are dropped ('truncate') or
+folded into a running summary ('summarize'). Turns are removed in blocks,
+down to `low_water` of the budget, so the history prefix stays unchanged
+for several turns in a row and provider-side prompt caching keeps working.
+"""
+import json
+from typing import (
+    Any, AsyncGenerator, Awaitable, Callable, Dict, Iterable, List, NamedTuple,
+    Optional, Sequence, Union
+)
+from .utils.rate_limit import estimate_tokens
+
+POLICIES = ('truncate', 'summarize')
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for your own future reference. Keep names, facts, "
+    "decisions and open questions; leave out pleasantries.\n\n{transcript}"
+)
+
+class Message(NamedTuple):
+    """One turn of a conversation, with role 'user' or 'assistant'"""
+    role: str
+    content: str
+
+History = Sequence[Union[Message, Dict[str, Any]]]
+
+def iter_messages(history: Optional[History]) -> Iterable[Message]:
+    """Read history given as `Message` tuples or `{"role", "content"}` dicts"""
+    for message in history or ():
+        if isinstance(message, dict):
+            yield Message(message['role'], message['content'])
+        else:
+            yield Message(*message)
+
+def openai_messages(history: Optional[History]) -> List[Dict[str, str]]:
+    """History in the OpenAI chat format, also used by Grok and Mistral"""
+    return [{"role": role, "content": content} for role, content in iter_messages(history)]
+
+def anthropic_messages(history: Optional[History], cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    History in the Anthropic messages format
+
+    With `cache`, the last message is marked as a prompt-caching breakpoint,
+    so the provider caches the whole history prefix.
+    """
+    messages: List[Dict[str, Any]] = openai_messages(history)
+    if cache and messages:
+        last = messages[-1]
+        last['content'] = [{
+            'type': 'text',
+            'text': last['content'],
+            'cache_control': {'type': 'ephemeral'},
+        }]
+    return messages
+
+def gemini_contents(history: Optional[History]) -> List[Dict[str, Any]]:
+    """History in the Gemini contents format, where the assistant role is 'model'"""
+    return [
+        {"role": "model" if role == 'assistant' else "user", "parts": [content]}
+        for role, content in iter_messages(history)
+    ]
+
+class Conversation:
+    """
+    Message history of a multi-turn chat, bounded by a token budget
+
+    Args:
+        system: System prompt sent with every turn
+        messages: Earlier turns to start from
+        max_tokens: Token budget of the system prompt, summary, history and
+            the next prompt; None keeps every turn
+        policy: 'truncate' drops the oldest turns, 'summarize' replaces them
+            with a summary written by the model
+        low_water: Share of the budget the history is reduced to once it is
+            exceeded
+        keep_last: Most recent messages that are always kept
+        token_counter: Token count of a text, four characters per token by default
+        summarizer: Async callable writing the summary of a list of messages
+            (with the previous summary as the first, if any); by default the
+            conversation's model is asked with `SUMMARY_PROMPT`
+    """
+
+    def __init__(
+        self,
+        system: Optional[str] = None,
+        messages: Optional[History] = None,
+        max_tokens: Optional[int] = None,
+        policy: str = 'truncate',
+        low_water: float = 0.75,
+        keep_last: int = 2,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        summarizer: Optional[Callable[[List[Message]], Awaitable[str]]] = None
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported conversation policy: {policy}")
+        self.system = system
+        self.max_tokens = max_tokens
+        self.policy = policy
+        self.low_water = low_water
+        self.keep_last = keep_last
+        self.token_counter = token_counter
+        self.summarizer = summarizer
+        self.summary: Optional[str] = None
+        self.messages: List[Message] = []
+        # Token counts per message, so history is never re-counted
+        self._tokens: List[int] = []
+        for message in iter_messages(messages):
+            self.add(message.role, message.content)
+
+    def add(self, role: str, content: str) -> Message:
+        """Append a turn"""
+        if role not in ('user', 'assistant'):
+            raise ValueError(f"Unsupported message role: {role}")
+        message = Message(role, content)
+        self.messages.append(message)
+        self._tokens.append(self.token_counter(content))
+        return message
+
+    def add_user(self, content: str) -> Message:
+        return self.add('user', content)
+
+    def add_assistant(self, content: str) -> Message:
+        return self.add('assistant', content)
+
+    def clear(self):
+        """Forget every turn and the summary"""
+        self.messages.clear()
+        self._tokens.clear()
+        self.summary = None
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    @property
+    def system_prompt(self) -> Optional[str]:
+        """System prompt including the summary of dropped turns"""
+        if self.summary is None:
+            return self.system
+        summary = f"Summary of the earlier conversation:\n{self.summary}"
+        return f"{self.system}\n\n{summary}" if self.system else summary
+
+    def token_count(self) -> int:
+        """Estimated tokens of the system prompt, summary and history"""
+        return self.token_counter(self.system_prompt or '') + sum(self._tokens)
+
+    def _drop_count(self, extra: int) -> int:
+        """Number of oldest messages to remove so the next turn fits the budget"""
+        if self.max_tokens is None or self.token_count() + extra <= self.max_tokens:
+            return 0
+        target = self.max_tokens * self.low_water
+        total = self.token_count() + extra
+        limit = max(len(self.messages) - self.keep_last, 0)
+        count = 0
+        while count < limit and total > target:
+            total -= self._tokens[count]
+            count += 1
+        # History must start with a user turn
+        while count < len(self.messages) and self.messages[count].role != 'user':
+            count += 1
+        return count
+
+    def _drop(self, count: int) -> List[Message]:
+        dropped = self.messages[:count]
+        del self.messages[:count]
+        del self._tokens[:count]
+        return dropped
+
+    def truncate(self, extra: int = 0) -> List[Message]:
+        """Drop the oldest turns if the history and `extra` tokens exceed the budget"""
+        return self._drop(self._drop_count(extra))
+
+    async def compact(self, llm: Any, extra: int = 0) -> List[Message]:
+        """
+        Apply the policy before a turn of `extra` tokens, returning the removed turns
+
+        With 'summarize', removed turns are folded into `summary` using the
+        summarizer or `llm`.
+        """
+        dropped = self.truncate(extra)
+        if dropped and self.policy == 'summarize':
+            if self.summary is not None:
+                dropped.insert(0, Message('assistant', f"(Summary so far) {self.summary}"))
+            self.summary = await self._summarize(llm, dropped)
+        return dropped
+
+    async def _summarize(self, llm: Any, messages: List[Message]) -> str:
+        if self.summarizer is not None:
+            return await self.summarizer(messages)
+        transcript = "\n".join(f"{role}: {content}" for role, content in messages)
+        return await llm.query(SUMMARY_PROMPT.format(transcript=transcript), use_cache=False)
+
+    async def query(self, llm: Any, prompt: str, **kwargs) -> Any:
+        """
+        Send the next user turn through `llm` and record the reply
+
+        The turns are only recorded once the reply has arrived, so a failed
+        request can be repeated.
+        """
+        await self.compact(llm, self.token_counter(prompt))
+        response = await llm.query(
+            prompt,
+            system=self.system_prompt,
+            history=list(self.messages),
+            **kwargs
+        )
+        self.add_user(prompt)
+        self.add_assistant(response if isinstance(response, str) else json.dumps(response))
+        return response
+
+    async def stream(self, llm: Any, prompt: str, **kwargs) -> AsyncGenerator[str, None]:
+        """
+        Stream the reply to the next user turn and record it once complete
+
+        Nothing is recorded if the stream fails or is not read to the end.
+        """
+        await self.compact(llm, self.token_counter(prompt))
+        chunks = []
+        async for chunk in llm.stream(
+            prompt,
+            system=self.system_prompt,
+            history=list(self.messages),
+            **kwargs
+        ):
+            chunks.append(chunk)
+            yield chunk
+        self.add_user(prompt)
+        self.add_assistant("".join(chunks))
@@ -1,18 +1,25 @@
 """
 Core LLMEasy implementation
 """
-from typing import Optional, Dict, Any, AsyncGenerator
-from .providers import (
-    OpenAIProvider,
-    ClaudeProvider,
-    GeminiProvider,
-    MistralProvider,
-    GrokProvider
-)
-from .utils.json_helper import JSONStreamHelper
+from typing import Optional, Dict, Any, AsyncGenerator, Iterable, Tuple, Union
+from .providers import get_provider_class
+from .utils.json_helper import JSONStreamHelper, StreamAbortPolicy
+from .conversation import iter_messages
+from .templates.template_parser import render_template
+from .utils.cache import CacheBackend, make_cache_key
+from .utils.single_flight import SingleFlight
+from .utils.rate_limit import RateLimiter, estimate_tokens, get_rate_limiter
+from .utils.retry import RetryPolicy
+from .utils.hedge import HedgePolicy
+from .utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .utils.timeouts import stream_with_timeouts, with_deadline
+from .utils.instrumentation import CallMetrics, Observer, notify, record_stream, recording
+from .exceptions import CircuitOpenError
 import asyncio
 from .utils import settings
 
+_MISSING = object()
+
 class LLMEasy:
     """Main LLMEasy class for managing different LLM providers"""
     
@@ -20,11 +27,59 @@ class LLMEasy:
         self,
         provider: str,
         api_key: str,
+        cache: Optional[CacheBackend] = None,
+        single_flight: Union[bool, SingleFlight] = False,
+        rate_limit: Union[None, bool, RateLimiter] = None,
+        retry: Union[None, bool, RetryPolicy] = None,
+        hedge: Optional[HedgePolicy] = None,
+        circuit_breaker: Union[bool, CircuitBreaker] = False,
+        fallback: Optional["LLMEasy"] = None,
+        observers: Optional[Iterable[Observer]] = None,
         **kwargs
     ):
-        """Initialize LLMEasy with specified provider"""
+        """
+        Initialize LLMEasy with specified provider
+        
+        Args:
+            provider: Provider name, e.g. 'claude' or 'openai'
+            api_key: API key for the provider
+            cache: Optional response cache used by `query`
+            single_flight: Share one upstream call between concurrent identical
+                `query` or `stream` calls. Pass a `SingleFlight` to share it
+                between several instances, or True for a private one
+            rate_limit: Queue calls so they stay within the requests-per-minute
+                and tokens-per-minute budgets of the provider, model and key,
+                shared by every instance using them. Unset limits are learned
+                from rate-limit response headers. None enables it when
+                `rate_limit_requests_per_minute` or `rate_limit_tokens_per_minute`
+                is configured; pass a `RateLimiter` to use your own
+            retry: Retry transient failures (429, 5xx, timeouts, dropped
+                connections) with backoff, within the process-wide retry budget.
+                None configures it from the `retry_*` settings, False disables
+                it; pass a `RetryPolicy` to use your own
+            hedge: Send a second, identical request when the first has not
+                completed (for streams, produced its first chunk) within the
+                policy's delay, to this provider or the policy's backup
+                `LLMEasy`. The first to finish wins and the other is cancelled
+            circuit_breaker: Reject calls with `CircuitOpenError` while the
+                provider and model keep failing, instead of waiting on doomed
+                requests. True uses the breaker shared by every instance with
+                the same provider and model, configured by the `circuit_*`
+                settings; pass a `CircuitBreaker` to use your own
+            fallback: `LLMEasy` instance that serves requests while the circuit
+                is open
+            observers: Callables receiving a `CallMetrics` record after every
+                `query` and `stream` call, with token usage, time to first
+                chunk, latency, chunk count and attempts. See `add_observer`
+            **kwargs: Provider settings, overriding configured defaults
+        """
         self.provider = provider
+        self.provider_name = provider
         self.api_key = api_key
+        self.cache = cache
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight if isinstance(single_flight, SingleFlight) else None
         
         # Get provider-specific settings
         provider_settings = settings.get_provider_settings(provider)
@@ -33,62 +88,489 @@ class LLMEasy:
         # Combine settings with kwargs (kwargs take precedence)
         all_settings = {**common_settings, **provider_settings, **kwargs}
         
-        # Initialize the appropriate provider
-        if self.provider == 'claude':
-            self.provider = ClaudeProvider(api_key=api_key, **all_settings)
-        elif self.provider == 'openai':
-            self.provider = OpenAIProvider(api_key=api_key, **all_settings)
-        elif self.provider == 'gemini':
-            self.provider = GeminiProvider(api_key=api_key, **all_settings)
-        elif self.provider == 'mistral':
-            self.provider = MistralProvider(api_key=api_key, **all_settings)
-        elif self.provider == 'grok':
-            self.provider = GrokProvider(api_key=api_key, **all_settings)
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+        # Initialize the appropriate provider, importing its SDK on first use
+        provider_class = get_provider_class(provider)
+        self.provider = provider_class(api_key=api_key, **all_settings)
+        
+        rpm = all_settings.get('rate_limit_requests_per_minute')
+        tpm = all_settings.get('rate_limit_tokens_per_minute')
+        if rate_limit is None:
+            rate_limit = rpm is not None or tpm is not None
+        if rate_limit is True:
+            rate_limit = get_rate_limiter(
+                provider,
+                getattr(self.provider, 'model', None),
+                api_key,
+                requests_per_minute=rpm,
+                tokens_per_minute=tpm
+            )
+        self.rate_limiter = rate_limit if isinstance(rate_limit, RateLimiter) else None
+        
+        if retry is None or retry is True:
+            retry_attempts = all_settings.get('retry_attempts', 2)
+            retry = RetryPolicy(
+                max_retries=retry_attempts,
+                base_delay=all_settings.get('retry_base_delay', 0.5),
+                max_delay=all_settings.get('retry_max_delay', 30.0)
+            ) if retry_attempts or retry is True else None
+        self.retry_policy = retry if isinstance(retry, RetryPolicy) else None
+        self.hedge = hedge
+        
+        if circuit_breaker is True:
+            circuit_breaker = get_circuit_breaker(
+                provider,
+                getattr(self.provider, 'model', None),
+                failure_threshold=all_settings.get('circuit_failure_threshold', 5),
+                recovery_timeout=all_settings.get('circuit_recovery_timeout', 30.0)
+            )
+        self.circuit_breaker = circuit_breaker if isinstance(circuit_breaker, CircuitBreaker) else None
+        self.fallback = fallback
+        
+        # Deadlines, each overridable per call
+        self.timeout = all_settings.get('timeout')
+        self.first_token_timeout = all_settings.get('first_token_timeout')
+        self.idle_timeout = all_settings.get('idle_timeout')
+        
+        self.observers = list(observers or ())
+
+    def add_observer(self, observer: Observer) -> Observer:
+        """
+        Call `observer` with the `CallMetrics` record of every later call
+        
+        Returns the observer, so this can be used as a decorator. Records are
+        only collected while the instance has observers.
+        """
+        self.observers.append(observer)
+        return observer
+
+    def _render(
+        self,
+        prompt: Optional[str],
+        system: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[str, Optional[str]]:
+        """Pop `template` and `variables` from kwargs and render the prompt and system prompt"""
+        template = kwargs.pop('template', None)
+        variables = kwargs.pop('variables', None)
+        if template is None:
+            if prompt is None:
+                raise ValueError("Either a prompt or a template is required")
+            return prompt, system
+        if prompt is not None:
+            raise ValueError("Pass either a prompt or a template, not both")
+        return render_template(template, variables, system)
+
+    def _start_call(self, operation: str) -> Optional[CallMetrics]:
+        """Start the record of a call, if anyone observes it"""
+        if not self.observers:
+            return None
+        return CallMetrics(self.provider_name, getattr(self.provider, 'model', None), operation)
+
+    def _finish_call(self, metrics: CallMetrics, error: Optional[BaseException] = None):
+        metrics.latency = metrics.elapsed()
+        metrics.error = error
+        notify(self.observers, metrics)
 
     async def stream(
         self,
-        prompt: str,
+        prompt: Optional[str] = None,
         system: Optional[str] = None,
         output_format: Optional[str] = None,
         **kwargs
     ) -> AsyncGenerator[str, None]:
-        """Stream responses from the provider"""
-        async for chunk in self.provider.stream(
-            prompt=prompt,
-            system=system,
-            output_format=output_format,
-            **kwargs
-        ):
-            yield chunk
+        """
+        Stream responses from the provider
+        
+        Pass `first_token_timeout` or `idle_timeout` to override the configured
+        limits on the wait for the first chunk and between chunks, `timeout` to
+        bound the whole stream, and `connect_timeout` to bound connecting.
+        Expired deadlines raise `LLMTimeoutError`.
+        
+        Pass `history`, a list of earlier `Message` turns or `{"role", "content"}`
+        dicts, to continue a conversation; see `Conversation`. Pass `template`
+        and `variables` instead of a prompt to render a template; see `query`.
+        """
+        prompt, system = self._render(prompt, system, kwargs)
+        first_token_timeout = kwargs.pop('first_token_timeout', self.first_token_timeout)
+        idle_timeout = kwargs.pop('idle_timeout', self.idle_timeout)
+        timeout = kwargs.pop('timeout', None)
+        metrics = self._start_call('stream')
+        
+        def open_send():
+            stream = self.provider.stream(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                **kwargs
+            )
+            if metrics is not None:
+                stream = record_stream(stream, metrics)
+            if first_token_timeout is not None or idle_timeout is not None:
+                stream = stream_with_timeouts(stream, first_token_timeout, idle_timeout)
+            if self.rate_limiter is None:
+                return stream
+            return self._rate_limited_stream(stream, prompt, system, kwargs)
+            
+        def open_attempt():
+            if self.circuit_breaker is None:
+                return open_send()
+            return self.circuit_breaker.stream(open_send)
+            
+        def open_with_retries():
+            if self.retry_policy is None:
+                return open_attempt()
+            return self.retry_policy.stream(open_attempt)
+            
+        def open_hedged():
+            if self.hedge is None:
+                return open_with_retries()
+            backup = self.hedge.backup
+            open_hedge = None if backup is None else lambda: backup.stream(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                **kwargs
+            )
+            return self.hedge.stream(open_with_retries, open_hedge)
+            
+        def open_stream():
+            if self.fallback is None:
+                return open_hedged()
+            return self._stream_with_fallback(open_hedged(), lambda: self.fallback.stream(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                **kwargs
+            ))
+            
+        if self.single_flight is None:
+            stream = open_stream()
+        else:
+            key = self._cache_key(prompt, system, output_format, kwargs, stream=True)
+            stream = self.single_flight.stream(key, open_stream)
+            
+        if timeout is not None:
+            stream = stream_with_timeouts(stream, total_timeout=timeout)
+        if metrics is None:
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                # Closing this stream closes every layer down to the provider's HTTP stream
+                await stream.aclose()
+            return
+            
+        error = None
+        try:
+            async for chunk in stream:
+                if not metrics.chunks:
+                    metrics.ttft = metrics.elapsed()
+                metrics.chunks += 1
+                yield chunk
+        except GeneratorExit:
+            # The consumer stopped reading, which is not a failure
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            await stream.aclose()
+            self._finish_call(metrics, error)
 
     async def query(
         self,
-        prompt: str,
+        prompt: Optional[str] = None,
         system: Optional[str] = None,
         output_format: Optional[str] = None,
+        use_cache: bool = True,
         **kwargs
     ) -> Any:
-        """Get a complete response from the provider"""
-        return await self.provider.query(
-            prompt=prompt,
+        """
+        Get a complete response from the provider
+        
+        When the instance has a cache, identical requests are answered from it.
+        Pass `use_cache=False` to always call the provider. With single-flight
+        enabled, concurrent identical requests share one provider call.
+        Transient failures are retried according to the retry policy, slow
+        requests are hedged when a hedge policy is set, and requests go to the
+        fallback instance while the circuit breaker is open.
+        
+        The response must arrive within `timeout` seconds, the configured
+        timeout unless given per call (None disables it), or `LLMTimeoutError`
+        is raised. `connect_timeout` bounds connecting for this call.
+        
+        Pass `history`, a list of earlier `Message` turns or `{"role", "content"}`
+        dicts, to continue a conversation; see `Conversation`.
+        
+        Instead of a prompt, pass a `template` and its `variables`: a template
+        string, a `PromptTemplate`, or a dict with 'prompt' and optional 'system'
+        templates. Templates use `$name` placeholders and are compiled once and
+        cached, so rendering a known template only joins strings.
+        """
+        prompt, system = self._render(prompt, system, kwargs)
+        timeout = kwargs.pop('timeout', self.timeout)
+        kwargs.pop('first_token_timeout', None)
+        kwargs.pop('idle_timeout', None)
+        metrics = self._start_call('query')
+        request = self._query(prompt, system, output_format, use_cache, metrics, kwargs)
+        if metrics is None:
+            return await with_deadline(request, timeout)
+        try:
+            response = await with_deadline(request, timeout)
+        except BaseException as e:
+            self._finish_call(metrics, e)
+            raise
+        self._finish_call(metrics)
+        return response
+
+    async def _query(
+        self,
+        prompt: str,
+        system: Optional[str],
+        output_format: Optional[str],
+        use_cache: bool,
+        metrics: Optional[CallMetrics],
+        kwargs: Dict[str, Any]
+    ) -> Any:
+        """Answer a query from the cache or the provider, without a deadline"""
+        async def send():
+            request = self.provider.query(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                **kwargs
+            )
+            if self.rate_limiter is not None:
+                request = self._rate_limited_query(request, prompt, system, kwargs)
+            if metrics is None:
+                return await request
+            metrics.attempts += 1
+            with recording(metrics):
+                return await request
+            
+        async def attempt():
+            if self.circuit_breaker is None:
+                return await send()
+            return await self.circuit_breaker.call(send)
+            
+        async def with_retries():
+            if self.retry_policy is None:
+                return await attempt()
+            return await self.retry_policy.call(attempt)
+            
+        async def hedged():
+            if self.hedge is None:
+                return await with_retries()
+            backup = self.hedge.backup
+            hedge = None if backup is None else lambda: backup.query(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                use_cache=False,
+                **kwargs
+            )
+            return await self.hedge.call(with_retries, hedge)
+            
+        async def fetch():
+            try:
+                return await hedged()
+            except CircuitOpenError:
+                if self.fallback is None:
+                    raise
+            return await self.fallback.query(
+                prompt=prompt,
+                system=system,
+                output_format=output_format,
+                use_cache=False,
+                **kwargs
+            )
+            
+        cached = self.cache is not None and use_cache
+        if not cached and self.single_flight is None:
+            return await fetch()
+            
+        key = self._cache_key(prompt, system, output_format, kwargs)
+        if cached:
+            response = await self.cache.aget(key, _MISSING)
+            if response is not _MISSING:
+                if metrics is not None:
+                    metrics.cached = True
+                return response
+                
+        if self.single_flight is None:
+            response = await fetch()
+        else:
+            response = await self.single_flight.do(key, fetch)
+            
+        if cached:
+            await self.cache.aset(key, response)
+        return response
+
+    async def _stream_with_fallback(
+        self,
+        stream: AsyncGenerator[str, None],
+        open_fallback
+    ) -> AsyncGenerator[str, None]:
+        """Yield a stream, switching to the fallback if the circuit rejects it"""
+        started = False
+        try:
+            async for chunk in stream:
+                started = True
+                yield chunk
+        except CircuitOpenError:
+            if started:
+                raise
+            fallback = open_fallback()
+            try:
+                async for chunk in fallback:
+                    yield chunk
+            finally:
+                await fallback.aclose()
+        finally:
+            await stream.aclose()
+
+    def _token_estimate(
+        self,
+        prompt: str,
+        system: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[int, int]:
+        """Estimated input tokens and the completion token budget of a request"""
+        max_tokens = kwargs.get('max_tokens')
+        if max_tokens is None:
+            config = getattr(self.provider, 'config', None)
+            max_tokens = getattr(config or self.provider, 'max_tokens', None)
+        input_tokens = estimate_tokens(prompt) + estimate_tokens(system)
+        for _, content in iter_messages(kwargs.get('history')):
+            input_tokens += estimate_tokens(content)
+        return input_tokens, max_tokens or 0
+
+    async def _rate_limited_query(
+        self,
+        request,
+        prompt: str,
+        system: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Any:
+        """Await a provider query once the rate limiter admits it"""
+        input_tokens, budget = self._token_estimate(prompt, system, kwargs)
+        limiter = self.rate_limiter
+        try:
+            await limiter.acquire(input_tokens + budget)
+        except BaseException:
+            request.close()
+            raise
+        used = 0
+        try:
+            with limiter.observing():
+                response = await request
+            used = estimate_tokens(response if isinstance(response, str) else str(response))
+            return response
+        finally:
+            # The full completion budget is reserved up front; return what was not used
+            limiter.release(budget - used)
+
+    async def _rate_limited_stream(
+        self,
+        stream: AsyncGenerator[str, None],
+        prompt: str,
+        system: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> AsyncGenerator[str, None]:
+        """Yield a provider stream once the rate limiter admits it"""
+        input_tokens, budget = self._token_estimate(prompt, system, kwargs)
+        limiter = self.rate_limiter
+        await limiter.acquire(input_tokens + budget)
+        chars = 0
+        try:
+            # Response headers arrive with the first chunk
+            with limiter.observing():
+                try:
+                    chunk = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+            chars += len(chunk)
+            yield chunk
+            async for chunk in stream:
+                chars += len(chunk)
+                yield chunk
+        finally:
+            limiter.release(budget - (chars // 4 + 1 if chars else 0))
+            await stream.aclose()
+
+    def _sampling_params(self) -> Dict[str, Any]:
+        """Get the provider's configured generation parameters, without credentials"""
+        config = getattr(self.provider, 'config', None)
+        if config is not None:
+            params = config.model_dump()
+        else:
+            params = {
+                name: getattr(self.provider, name, None)
+                for name in (
+                    'temperature', 'max_tokens', 'top_p',
+                    'frequency_penalty', 'presence_penalty'
+                )
+            }
+        params.pop('api_key', None)
+        return params
+
+    def _cache_key(
+        self,
+        prompt: str,
+        system: Optional[str],
+        output_format: Optional[str],
+        kwargs: Dict[str, Any],
+        stream: bool = False
+    ) -> str:
+        """Build the cache and coalescing key for a request"""
+        return make_cache_key(
+            stream=stream,
+            provider=self.provider_name,
+            model=getattr(self.provider, 'model', None),
             system=system,
+            prompt=self.provider._format_prompt(prompt, output_format),
             output_format=output_format,
-            **kwargs
-        ) 
+            params=self._sampling_params(),
+            kwargs=kwargs
+        )
 
     async def stream_json(
         self,
         prompt: str,
         system: Optional[str] = None,
-        template: Optional[Dict] = None,
+        template: Optional[Any] = None,
         validator = None,
+        path: Optional[str] = None,
+        partial: bool = False,
+        abort: Optional[StreamAbortPolicy] = None,
+        coerce: bool = False,
         **kwargs
-    ) -> AsyncGenerator[Dict[Any, Any], None]:
-        """Stream responses as JSON objects"""
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Stream responses as JSON objects
+
+        Args:
+            template: Expected shape of each element, e.g. `{"name": "string",
+                "paradigm": ["string"]}`, a pydantic model class, or a
+                `JSONTemplate` to reuse one compiled template across streams.
+                Elements that do not match are skipped
+            validator: Callable returning whether an element is kept
+            path: Yield the elements at this path as soon as each closes, e.g.
+                'items.*' for the elements of an `items` array, instead of
+                whole top-level objects
+            partial: Yield `JSONEvent`s, including 'partial' events with the
+                element parsed so far
+            abort: `StreamAbortPolicy` ending the stream early, e.g. after too
+                many invalid elements or past a byte budget; the provider's
+                HTTP stream is closed right away
+            coerce: Convert elements to the template's types instead of
+                skipping mismatches, e.g. "1991" to 1991 for a 'number'
+
+        Raises:
+            StreamAbortedError: If the abort policy ends the stream
+        """
         
-        self.json_helper = JSONStreamHelper(template)
+        self.json_helper = JSONStreamHelper(template, coerce=coerce)
         
         stream = self.stream(
             prompt=prompt,
@@ -99,26 +581,84 @@ class LLMEasy:
         
         async for json_obj in self.json_helper.process_stream(
             stream,
-            validator
+            validator,
+            path=path,
+            partial=partial,
+            abort=abort
         ):
             yield json_obj
 
     async def batch_process(
         self,
-        prompts: list[str],
+        prompts: Iterable[str],
         system: Optional[str] = None,
         max_concurrent: int = 3,
+        mode: str = 'query',
+        return_exceptions: bool = False,
         **kwargs
-    ) -> AsyncGenerator[str, None]:
-        """Process multiple prompts concurrently"""
+    ) -> AsyncGenerator[Tuple[int, Any], None]:
+        """
+        Process multiple prompts with up to `max_concurrent` requests in flight
         
-        async def process_prompt(prompt):
-            async for response in self.stream(prompt, system, **kwargs):
-                yield response
-                
-        tasks = [process_prompt(prompt) for prompt in prompts]
+        A new request is started as soon as any running one finishes, so a slow
+        prompt never holds back the others. Results are yielded in completion
+        order as `(index, result)` tuples, where `index` is the prompt's position
+        in `prompts`. In 'query' mode each prompt yields its complete response;
+        in 'stream' mode every chunk is yielded as it arrives. At most
+        `max_concurrent` results are buffered, so requests wait for a slow
+        consumer instead of piling up responses in memory.
+        
+        Args:
+            prompts: Prompts to process, consumed lazily
+            system: System prompt used for every request
+            max_concurrent: Maximum number of requests in flight
+            mode: 'query' or 'stream'
+            return_exceptions: Yield `(index, exception)` for failed prompts instead
+                of raising the first error and cancelling outstanding requests
+            **kwargs: Passed through to `query` or `stream`
+        """
+        if mode not in ('query', 'stream'):
+            raise ValueError(f"Unsupported batch mode: {mode}")
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be a positive integer")
+            
+        pending = iter(enumerate(prompts))
+        # Bounded, so workers block on a slow consumer
+        results: asyncio.Queue = asyncio.Queue(maxsize=max_concurrent)
         
-        for i in range(0, len(tasks), max_concurrent):
-            batch = tasks[i:i + max_concurrent]
-            for response in await asyncio.gather(*batch):
-                yield response 
\ No newline at end of file
+        async def process_prompt(index: int, prompt: str):
+            if mode == 'stream':
+                async for chunk in self.stream(prompt, system, **kwargs):
+                    await results.put((index, chunk, False))
+            else:
+                response = await self.query(prompt, system, **kwargs)
+                await results.put((index, response, False))
+                
+        async def worker():
+            # Workers share one iterator, so each prompt is taken exactly once
+            for index, prompt in pending:
+                try:
+                    await process_prompt(index, prompt)
+                except Exception as e:
+                    await results.put((index, e, True))
+                    if not return_exceptions:
+                        break
+            # Not in a finally block: cancelled workers must not wait on a full queue
+            await results.put(None)
+                
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrent)]
+        running = len(workers)
+        try:
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                index, result, failed = item
+                if failed and not return_exceptions:
+                    raise result
+                yield index, result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
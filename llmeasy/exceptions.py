@@ -0,0 +1,66 @@
+"""
+Exceptions raised by llmeasy
+"""
+from typing import Optional
+
+class JSONResponseError(ValueError):
+    """Raised when a response requested as JSON cannot be parsed"""
+    
+    def __init__(self, response: str, error: Optional[Exception] = None):
+        self.response = response
+        self.error = error
+        super().__init__(f"Invalid JSON response: {str(error)}\nResponse: {response}")
+
+class CircuitOpenError(ValueError):
+    """Raised when a request is rejected because the provider's circuit breaker is open"""
+    
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker for {name} is open, retry in {retry_after:.1f}s")
+
+class StreamAbortedError(ValueError):
+    """
+    Raised when a JSON stream is aborted by its `StreamAbortPolicy`
+
+    `reason` is 'invalid' after too many invalid elements, 'schema' when an
+    element in progress failed the partial validator, and 'bytes' or
+    'tokens' when the response exceeded its budget. `emitted` is the number
+    of elements yielded before the abort.
+    """
+    
+    def __init__(self, reason: str, limit: Optional[int], emitted: int):
+        self.reason = reason
+        self.limit = limit
+        self.emitted = emitted
+        detail = _ABORT_REASONS.get(reason, reason)
+        if limit is not None:
+            detail = f"{detail} (limit {limit})"
+        super().__init__(f"Stream aborted after {emitted} elements: {detail}")
+
+_ABORT_REASONS = {
+    'invalid': 'too many invalid elements',
+    'schema': 'element in progress failed validation',
+    'bytes': 'response exceeded its byte budget',
+    'tokens': 'response exceeded its token budget',
+}
+
+class LLMTimeoutError(TimeoutError):
+    """
+    Raised when a request exceeds one of its deadlines
+    
+    `phase` is 'first_token' when a stream produced no chunk in time, 'idle'
+    when a stream stalled between chunks, and 'total' when the overall
+    deadline passed.
+    """
+    
+    def __init__(self, phase: str, timeout: float):
+        self.phase = phase
+        self.timeout = timeout
+        super().__init__(f"Request timed out: no {_TIMEOUT_PHASES.get(phase, phase)} within {timeout:g}s")
+
+_TIMEOUT_PHASES = {
+    'first_token': 'first chunk',
+    'idle': 'chunk',
+    'total': 'complete response',
+}
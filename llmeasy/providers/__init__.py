@@ -1,17 +1,60 @@
 """
 Provider implementations for different LLM services
+
+Provider classes are imported lazily, so only the SDK of a provider that is
+actually used gets imported.
 """
 
-from .openai import OpenAIProvider
-from .claude import ClaudeProvider
-from .gemini import GeminiProvider
-from .mistral import MistralProvider
-from .grok import GrokProvider
+from importlib import import_module
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    from .openai import OpenAIProvider
+    from .claude import ClaudeProvider
+    from .gemini import GeminiProvider
+    from .mistral import MistralProvider
+    from .grok import GrokProvider
+    from .fake import FakeProvider
+
+# Provider name -> (module, class name)
+PROVIDER_REGISTRY: Dict[str, Tuple[str, str]] = {
+    'openai': ('.openai', 'OpenAIProvider'),
+    'claude': ('.claude', 'ClaudeProvider'),
+    'gemini': ('.gemini', 'GeminiProvider'),
+    'mistral': ('.mistral', 'MistralProvider'),
+    'grok': ('.grok', 'GrokProvider'),
+    'fake': ('.fake', 'FakeProvider'),
+}
+
+_CLASS_REGISTRY = {
+    class_name: module for module, class_name in PROVIDER_REGISTRY.values()
+}
+
+def get_provider_class(provider: str) -> type:
+    """Import and return the provider class registered under the given name"""
+    if provider not in PROVIDER_REGISTRY:
+        raise ValueError(f"Unsupported provider: {provider}")
+    module, class_name = PROVIDER_REGISTRY[provider]
+    return getattr(import_module(module, __name__), class_name)
+
+def __getattr__(name: str):
+    """Resolve provider classes on first access"""
+    if name in _CLASS_REGISTRY:
+        provider_class = getattr(import_module(_CLASS_REGISTRY[name], __name__), name)
+        globals()[name] = provider_class
+        return provider_class
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_CLASS_REGISTRY))
 
 __all__ = [
     "OpenAIProvider",
-    "ClaudeProvider", 
+    "ClaudeProvider",
     "GeminiProvider",
     "MistralProvider",
-    "GrokProvider"
-] 
\ No newline at end of file
+    "GrokProvider",
+    "FakeProvider",
+    "PROVIDER_REGISTRY",
+    "get_provider_class",
+]
@@ -1,6 +1,25 @@
+import inspect
 from abc import ABC, abstractmethod
-from typing import Any, Optional, AsyncIterator, Union
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, AsyncIterator, Union
 from pydantic import BaseModel, ConfigDict
+from ..utils.json_helper import parse_json_response
+from ..exceptions import JSONResponseError
+from ..utils.http_pool import POOL_SETTINGS, create_http_client, get_shared_client
+from ..utils import settings
+
+async def close_response(response: Any):
+    """
+    Close a provider's streaming response, releasing its HTTP connection
+
+    SDK streams close with `aclose()` (async generators) or `close()`
+    (Anthropic and OpenAI streams); responses without either are left alone.
+    """
+    close = getattr(response, 'aclose', None) or getattr(response, 'close', None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
 
 class ProviderConfig(BaseModel):
     """Configuration for LLM providers"""
@@ -23,6 +42,53 @@ class LLMProvider(ABC):
         """Initialize provider with API key and configuration"""
         self.config = ProviderConfig(api_key=api_key, **kwargs)
 
+    def _create_client(
+        self,
+        name: str,
+        sdk: ModuleType,
+        factory: Callable[[Any], Any],
+        base_url: Optional[str] = None
+    ) -> Any:
+        """
+        Create the SDK client with the configured HTTP connection pool
+        
+        With `share_http_clients` enabled, providers with the same name, base URL,
+        API key and pool settings reuse one process-wide client and its warm
+        connections. `factory` builds the SDK client from an HTTP client.
+        """
+        pool_options = {
+            option: getattr(self.config, setting, getattr(settings, setting))
+            for setting, option in POOL_SETTINGS.items()
+        }
+        if getattr(self.config, 'share_http_clients', settings.share_http_clients):
+            return get_shared_client(
+                name,
+                self.config.api_key,
+                factory,
+                sdk,
+                base_url=base_url,
+                **pool_options
+            )
+        return factory(create_http_client(sdk, **pool_options))
+
+    def _request_timeout(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Pop a per-call `connect_timeout` from kwargs as an SDK request option
+        
+        The SDK client's other timeouts are kept; only connecting is bounded
+        differently for this request.
+        """
+        connect_timeout = kwargs.pop('connect_timeout', None)
+        timeout = getattr(getattr(self, 'client', None), 'timeout', None)
+        if connect_timeout is None or not hasattr(timeout, 'connect'):
+            return {}
+        return {'timeout': type(timeout)(
+            connect=connect_timeout,
+            read=timeout.read,
+            write=timeout.write,
+            pool=timeout.pool
+        )}
+
     async def query(
         self, 
         prompt: str,
@@ -39,9 +105,7 @@ class LLMProvider(ABC):
             **kwargs
         )
         
-        if not self.validate_response(response, output_format):
-            raise ValueError(f"Response does not match expected {output_format} format")
-            
+        # Parsing validates the format as well, so the response is only parsed once
         return self._parse_response(response, output_format)
 
     async def stream(
@@ -51,7 +115,12 @@ class LLMProvider(ABC):
         output_format: Optional[str] = None,
         **kwargs
     ) -> AsyncIterator[str]:
-        """Stream responses from the LLM provider"""
+        """
+        Stream responses from the LLM provider
+
+        Closing the stream early, e.g. when the consumer stops reading, closes
+        the provider's HTTP stream right away.
+        """
         formatted_prompt = self._format_prompt(prompt, output_format)
         generator = await self._generate_response(
             prompt=formatted_prompt,
@@ -60,8 +129,11 @@ class LLMProvider(ABC):
             output_format=output_format,
             **kwargs
         )
-        async for chunk in generator:
-            yield chunk
+        try:
+            async for chunk in generator:
+                yield chunk
+        finally:
+            await close_response(generator)
 
     @abstractmethod
     async def _generate_response(
@@ -80,12 +152,21 @@ class LLMProvider(ABC):
         """Format the prompt with output format instructions"""
         pass
 
-    @abstractmethod
     def _parse_response(self, response: Any, output_format: Optional[str]) -> Any:
-        """Parse and validate the response"""
-        pass
+        """
+        Parse and validate the response
+        
+        Raises:
+            JSONResponseError: If JSON was requested and the response is not valid JSON
+        """
+        if output_format == 'json':
+            return parse_json_response(response)
+        return response
 
-    @abstractmethod
     def validate_response(self, response: Any, output_format: Optional[str]) -> bool:
         """Validate if response matches expected format"""
-        pass
+        try:
+            self._parse_response(response, output_format)
+            return True
+        except JSONResponseError:
+            return False
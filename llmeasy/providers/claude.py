@@ -1,8 +1,11 @@
-import json
+import time
 from typing import Any, Optional, AsyncIterator, Union
 import anthropic
-from .base import LLMProvider
+from .base import LLMProvider, close_response
+from ..conversation import anthropic_messages
 from llmeasy.utils import settings
+from llmeasy.utils.histogram import get_stream_stats
+from llmeasy.utils.instrumentation import current_call, record_usage
 
 class ClaudeProvider(LLMProvider):
     """Provider for Anthropic's Claude models"""
@@ -10,7 +13,19 @@ class ClaudeProvider(LLMProvider):
     def __init__(self, api_key: str, **kwargs):
         """Initialize Claude provider"""
         super().__init__(api_key, **kwargs)
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+        base_url = getattr(self.config, 'base_url', None)
+        self.client = self._create_client(
+            'claude',
+            anthropic,
+            lambda http_client: anthropic.AsyncAnthropic(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                # Retries are handled by LLMEasy's RetryPolicy
+                max_retries=0
+            ),
+            base_url=base_url
+        )
         self.model = kwargs.get('model') or settings.claude_model
 
     async def _generate_response(
@@ -21,31 +36,53 @@ class ClaudeProvider(LLMProvider):
         **kwargs
     ) -> Union[str, AsyncIterator[str]]:
         """Generate response from Claude"""
+        metrics = current_call()
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = anthropic_messages(
+                kwargs.pop('history', None),
+                cache=getattr(self.config, 'prompt_caching', False)
+            )
+            messages.append({"role": "user", "content": prompt})
             
+            started = time.perf_counter_ns()
             response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=self.config.max_tokens,
                 temperature=self.config.temperature,
                 messages=messages,
                 system=system if system else "You are a helpful AI assistant.",
-                stream=stream
+                stream=stream,
+                **self._request_timeout(kwargs)
             )
             
             if stream:
                 async def response_generator():
-                    async for chunk in response:
-                        if hasattr(chunk, 'type'):
-                            if chunk.type == 'content_block_delta':
-                                if chunk.delta.text:
-                                    yield chunk.delta.text
-                return response_generator()
+                    try:
+                        async for chunk in response:
+                            if hasattr(chunk, 'type'):
+                                if chunk.type == 'content_block_delta':
+                                    if chunk.delta.text:
+                                        yield chunk.delta.text
+                                elif chunk.type == 'message_start':
+                                    usage = chunk.message.usage
+                                    record_usage(metrics, usage.input_tokens, model=chunk.message.model)
+                                elif chunk.type == 'message_delta':
+                                    record_usage(metrics, output_tokens=chunk.usage.output_tokens)
+                    finally:
+                        # Release the HTTP stream if the caller stops reading early
+                        await close_response(response)
+                return get_stream_stats('claude', self.model).timed(response_generator(), started)
             
+            record_usage(
+                metrics,
+                response.usage.input_tokens,
+                response.usage.output_tokens,
+                response.model
+            )
             return response.content[0].text
             
         except Exception as e:
-            raise ValueError(f"Error generating Claude response: {str(e)}")
+            raise ValueError(f"Error generating Claude response: {str(e)}") from e
 
     async def stream(
         self,
@@ -63,8 +100,11 @@ class ClaudeProvider(LLMProvider):
                 stream=True,
                 **kwargs
             )
-            async for chunk in response_generator:
-                yield chunk
+            try:
+                async for chunk in response_generator:
+                    yield chunk
+            finally:
+                await close_response(response_generator)
         except Exception as e:
             print(f"Error in Claude stream: {str(e)}")
             raise
@@ -85,13 +125,12 @@ class ClaudeProvider(LLMProvider):
                 stream=False,
                 **kwargs
             )
-            
-            if output_format:
-                return self._parse_response(result, output_format)
-            return result
-            
         except Exception as e:
-            raise ValueError(f"Error generating Claude response: {str(e)}")
+            raise ValueError(f"Error generating Claude response: {str(e)}") from e
+        
+        if output_format:
+            return self._parse_response(result, output_format)
+        return result
 
     def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
         """Format prompt with output instructions"""
@@ -100,26 +139,3 @@ class ClaudeProvider(LLMProvider):
         elif output_format:
             prompt += f"\nProvide your response in {output_format} format."
         return prompt
-
-    def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
-        """Parse and validate response"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {str(e)}\nResponse: {response}")
-        return response
-
-    def validate_response(self, response: str, output_format: Optional[str]) -> bool:
-        """Validate response format"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                json.loads(json_str)
-                return True
-            except json.JSONDecodeError:
-                return False
-        return True 
\ No newline at end of file
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import random
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+from .base import LLMProvider
+from ..utils.histogram import get_stream_stats
+from ..utils.instrumentation import current_call, record_usage
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog stream token model latency "
+    "response request provider batch json value prompt system answer"
+).split()
+
+class SimulatedAPIError(Exception):
+    """Simulated provider failure, carrying its HTTP status like SDK errors do"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        super().__init__(f"simulated error (status {status_code})")
+
+@dataclass
+class FakeBehavior:
+    """
+    Simulated backend behaviour shared by FakeProvider and the fake HTTP server
+
+    Attributes:
+        ttft: Seconds before the first token
+        tokens_per_second: Output rate after the first token, or None for no limit
+        response_tokens: Number of generated tokens when no fixed response is set
+        error_rate: Probability in [0, 1] that a request fails
+        error_status: HTTP status reported for simulated failures
+        response: Fixed response text instead of generated words
+        seed: Seed for generated text and failures, for reproducible runs
+    """
+    ttft: float = 0.0
+    tokens_per_second: Optional[float] = None
+    response_tokens: int = 50
+    error_rate: float = 0.0
+    error_status: int = 500
+    response: Optional[str] = None
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+    @classmethod
+    def from_kwargs(cls, kwargs: Dict[str, Any]) -> "FakeBehavior":
+        """Build behaviour from the matching keys of a settings dictionary"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in kwargs.items() if k in names})
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def tokens(self, output_format: Optional[str] = None) -> List[str]:
+        """Produce the tokens of one response"""
+        if self.response is not None:
+            text = self.response
+        else:
+            words = [self.rng.choice(_WORDS) for _ in range(self.response_tokens)]
+            if output_format != 'json':
+                return [words[0]] + [f" {word}" for word in words[1:]] if words else []
+            text = json.dumps({"text": " ".join(words)})
+        # Fixed and JSON responses are split into 4-character tokens
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    async def paced(self, tokens: List[str]) -> AsyncIterator[str]:
+        """Yield tokens after the time-to-first-token, at the configured rate"""
+        loop = asyncio.get_running_loop()
+        if self.ttft:
+            await asyncio.sleep(self.ttft)
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        start = loop.time()
+        for index, token in enumerate(tokens):
+            if interval:
+                # Sleep only when ahead of schedule, so high rates do not pay per-token sleeps
+                delay = start + index * interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield token
+
+    async def wait_for_completion(self, tokens: List[str]):
+        """Sleep for as long as generating all tokens would take"""
+        delay = self.ttft
+        if self.tokens_per_second:
+            delay += max(len(tokens) - 1, 0) / self.tokens_per_second
+        if delay:
+            await asyncio.sleep(delay)
+
+class FakeProvider(LLMProvider):
+    """
+    In-process stand-in provider for load testing without network or API spend
+
+    Behaviour is configured through `FakeBehavior` settings passed as kwargs,
+    e.g. `LLMEasy(provider='fake', api_key='unused', ttft=0.2, tokens_per_second=50)`.
+    """
+
+    def __init__(self, api_key: str, **kwargs):
+        """Initialize fake provider"""
+        super().__init__(api_key, **kwargs)
+        self.model = self.config.model or "fake-model"
+        self.behavior = FakeBehavior.from_kwargs(kwargs)
+        self.client = None
+
+    async def _generate_response(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        stream: bool = False,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> Union[str, AsyncIterator[str]]:
+        """Generate a simulated response"""
+        if self.behavior.should_fail():
+            error = SimulatedAPIError(self.behavior.error_status)
+            raise ValueError(f"Error generating Fake response: {str(error)}") from error
+
+        tokens = self.behavior.tokens(output_format)
+        record_usage(current_call(), len(prompt.split()), len(tokens))
+        if stream:
+            return get_stream_stats('fake', self.model).timed(self.behavior.paced(tokens))
+
+        await self.behavior.wait_for_completion(tokens)
+        return "".join(tokens)
+
+    def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
+        """Format prompt with output instructions"""
+        if output_format == 'json':
+            prompt += "\nProvide your response in valid JSON format only. Do not include any explanatory text outside the JSON structure."
+        elif output_format:
+            prompt += f"\nProvide your response in {output_format} format."
+        return prompt
@@ -1,8 +1,11 @@
-import json
-from typing import Any, Optional, AsyncIterator, Union
+import time
+from typing import Optional, AsyncIterator, Union
 import google.generativeai as genai
-from .base import LLMProvider
+from .base import LLMProvider, close_response
+from ..conversation import gemini_contents
 from llmeasy.utils import settings
+from llmeasy.utils.histogram import get_stream_stats
+from llmeasy.utils.instrumentation import current_call, record_usage
 
 class GeminiProvider(LLMProvider):
     """Provider for Google's Gemini models"""
@@ -23,6 +26,13 @@ class GeminiProvider(LLMProvider):
         **kwargs
     ) -> Union[str, AsyncIterator[str]]:
         """Generate response from Gemini"""
+        metrics = current_call()
+        
+        def report(response):
+            usage = getattr(response, 'usage_metadata', None)
+            if usage is not None:
+                record_usage(metrics, usage.prompt_token_count, usage.candidates_token_count)
+                
         try:
             # Combine system prompt and user prompt for Gemini
             full_prompt = f"{system}\n\n{prompt}" if system else prompt
@@ -31,9 +41,12 @@ class GeminiProvider(LLMProvider):
             kwargs.pop('max_tokens', None)
             kwargs.pop('output_format', None)
             kwargs.pop('system', None)
+            kwargs.pop('connect_timeout', None)
+            contents = gemini_contents(kwargs.pop('history', None))
             
+            started = time.perf_counter_ns()
             response = await self.client.generate_content_async(
-                full_prompt,
+                contents + [{"role": "user", "parts": [full_prompt]}] if contents else full_prompt,
                 generation_config={
                     'temperature': self.config.temperature,
                     'max_output_tokens': self.config.max_tokens,
@@ -44,15 +57,23 @@ class GeminiProvider(LLMProvider):
             
             if stream:
                 async def response_generator():
-                    async for chunk in response:
-                        if chunk.text:
-                            yield chunk.text
-                return response_generator()
+                    try:
+                        async for chunk in response:
+                            if chunk.text:
+                                yield chunk.text
+                            # Every chunk carries the usage so far
+                            if metrics is not None:
+                                report(chunk)
+                    finally:
+                        # Release the HTTP stream if the caller stops reading early
+                        await close_response(response)
+                return get_stream_stats('gemini', self.model).timed(response_generator(), started)
             
+            report(response)
             return response.text
             
         except Exception as e:
-            raise ValueError(f"Error generating Gemini response: {str(e)}")
+            raise ValueError(f"Error generating Gemini response: {str(e)}") from e
 
     def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
         """Format prompt with output instructions"""
@@ -61,26 +82,3 @@ class GeminiProvider(LLMProvider):
         elif output_format:
             prompt += f"\nProvide your response in {output_format} format."
         return prompt
-
-    def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
-        """Parse and validate response"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {str(e)}\nResponse: {response}")
-        return response
-
-    def validate_response(self, response: str, output_format: Optional[str]) -> bool:
-        """Validate response format"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                json.loads(json_str)
-                return True
-            except json.JSONDecodeError:
-                return False
-        return True
\ No newline at end of file
@@ -1,8 +1,12 @@
-import json
-from typing import Any, Optional, AsyncIterator, Union
+import time
+from typing import Optional, AsyncIterator, Union
+import openai
 from openai import AsyncOpenAI
-from .base import LLMProvider
+from .base import LLMProvider, close_response
+from ..conversation import openai_messages
 from llmeasy.utils import settings
+from llmeasy.utils.histogram import get_stream_stats
+from llmeasy.utils.instrumentation import current_call, record_usage
 
 class GrokProvider(LLMProvider):
     """Provider for xAI's Grok models"""
@@ -10,9 +14,18 @@ class GrokProvider(LLMProvider):
     def __init__(self, api_key: str, **kwargs):
         """Initialize Grok provider"""
         super().__init__(api_key, **kwargs)
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url="https://api.x.ai/v1"
+        base_url = getattr(self.config, 'base_url', None) or "https://api.x.ai/v1"
+        self.client = self._create_client(
+            'grok',
+            openai,
+            lambda http_client: AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                # Retries are handled by LLMEasy's RetryPolicy
+                max_retries=0
+            ),
+            base_url=base_url
         )
         self.model = self.config.model or settings.grok_model
 
@@ -25,6 +38,7 @@ class GrokProvider(LLMProvider):
         **kwargs
     ) -> Union[str, AsyncIterator[str]]:
         """Generate response from Grok"""
+        metrics = current_call()
         try:
             # Create messages array with system prompt if provided
             messages = []
@@ -35,12 +49,14 @@ class GrokProvider(LLMProvider):
                     "role": "system",
                     "content": "You are Grok, a chatbot inspired by the Hitchhiker's Guide to the Galaxy."
                 })
+            messages.extend(openai_messages(kwargs.pop('history', None)))
             messages.append({"role": "user", "content": prompt})
             
             # Remove parameters that Grok API doesn't accept
             kwargs.pop('max_tokens', None)
             kwargs.pop('output_format', None)
             kwargs.pop('system', None)
+            request_timeout = self._request_timeout(kwargs)
             
             completion_kwargs = {
                 'model': self.model,
@@ -48,30 +64,47 @@ class GrokProvider(LLMProvider):
                 'max_tokens': self.config.max_tokens,
                 'temperature': self.config.temperature,
                 'stream': stream,
+                **request_timeout,
                 **kwargs
             }
             
+            started = time.perf_counter_ns()
             try:
                 response = await self.client.chat.completions.create(**completion_kwargs)
-            except Exception as e:
-                if "model grok-1 does not exist" in str(e):
-                    # Try with grok-beta if grok-1 fails
-                    completion_kwargs['model'] = "grok-beta"
-                    response = await self.client.chat.completions.create(**completion_kwargs)
-                else:
+            except openai.NotFoundError:
+                # Fall back when the configured model is not available to this account
+                fallback_model = getattr(self.config, 'fallback_model', 'grok-beta')
+                if not fallback_model or fallback_model == self.model:
                     raise
+                completion_kwargs['model'] = fallback_model
+                response = await self.client.chat.completions.create(**completion_kwargs)
             
             if stream:
                 async def response_generator():
-                    async for chunk in response:
-                        if chunk.choices[0].delta.content:
-                            yield chunk.choices[0].delta.content
-                return response_generator()
+                    try:
+                        async for chunk in response:
+                            # The usage chunk at the end of a stream has no choices
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                yield chunk.choices[0].delta.content
+                            usage = getattr(chunk, 'usage', None)
+                            if usage is not None:
+                                record_usage(metrics, usage.prompt_tokens, usage.completion_tokens, chunk.model)
+                    finally:
+                        # Release the HTTP stream if the caller stops reading early
+                        await close_response(response)
+                return get_stream_stats('grok', self.model).timed(response_generator(), started)
             
+            if response.usage is not None:
+                record_usage(
+                    metrics,
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    response.model
+                )
             return response.choices[0].message.content
             
         except Exception as e:
-            raise ValueError(f"Error generating Grok response: {str(e)}")
+            raise ValueError(f"Error generating Grok response: {str(e)}") from e
 
     def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
         """Format prompt with output instructions"""
@@ -80,26 +113,3 @@ class GrokProvider(LLMProvider):
         elif output_format:
             prompt += f"\nProvide your response in {output_format} format."
         return prompt
-
-    def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
-        """Parse and validate response"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {str(e)}\nResponse: {response}")
-        return response
-
-    def validate_response(self, response: str, output_format: Optional[str]) -> bool:
-        """Validate response format"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                json.loads(json_str)
-                return True
-            except json.JSONDecodeError:
-                return False
-        return True 
\ No newline at end of file
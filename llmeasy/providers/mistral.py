@@ -1,11 +1,14 @@
-import json
+import logging
 from typing import Any, Optional, AsyncIterator, Union
-from mistralai.client import MistralClient
+from mistralai.async_client import MistralAsyncClient
 from mistralai.models.chat_completion import ChatMessage
 from ..base import BaseProvider
+from ..conversation import iter_messages
+from .base import close_response
+from ..utils.instrumentation import current_call, record_usage
 from typing import AsyncGenerator, Dict, Any
-import asyncio
-from functools import partial
+
+logger = logging.getLogger(__name__)
 
 class MistralProvider(BaseProvider):
     """Provider for Mistral AI models"""
@@ -22,68 +25,83 @@ class MistralProvider(BaseProvider):
     def __init__(self, api_key: str, **kwargs):
         """Initialize Mistral provider"""
         super().__init__(**kwargs)
-        self.client = MistralClient(api_key=api_key)
+        # Retries are handled by LLMEasy's RetryPolicy
+        self.client = MistralAsyncClient(api_key=api_key, max_retries=0)
         self.model = kwargs.get('model', 'mistral-medium')
 
     def _filter_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """Filter kwargs to only include supported parameters"""
         return {k: v for k, v in kwargs.items() if k in self.SUPPORTED_PARAMS}
 
-    async def query(self, prompt: str, system: Optional[str] = None, **kwargs) -> str:
+    async def query(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> Any:
         messages = []
         if system:
             messages.append(ChatMessage(role="system", content=system))
-        messages.append(ChatMessage(role="user", content=prompt))
+        messages.extend(ChatMessage(role=m.role, content=m.content) for m in iter_messages(kwargs.get('history')))
+        messages.append(ChatMessage(role="user", content=self._format_prompt(prompt, output_format)))
 
         # Filter kwargs to only include supported parameters
         filtered_kwargs = self._filter_kwargs(kwargs)
 
-        # Run the synchronous chat method in a thread pool
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            partial(
-                self.client.chat,
-                model=self.model,
-                messages=messages,
-                **filtered_kwargs
-            )
+        response = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            **filtered_kwargs
         )
         
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            record_usage(current_call(), usage.prompt_tokens, usage.completion_tokens, response.model)
+        
         # Extract content from the correct response structure
         try:
             # First try the new response structure
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
         except (AttributeError, IndexError) as e:
             # Fallback to older response structure if available
             try:
-                return response.choices[0].delta.content
+                content = response.choices[0].delta.content
             except (AttributeError, IndexError):
                 raise ValueError(f"Unable to extract content from Mistral response: {str(e)}\nResponse structure: {response}")
+        
+        return self._parse_response(content, output_format)
 
-    async def stream(self, prompt: str, system: Optional[str] = None, **kwargs) -> AsyncGenerator[str, None]:
+    async def stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
         messages = []
         if system:
             messages.append(ChatMessage(role="system", content=system))
-        messages.append(ChatMessage(role="user", content=prompt))
+        messages.extend(ChatMessage(role=m.role, content=m.content) for m in iter_messages(kwargs.get('history')))
+        messages.append(ChatMessage(role="user", content=self._format_prompt(prompt, output_format)))
 
         # Filter kwargs to only include supported parameters
         filtered_kwargs = self._filter_kwargs(kwargs)
 
-        # Get the synchronous stream
-        stream = await asyncio.get_event_loop().run_in_executor(
-            None,
-            partial(
-                self.client.chat_stream,
-                model=self.model,
-                messages=messages,
-                **filtered_kwargs
-            )
+        stream = self.client.chat_stream(
+            model=self.model,
+            messages=messages,
+            **filtered_kwargs
         )
 
         # Process the stream in chunks
+        metrics = current_call()
         try:
-            for chunk in stream:
+            async for chunk in stream:
+                # The last chunk carries the usage of the whole request
+                usage = getattr(chunk, 'usage', None)
+                if usage is not None:
+                    record_usage(metrics, usage.prompt_tokens, usage.completion_tokens, chunk.model)
                 try:
                     # Try new response structure
                     if content := chunk.choices[0].delta.content:
@@ -97,7 +115,14 @@ class MistralProvider(BaseProvider):
                         logger.warning(f"Unable to extract content from chunk: {e}")
                         continue
         except Exception as e:
-            raise ValueError(f"Error processing Mistral stream: {str(e)}")
+            raise ValueError(f"Error processing Mistral stream: {str(e)}") from e
+        finally:
+            # Release the HTTP stream if the caller stops reading early
+            await close_response(stream)
+
+    async def cleanup(self):
+        """Close the underlying HTTP client"""
+        await self.client.close()
 
     def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
         """Format prompt with output instructions"""
@@ -107,27 +132,3 @@ class MistralProvider(BaseProvider):
         elif output_format:
             formatted_prompt += f"\nProvide your response in {output_format} format."
         return formatted_prompt
-
-    def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
-        """Parse and validate response"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {str(e)}\nResponse: {response}")
-        return response
-
-    def validate_response(self, response: str, output_format: Optional[str]) -> bool:
-        """Validate response format"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                json.loads(json_str)
-                return True
-            except json.JSONDecodeError:
-                return False
-        return True
-
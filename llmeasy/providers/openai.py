@@ -1,8 +1,12 @@
-import json
-from typing import Any, Optional, AsyncIterator, Union
+import time
+from typing import Optional, AsyncIterator, Union
+import openai
 from openai import AsyncOpenAI
-from .base import LLMProvider
+from .base import LLMProvider, close_response
+from ..conversation import openai_messages
 from llmeasy.utils import settings
+from llmeasy.utils.histogram import get_stream_stats
+from llmeasy.utils.instrumentation import current_call, record_usage
 
 class OpenAIProvider(LLMProvider):
     """Provider for OpenAI's GPT models"""
@@ -10,7 +14,19 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, api_key: str, **kwargs):
         """Initialize OpenAI provider"""
         super().__init__(api_key, **kwargs)
-        self.client = AsyncOpenAI(api_key=api_key)
+        base_url = getattr(self.config, 'base_url', None)
+        self.client = self._create_client(
+            'openai',
+            openai,
+            lambda http_client: AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=http_client,
+                # Retries are handled by LLMEasy's RetryPolicy
+                max_retries=0
+            ),
+            base_url=base_url
+        )
         self.model = self.config.model or settings.openai_model
 
     async def _generate_response(
@@ -22,17 +38,20 @@ class OpenAIProvider(LLMProvider):
         **kwargs
     ) -> Union[str, AsyncIterator[str]]:
         """Generate response from OpenAI"""
+        metrics = current_call()
         try:
             # Create messages array with system prompt if provided
             messages = []
             if system:
                 messages.append({"role": "system", "content": system})
+            messages.extend(openai_messages(kwargs.pop('history', None)))
             messages.append({"role": "user", "content": prompt})
             
             # Remove parameters that OpenAI API doesn't accept
             kwargs.pop('max_tokens', None)
             kwargs.pop('output_format', None)
             kwargs.pop('system', None)  # Remove system from kwargs since we handle it separately
+            request_timeout = self._request_timeout(kwargs)
             
             completion_kwargs = {
                 'model': self.model,
@@ -40,26 +59,47 @@ class OpenAIProvider(LLMProvider):
                 'max_tokens': self.config.max_tokens,
                 'temperature': self.config.temperature,
                 'stream': stream,
+                **request_timeout,
                 **kwargs
             }
             
+            # Streams only report usage when asked to; ask only when someone observes it
+            if stream and metrics is not None:
+                completion_kwargs.setdefault('stream_options', {'include_usage': True})
+            
             # Add response format for JSON output
             if output_format == 'json':
                 completion_kwargs['response_format'] = {"type": "json_object"}
             
+            started = time.perf_counter_ns()
             response = await self.client.chat.completions.create(**completion_kwargs)
             
             if stream:
                 async def response_generator():
-                    async for chunk in response:
-                        if chunk.choices[0].delta.content:
-                            yield chunk.choices[0].delta.content
-                return response_generator()
+                    try:
+                        async for chunk in response:
+                            # The usage chunk at the end of a stream has no choices
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                yield chunk.choices[0].delta.content
+                            usage = getattr(chunk, 'usage', None)
+                            if usage is not None:
+                                record_usage(metrics, usage.prompt_tokens, usage.completion_tokens, chunk.model)
+                    finally:
+                        # Release the HTTP stream if the caller stops reading early
+                        await close_response(response)
+                return get_stream_stats('openai', self.model).timed(response_generator(), started)
             
+            if response.usage is not None:
+                record_usage(
+                    metrics,
+                    response.usage.prompt_tokens,
+                    response.usage.completion_tokens,
+                    response.model
+                )
             return response.choices[0].message.content
             
         except Exception as e:
-            raise ValueError(f"Error generating OpenAI response: {str(e)}")
+            raise ValueError(f"Error generating OpenAI response: {str(e)}") from e
 
     def _format_prompt(self, prompt: str, output_format: Optional[str]) -> str:
         """Format prompt with output instructions"""
@@ -68,27 +108,3 @@ class OpenAIProvider(LLMProvider):
         elif output_format:
             prompt += f"\nProvide your response in {output_format} format."
         return prompt
-
-    def _parse_response(self, response: str, output_format: Optional[str]) -> Any:
-        """Parse and validate response"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {str(e)}\nResponse: {response}")
-        return response
-
-    def validate_response(self, response: str, output_format: Optional[str]) -> bool:
-        """Validate response format"""
-        if output_format == 'json':
-            try:
-                # Strip any potential markdown formatting
-                json_str = response.strip().strip('```json').strip('```').strip()
-                json.loads(json_str)
-                return True
-            except json.JSONDecodeError:
-                return False
-        return True
-
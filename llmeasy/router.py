@@ -0,0 +1,261 @@
+"""
+Load balancing across several LLMEasy backends
+"""
+import math
+import random
+import time
+from typing import Any, AsyncGenerator, Iterable, List, Optional, Sequence, Union
+from .core import LLMEasy
+from .exceptions import CircuitOpenError, JSONResponseError
+from .utils.retry import is_retryable
+
+POLICIES = ('round_robin', 'least_outstanding', 'ewma', 'cost')
+
+class Backend:
+    """
+    One provider and model behind a `Router`, with its load and health statistics
+
+    Args:
+        llm: Configured `LLMEasy` instance
+        name: Label used in errors and stats, `provider:model` by default
+        cost: Relative price of a request, used by the 'cost' policy
+        weight: Relative share of traffic under the 'cost' policy
+    """
+
+    def __init__(self, llm: LLMEasy, name: Optional[str] = None, cost: float = 1.0, weight: float = 1.0):
+        self.llm = llm
+        self.name = name or f"{llm.provider_name}:{getattr(llm.provider, 'model', None)}"
+        self.cost = cost
+        self.weight = weight
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma: Optional[float] = None
+        self.last_sample = 0.0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def latency(self, now: float, half_life: float) -> float:
+        """
+        Latency estimate, decaying towards zero while no samples arrive
+
+        The decay makes idle backends look attractive again over time, so a
+        backend that was slow is re-measured once it may have recovered.
+        """
+        if self.ewma is None:
+            return 0.0
+        return self.ewma * 0.5 ** ((now - self.last_sample) / half_life)
+
+    def __repr__(self) -> str:
+        return f"Backend({self.name!r}, outstanding={self.outstanding}, ewma={self.ewma})"
+
+class Router:
+    """
+    Route each request to one of several providers and models
+
+    Policies:
+        round_robin: Take turns
+        least_outstanding: Fewest requests in flight
+        ewma: Lowest exponentially weighted moving average latency, scaled
+            by requests in flight, so traffic shifts to whichever backend is
+            fastest right now
+        cost: Random choice weighted by `weight / cost`
+
+    Backends failing `max_failures` times in a row are ejected for
+    `ejection_time` seconds, doubling with every further ejection up to
+    `max_ejection_time`. At most `max_ejection_percent` of the backends are
+    ejected at once. With `failover`, a request that failed with a transient
+    error or an open circuit (or a stream that failed before its first chunk)
+    is retried once on each other backend.
+
+    Args:
+        backends: `LLMEasy` instances or `Backend` entries
+        policy: One of 'round_robin', 'least_outstanding', 'ewma' or 'cost'
+        failover: Retry failed requests on other backends
+        max_failures: Consecutive failures before a backend is ejected
+        ejection_time: Base ejection period in seconds
+        max_ejection_time: Longest ejection period in seconds
+        max_ejection_percent: Largest share of backends ejected at the same time
+        ewma_alpha: Weight of the newest latency sample
+        ewma_half_life: Seconds without samples after which a latency estimate halves
+        seed: Seed for the 'cost' policy's random choices
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Union[LLMEasy, Backend]],
+        policy: str = 'ewma',
+        failover: bool = True,
+        max_failures: int = 5,
+        ejection_time: float = 30.0,
+        max_ejection_time: float = 300.0,
+        max_ejection_percent: float = 50.0,
+        ewma_alpha: float = 0.3,
+        ewma_half_life: float = 30.0,
+        seed: Optional[int] = None
+    ):
+        if not backends:
+            raise ValueError("Router needs at least one backend")
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported routing policy: {policy}")
+        self.backends: List[Backend] = [
+            backend if isinstance(backend, Backend) else Backend(backend)
+            for backend in backends
+        ]
+        self.policy = policy
+        self.failover = failover
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.max_ejection_percent = max_ejection_percent
+        self.ewma_alpha = ewma_alpha
+        self.ewma_half_life = ewma_half_life
+        self._next = 0
+        self._rng = random.Random(seed)
+
+    def select(self, exclude: Iterable[Backend] = ()) -> Backend:
+        """Pick the backend for the next request according to the policy"""
+        now = time.monotonic()
+        excluded = set(map(id, exclude))
+        candidates = [b for b in self.backends if id(b) not in excluded]
+        if not candidates:
+            raise ValueError("No backend left to route the request to")
+        healthy = [b for b in candidates if not b.is_ejected(now)] or candidates
+
+        if self.policy == 'round_robin':
+            backend = healthy[self._next % len(healthy)]
+            self._next += 1
+            return backend
+        if self.policy == 'least_outstanding':
+            return min(healthy, key=lambda b: b.outstanding)
+        if self.policy == 'cost':
+            weights = [b.weight / b.cost if b.cost > 0 else math.inf for b in healthy]
+            if math.inf in weights:
+                return healthy[weights.index(math.inf)]
+            return self._rng.choices(healthy, weights=weights)[0]
+        return min(
+            healthy,
+            key=lambda b: (b.latency(now, self.ewma_half_life) * (b.outstanding + 1), b.outstanding)
+        )
+
+    def _record_success(self, backend: Backend, latency: float):
+        backend.consecutive_failures = 0
+        if not backend.is_ejected(time.monotonic()):
+            backend.ejections = 0
+        if backend.ewma is None:
+            backend.ewma = latency
+        else:
+            backend.ewma += self.ewma_alpha * (latency - backend.ewma)
+        backend.last_sample = time.monotonic()
+
+    def _record_failure(self, backend: Backend, error: Exception):
+        # Malformed output says nothing about the backend's health
+        if isinstance(error, JSONResponseError):
+            return
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.max_failures:
+            self._eject(backend)
+
+    def _eject(self, backend: Backend):
+        now = time.monotonic()
+        ejected = sum(b.is_ejected(now) for b in self.backends)
+        if (ejected + 1) * 100 > self.max_ejection_percent * len(self.backends):
+            return
+        period = min(self.ejection_time * 2 ** backend.ejections, self.max_ejection_time)
+        backend.ejected_until = now + period
+        backend.ejections += 1
+        backend.consecutive_failures = 0
+
+    def _can_fail_over(self, error: Exception, tried: List[Backend]) -> bool:
+        return (
+            self.failover
+            and len(tried) < len(self.backends)
+            and (isinstance(error, CircuitOpenError) or is_retryable(error))
+        )
+
+    async def query(
+        self,
+        prompt: Optional[str] = None,
+        system: Optional[str] = None,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> Any:
+        """Get a complete response from the selected backend"""
+        tried: List[Backend] = []
+        while True:
+            backend = self.select(exclude=tried)
+            tried.append(backend)
+            backend.requests += 1
+            backend.outstanding += 1
+            start = time.monotonic()
+            try:
+                response = await backend.llm.query(prompt, system, output_format, **kwargs)
+            except Exception as e:
+                self._record_failure(backend, e)
+                if not self._can_fail_over(e, tried):
+                    raise
+                continue
+            finally:
+                backend.outstanding -= 1
+            self._record_success(backend, time.monotonic() - start)
+            return response
+
+    async def stream(
+        self,
+        prompt: Optional[str] = None,
+        system: Optional[str] = None,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream a response from the selected backend
+
+        Streams are balanced on their time to first chunk.
+        """
+        tried: List[Backend] = []
+        while True:
+            backend = self.select(exclude=tried)
+            tried.append(backend)
+            backend.requests += 1
+            backend.outstanding += 1
+            start = time.monotonic()
+            stream = backend.llm.stream(prompt, system, output_format, **kwargs)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                backend.outstanding -= 1
+                self._record_success(backend, time.monotonic() - start)
+                return
+            except Exception as e:
+                backend.outstanding -= 1
+                await stream.aclose()
+                self._record_failure(backend, e)
+                if not self._can_fail_over(e, tried):
+                    raise
+                continue
+            except BaseException:
+                backend.outstanding -= 1
+                await stream.aclose()
+                raise
+            break
+
+        self._record_success(backend, time.monotonic() - start)
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+            await stream.aclose()
+
+    # JSON streaming and batches only need `stream` and `query`
+    stream_json = LLMEasy.stream_json
+    batch_process = LLMEasy.batch_process
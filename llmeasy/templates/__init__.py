@@ -1 +1 @@
-from .template_parser import PromptTemplate 
\ No newline at end of file
+from .template_parser import PromptTemplate, compile_template, render_template 
\ No newline at end of file
@@ -1,35 +1,213 @@
-from typing import Dict, Any
+from functools import lru_cache
+from itertools import starmap, zip_longest
+from typing import Dict, Any, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 from string import Template
 
 class PromptTemplate:
     def __init__(self, template: str):
-        """Initialize template with string.Template"""
+        """
+        Compile a `string.Template` style template
+
+        The template is parsed once into literal text and variable slots, so
+        formatting only joins strings.
+
+        Raises:
+            ValueError: If the template has an invalid placeholder
+        """
         self.template = Template(template)
-        
+        parts: List[str] = []
+        slots: List[Tuple[int, str]] = []
+        literal: List[str] = []
+        position = 0
+        for match in Template.pattern.finditer(template):
+            literal.append(template[position:match.start()])
+            position = match.end()
+            if match.group('escaped') is not None:
+                literal.append('$')
+                continue
+            name = match.group('named') or match.group('braced')
+            if name is None:
+                start = match.start()
+                raise ValueError(
+                    f"Template formatting error: Invalid placeholder in string: "
+                    f"line {template.count(chr(10), 0, start) + 1}, "
+                    f"col {start - template.rfind(chr(10), 0, start)}"
+                )
+            parts.append(''.join(literal))
+            literal = []
+            slots.append((len(parts), name))
+            parts.append('')
+        literal.append(template[position:])
+        parts.append(''.join(literal))
+        self._parts = parts
+        self._slots = slots
+        self.variables: FrozenSet[str] = frozenset(name for _, name in slots)
+        # Positional format string for batches: one field per distinct variable
+        self._names: Tuple[str, ...] = tuple(dict.fromkeys(name for _, name in slots))
+        positions = {name: position for position, name in enumerate(self._names)}
+        fields = dict(slots)
+        self._batch_format = ''.join(
+            f"{{{positions[fields[index]]}!s}}" if index in fields
+            else part.replace('{', '{{').replace('}', '}}')
+            for index, part in enumerate(parts)
+        )
+
     def format(self, **kwargs) -> str:
         """
         Format template with provided variables
-        
+
         Args:
             **kwargs: Variables to substitute in template
-            
+
         Returns:
             Formatted prompt string
-            
+
+        Raises:
+            KeyError: If a required template variable is missing
+        """
+        return self.render(kwargs)
+
+    def render(self, variables: Mapping[str, Any]) -> str:
+        """Format the template from a mapping of variables; None renders as ''"""
+        missing = self.variables.difference(variables)
+        if missing:
+            raise KeyError(f"Missing required template variable: {min(missing)!r}")
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            value = variables[name]
+            parts[index] = value if type(value) is str else ('' if value is None else str(value))
+        return ''.join(parts)
+
+    def render_batch(
+        self,
+        data: Union[Mapping[str, Sequence[Any]], Iterable[Mapping[str, Any]], Any]
+    ) -> Iterator[str]:
+        """
+        Lazily render one prompt per row of a batch of variables
+
+        Args:
+            data: Columns as a dict of equal-length sequences or iterators, a
+                pandas DataFrame or a pyarrow Table or RecordBatch, or an
+                iterable of row dicts. Columns are checked for missing variables
+                once, before the first row; row dicts are checked row by row
+
         Raises:
             KeyError: If a required template variable is missing
-            ValueError: If template substitution fails
-        """
-        try:
-            # Handle None values
-            cleaned_kwargs = {
-                k: (str(v) if v is not None else '')
-                for k, v in kwargs.items()
-            }
-            return self.template.substitute(**cleaned_kwargs)
-        except KeyError as e:
-            # Re-raise KeyError for missing variables
-            raise KeyError(f"Missing required template variable: {str(e)}")
-        except ValueError as e:
-            # Handle other template errors
-            raise ValueError(f"Template formatting error: {str(e)}")
\ No newline at end of file
+            ValueError: If columns differ in length; before the first row for
+                sequences, when the shortest runs out for iterator columns
+        """
+        if isinstance(data, Mapping):
+            return self._render_columns(data)
+        if hasattr(data, 'column_names'):
+            self._check_columns(data.column_names)
+            return self._render_arrow(data)
+        if hasattr(data, 'columns') and hasattr(data, 'iloc'):
+            self._check_columns(data.columns)
+            return self._render_columns({name: data[name].tolist() for name in self._names})
+        return (self.render(row) for row in data)
+
+    def format_many(self, **columns: Sequence[Any]) -> Iterator[str]:
+        """Lazily render one prompt per row of equal-length column keyword arguments"""
+        return self.render_batch(columns)
+
+    def _check_columns(self, names: Iterable[str]):
+        missing = self.variables.difference(names)
+        if missing:
+            raise KeyError(f"Missing required template variable: {min(missing)!r}")
+
+    def _render_columns(self, columns: Mapping[str, Sequence[Any]]) -> Iterator[str]:
+        self._check_columns(columns.keys())
+        selected = []
+        lengths = set()
+        sized = True
+        for name in self._names:
+            column = columns[name]
+            if hasattr(column, '__len__'):
+                lengths.add(len(column))
+            else:
+                sized = False
+            # None renders as '', like `format`; the scan is skipped for columns without None
+            if not isinstance(column, (list, tuple)) or None in column:
+                column = map(_none_as_empty, column)
+            selected.append(column)
+        if len(lengths) > 1:
+            raise ValueError(f"Template variable columns differ in length: {sorted(lengths)}")
+        if not selected:
+            return self._render_constant(columns)
+        if sized:
+            return map(self._batch_format.format, *selected)
+        return self._render_unsized(selected)
+
+    def _render_unsized(self, columns: List[Iterable[Any]]) -> Iterator[str]:
+        """Rows of columns including iterators, which must run out together"""
+        return starmap(self._batch_format.format, _zip_columns(columns))
+
+    def _render_constant(self, columns: Mapping[str, Sequence[Any]]) -> Iterator[str]:
+        """
+        Rows of a template without variables, one per row of the columns
+
+        Sized columns give as many rows as the longest; columns including
+        iterators must run out together.
+        """
+        text = ''.join(self._parts)
+        values = list(columns.values())
+        if all(hasattr(column, '__len__') for column in values):
+            rows = max((len(column) for column in values), default=0)
+            return (text for _ in range(rows))
+        return (text for _ in _zip_columns(values))
+
+    def _render_arrow(self, table: Any) -> Iterator[str]:
+        batches = table.to_batches() if hasattr(table, 'to_batches') else [table]
+        for batch in batches:
+            yield from self._render_columns({
+                name: batch.column(batch.schema.get_field_index(name)).to_pylist()
+                for name in self._names
+            })
+
+# Marks an exhausted column
+_END = object()
+
+def _zip_columns(columns: List[Iterable[Any]]) -> Iterator[Tuple[Any, ...]]:
+    """Rows of columns, which must run out together"""
+    for row in zip_longest(*columns, fillvalue=_END):
+        for value in row:
+            if value is _END:
+                raise ValueError("Template variable columns differ in length")
+        yield row
+
+def _none_as_empty(value: Any) -> Any:
+    return '' if value is None else value
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> PromptTemplate:
+    """Get the compiled template of a template string, compiling it on first use"""
+    return PromptTemplate(template)
+
+def render_template(
+    template: Union[str, Dict[str, str], PromptTemplate],
+    variables: Optional[Mapping[str, Any]] = None,
+    system: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Render a prompt template and its system prompt
+
+    Args:
+        template: Prompt template string, compiled `PromptTemplate`, or a dict
+            with a 'prompt' and optionally a 'system' template
+        variables: Values of the template variables
+        system: System prompt used when the template has none
+
+    Returns:
+        The rendered prompt and system prompt
+    """
+    variables = variables or {}
+    if isinstance(template, PromptTemplate):
+        return template.render(variables), system
+    if isinstance(template, str):
+        return compile_template(template).render(variables), system
+    if 'prompt' not in template:
+        raise ValueError("Template dict needs a 'prompt' entry")
+    prompt = compile_template(template['prompt']).render(variables)
+    if template.get('system') is not None:
+        system = compile_template(template['system']).render(variables)
+    return prompt, system
@@ -0,0 +1,12 @@
+"""
+Tools for testing and load testing code built on llmeasy without network access
+"""
+
+from ..providers.fake import FakeBehavior, FakeProvider
+from .fake_server import FakeProviderServer
+
+__all__ = [
+    "FakeBehavior",
+    "FakeProvider",
+    "FakeProviderServer",
+]
@@ -0,0 +1,268 @@
+"""
+Local HTTP server that speaks the OpenAI and Anthropic wire formats
+
+Serves `POST /v1/chat/completions` (OpenAI) and `POST /v1/messages` (Anthropic),
+both streaming (server-sent events) and non-streaming, with the simulated
+latency, throughput, payload size and error behaviour of `FakeBehavior`.
+Point a provider at it with `base_url`:
+
+    async with FakeProviderServer(ttft=0.1, tokens_per_second=100) as server:
+        llm = LLMEasy(provider='openai', api_key='unused', base_url=server.openai_base_url)
+
+Or run it standalone:
+
+    python -m llmeasy.testing.fake_server --port 8080 --ttft 0.1 --tokens-per-second 100
+"""
+import argparse
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+from ..providers.fake import FakeBehavior
+
+try:
+    from aiohttp import web
+except ImportError:  # pragma: no cover - aiohttp is a package dependency
+    web = None
+
+def _count_tokens(payload: Dict[str, Any]) -> int:
+    """Rough prompt token count: whitespace-separated words in every message"""
+    count = 0
+    system = payload.get('system')
+    if isinstance(system, str):
+        count += len(system.split())
+    for message in payload.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, str):
+            count += len(content.split())
+    return count
+
+class FakeProviderServer:
+    """
+    Fake OpenAI/Anthropic-compatible HTTP server for load testing
+
+    Args:
+        host: Interface to bind
+        port: Port to bind, 0 picks a free one
+        **behavior: `FakeBehavior` settings such as ttft, tokens_per_second,
+            response_tokens, error_rate and error_status
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **behavior):
+        if web is None:
+            raise ImportError("FakeProviderServer requires aiohttp")
+        self.host = host
+        self.port = port
+        self.behavior = FakeBehavior(**behavior)
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        """Base URL for the OpenAI and Grok providers"""
+        return f"{self.url}/v1"
+
+    @property
+    def anthropic_base_url(self) -> str:
+        """Base URL for the Claude provider"""
+        return self.url
+
+    def make_app(self) -> "web.Application":
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self._openai)
+        app.router.add_post('/v1/messages', self._anthropic)
+        return app
+
+    async def start(self):
+        """Start serving in the running event loop"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeProviderServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _sse(self, request: "web.Request") -> "web.StreamResponse":
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+        })
+        await response.prepare(request)
+        return response
+
+    async def _openai(self, request: "web.Request") -> "web.StreamResponse":
+        """OpenAI chat completions endpoint"""
+        self.requests += 1
+        payload = await request.json()
+        if self.behavior.should_fail():
+            return web.json_response({
+                'error': {
+                    'message': 'Simulated error',
+                    'type': 'server_error' if self.behavior.error_status >= 500 else 'rate_limit_error',
+                    'code': None,
+                }
+            }, status=self.behavior.error_status)
+
+        output_format = 'json' if payload.get('response_format', {}).get('type') == 'json_object' else None
+        tokens = self.behavior.tokens(output_format)
+        model = payload.get('model', 'fake-model')
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        prompt_tokens = _count_tokens(payload)
+
+        if not payload.get('stream'):
+            await self.behavior.wait_for_completion(tokens)
+            return web.json_response({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(tokens),
+                    'total_tokens': prompt_tokens + len(tokens),
+                },
+            })
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+            data = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        response = await self._sse(request)
+        await response.write(chunk({'role': 'assistant', 'content': ''}))
+        async for token in self.behavior.paced(tokens):
+            await response.write(chunk({'content': token}))
+        await response.write(chunk({}, 'stop'))
+        if (payload.get('stream_options') or {}).get('include_usage'):
+            # Usage is sent in a final chunk without choices
+            usage = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(tokens),
+                    'total_tokens': prompt_tokens + len(tokens),
+                },
+            }
+            await response.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _anthropic(self, request: "web.Request") -> "web.StreamResponse":
+        """Anthropic messages endpoint"""
+        self.requests += 1
+        payload = await request.json()
+        if self.behavior.should_fail():
+            error_type = 'api_error' if self.behavior.error_status >= 500 else 'rate_limit_error'
+            return web.json_response({
+                'type': 'error',
+                'error': {'type': error_type, 'message': 'Simulated error'},
+            }, status=self.behavior.error_status)
+
+        tokens = self.behavior.tokens()
+        model = payload.get('model', 'fake-model')
+        message_id = f"msg_{uuid.uuid4().hex}"
+        input_tokens = _count_tokens(payload)
+
+        if not payload.get('stream'):
+            await self.behavior.wait_for_completion(tokens)
+            return web.json_response({
+                'id': message_id,
+                'type': 'message',
+                'role': 'assistant',
+                'model': model,
+                'content': [{'type': 'text', 'text': ''.join(tokens)}],
+                'stop_reason': 'end_turn',
+                'stop_sequence': None,
+                'usage': {'input_tokens': input_tokens, 'output_tokens': len(tokens)},
+            })
+
+        def event(name: str, data: Dict[str, Any]) -> bytes:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n".encode()
+
+        response = await self._sse(request)
+        await response.write(event('message_start', {'message': {
+            'id': message_id,
+            'type': 'message',
+            'role': 'assistant',
+            'model': model,
+            'content': [],
+            'stop_reason': None,
+            'stop_sequence': None,
+            'usage': {'input_tokens': input_tokens, 'output_tokens': 0},
+        }}))
+        await response.write(event('content_block_start', {
+            'index': 0,
+            'content_block': {'type': 'text', 'text': ''},
+        }))
+        async for token in self.behavior.paced(tokens):
+            await response.write(event('content_block_delta', {
+                'index': 0,
+                'delta': {'type': 'text_delta', 'text': token},
+            }))
+        await response.write(event('content_block_stop', {'index': 0}))
+        await response.write(event('message_delta', {
+            'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+            'usage': {'output_tokens': len(tokens)},
+        }))
+        await response.write(event('message_stop', {}))
+        await response.write_eof()
+        return response
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI/Anthropic-compatible server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--ttft', type=float, default=0.0, help="Seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=None)
+    parser.add_argument('--response-tokens', type=int, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeProviderServer(
+        host=args.host,
+        port=args.port,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+def make_cache_key(**parts: Any) -> str:
+    """Build a stable cache key from request parameters"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class CacheBackend(ABC):
+    """
+    Base class for response cache backends
+
+    `LLMEasy` uses the async `aget` and `aset`, which call `get` and `set`
+    directly. Backends doing blocking I/O override them to run off the
+    event loop.
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        """Store a value under key"""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Remove all entries"""
+        pass
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """`get` for use on the event loop"""
+        return self.get(key, default)
+
+    async def aset(self, key: str, value: Any):
+        """`set` for use on the event loop"""
+        self.set(key, value)
+
+class MemoryCache(CacheBackend):
+    """
+    In-memory LRU cache
+
+    Args:
+        max_size: Maximum number of entries before the least recently used is evicted
+        ttl: Seconds an entry stays valid, or None to never expire
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            created_at, value = entry
+            if self.ttl is not None and time.monotonic() - created_at > self.ttl:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+        # Parsed JSON responses are mutable, so callers get their own copy
+        return value if isinstance(value, str) else copy.deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        if not isinstance(value, str):
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache(CacheBackend):
+    """
+    On-disk cache backed by SQLite that survives restarts
+
+    Values are stored as JSON. When `max_size` is exceeded the oldest entries
+    are evicted first. Disk I/O runs in a worker thread when the cache is used
+    by `LLMEasy`, so it never blocks the event loop.
+
+    Args:
+        path: Database file, defaults to ~/.llmeasy/cache.sqlite
+        ttl: Seconds an entry stays valid, or None to never expire
+        max_size: Maximum number of entries, or None for no limit
+        trim_interval: Writes between evictions; the cache may hold up to
+            `trim_interval - 1` entries more than `max_size` in between
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        trim_interval: int = 100
+    ):
+        if trim_interval < 1:
+            raise ValueError("trim_interval must be a positive integer")
+        self.path = path or os.path.expanduser("~/.llmeasy/cache.sqlite")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.trim_interval = trim_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            value, created_at = row
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return default
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        data = json.dumps(value)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, data, time.time())
+            )
+            self._writes += 1
+            # Eviction scans the table, so it only runs every `trim_interval` writes
+            if self.max_size is not None and self._writes % self.trim_interval == 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_size,)
+                )
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value: Any):
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
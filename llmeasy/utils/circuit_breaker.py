@@ -0,0 +1,187 @@
+"""
+Circuit breakers that stop calling a provider while it is failing
+
+A breaker starts closed and lets every call through. After
+`failure_threshold` consecutive failures it opens and rejects calls at once
+with `CircuitOpenError`, so no requests pile up waiting on timeouts. After
+`recovery_timeout` seconds it becomes half-open and lets up to
+`half_open_max_calls` probe calls through: `success_threshold` successful
+probes close it again, a failed probe re-opens it.
+"""
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from .retry import _exception_chain, _status_code, is_retryable
+from ..exceptions import CircuitOpenError
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+def is_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the provider is unhealthy
+
+    Transient errors count, except rate limiting, which says the caller is
+    too fast rather than the provider is down.
+    """
+    if not is_retryable(error):
+        return False
+    return not any(_status_code(cause) == 429 for cause in _exception_chain(error))
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one provider and model
+
+    Args:
+        name: Label used in `CircuitOpenError`
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds the circuit stays open before probing
+        half_open_max_calls: Probe calls allowed at once while half-open
+        success_threshold: Successful probes needed to close the circuit
+        is_failure: Predicate deciding which errors count as failures
+    """
+
+    def __init__(
+        self,
+        name: str = 'provider',
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+        is_failure: Callable[[BaseException], bool] = is_failure
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.is_failure = is_failure
+        self._state = CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the recovery timeout has passed"""
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self.successes = 0
+            self.probes = 0
+        return self._state
+
+    def before_call(self) -> bool:
+        """
+        Admit a call or raise `CircuitOpenError`
+
+        Returns True when the call is a half-open probe, which must be
+        reported with `on_success`, `on_failure` or `on_cancel`.
+        """
+        state = self.state
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self.probes < self.half_open_max_calls:
+            self.probes += 1
+            return True
+        retry_after = max(self.opened_at + self.recovery_timeout - time.monotonic(), 0.0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def on_success(self, probe: bool = False):
+        if probe:
+            self.probes -= 1
+        if self._state == HALF_OPEN:
+            self.successes += 1
+            if self.successes >= self.success_threshold:
+                self._state = CLOSED
+        self.failures = 0
+
+    def on_failure(self, error: BaseException, probe: bool = False):
+        if probe:
+            self.probes -= 1
+        if not self.is_failure(error):
+            # The provider answered, so the call says it is reachable
+            self.on_success()
+            return
+        self.failures += 1
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def on_cancel(self, probe: bool = False):
+        if probe:
+            self.probes -= 1
+
+    def trip(self):
+        """Open the circuit"""
+        self._state = OPEN
+        self.opened_at = time.monotonic()
+        self.failures = 0
+
+    def reset(self):
+        """Close the circuit"""
+        self._state = CLOSED
+        self.failures = 0
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Await `func()` if the circuit admits it, recording the outcome"""
+        probe = self.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            self.on_failure(e, probe)
+            raise
+        except BaseException:
+            self.on_cancel(probe)
+            raise
+        self.on_success(probe)
+        return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Yield the chunks of `open_stream()` if the circuit admits it
+
+        A stream counts as successful once its first chunk arrives.
+        """
+        probe = self.before_call()
+        stream = open_stream()
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            self.on_success(probe)
+            return
+        except Exception as e:
+            self.on_failure(e, probe)
+            await stream.aclose()
+            raise
+        except BaseException:
+            self.on_cancel(probe)
+            await stream.aclose()
+            raise
+        self.on_success(probe)
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+_breakers: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+_lock = threading.Lock()
+
+def get_circuit_breaker(provider: str, model: Optional[str], **options) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for a provider and model
+
+    Options apply when the breaker is created; later calls return it unchanged.
+    """
+    key = (provider, model)
+    with _lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            name = f"{provider}:{model}" if model else provider
+            breaker = CircuitBreaker(name, **options)
+            _breakers[key] = breaker
+    return breaker
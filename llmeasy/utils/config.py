@@ -4,8 +4,14 @@ import os
 from dataclasses import dataclass, asdict
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+_dotenv_loaded = False
+
+def _load_dotenv_once():
+    """Load environment variables from .env on first use instead of at import"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
 
 @dataclass
 class LLMSettings:
@@ -17,10 +23,33 @@ class LLMSettings:
     frequency_penalty: float = 0.0
     presence_penalty: float = 0.0
     timeout: int = 30
+    connect_timeout: float = 10.0
+    first_token_timeout: Optional[float] = None
+    idle_timeout: Optional[float] = None
     stream_chunk_size: int = 1000
     json_repair: bool = True
     max_buffer_size: int = 10000
     
+    # HTTP connection pool settings
+    share_http_clients: bool = False
+    http_max_connections: int = 1000
+    http_max_keepalive_connections: int = 100
+    http_keepalive_expiry: float = 5.0
+    http2: bool = False
+    
+    # Client-side rate limits, learned from response headers when unset
+    rate_limit_requests_per_minute: Optional[int] = None
+    rate_limit_tokens_per_minute: Optional[int] = None
+    
+    # Retries of transient failures
+    retry_attempts: int = 2
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    
+    # Circuit breaker thresholds
+    circuit_failure_threshold: int = 5
+    circuit_recovery_timeout: float = 30.0
+    
     # Provider-specific settings
     # Claude settings
     claude_model: str = "claude-3-sonnet-20240229"
@@ -76,13 +105,76 @@ class LLMSettings:
             'top_p': self.top_p,
             'frequency_penalty': self.frequency_penalty,
             'presence_penalty': self.presence_penalty,
+            'timeout': self.timeout,
+            'connect_timeout': self.connect_timeout,
+            'first_token_timeout': self.first_token_timeout,
+            'idle_timeout': self.idle_timeout,
+            'share_http_clients': self.share_http_clients,
+            'http_max_connections': self.http_max_connections,
+            'http_max_keepalive_connections': self.http_max_keepalive_connections,
+            'http_keepalive_expiry': self.http_keepalive_expiry,
+            'http2': self.http2,
+            'rate_limit_requests_per_minute': self.rate_limit_requests_per_minute,
+            'rate_limit_tokens_per_minute': self.rate_limit_tokens_per_minute,
+            'retry_attempts': self.retry_attempts,
+            'retry_base_delay': self.retry_base_delay,
+            'retry_max_delay': self.retry_max_delay,
+            'circuit_failure_threshold': self.circuit_failure_threshold,
+            'circuit_recovery_timeout': self.circuit_recovery_timeout,
         }
 
 class ConfigManager:
-    def __init__(self, config_path: Optional[str] = None):
+    """
+    Configuration file manager
+
+    The config file is read on first access rather than on construction, and
+    the result is cached. With `auto_reload=True` the file's mtime is checked on
+    every access and the settings are reloaded when it changes.
+    """
+    
+    def __init__(self, config_path: Optional[str] = None, auto_reload: bool = False):
         self.config_path = config_path or os.path.expanduser("~/.llmeasy/config.yaml")
-        self.config = self._load_config()
-        self.settings = self._load_settings()
+        self.auto_reload = auto_reload
+        self._config: Optional[Dict[str, Any]] = None
+        self._settings: Optional[LLMSettings] = None
+        self._mtime: Optional[int] = None
+        
+    def _get_mtime(self) -> Optional[int]:
+        """Get config file modification time, or None if it does not exist"""
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+            
+    def _ensure_loaded(self):
+        """Load the config file on first use, or when it changed if auto_reload is set"""
+        if self._config is None:
+            self.reload()
+        elif self.auto_reload and self._get_mtime() != self._mtime:
+            self.reload()
+            
+    def reload(self):
+        """Re-read configuration and settings from the config file"""
+        self._mtime = self._get_mtime()
+        self._config = self._load_config()
+        self._settings = self._load_settings()
+        
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Raw configuration dictionary"""
+        self._ensure_loaded()
+        return self._config
+        
+    @property
+    def settings(self) -> LLMSettings:
+        """Current LLM settings"""
+        self._ensure_loaded()
+        return self._settings
+        
+    @settings.setter
+    def settings(self, value: LLMSettings):
+        self._ensure_loaded()
+        self._settings = value
         
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file"""
@@ -94,7 +186,7 @@ class ConfigManager:
     
     def _load_settings(self) -> LLMSettings:
         """Load LLM settings from config"""
-        settings_dict = self.config.get('settings', {})
+        settings_dict = self._config.get('settings', {})
         return LLMSettings(**{
             k: v for k, v in settings_dict.items()
             if k in LLMSettings.__dataclass_fields__
@@ -109,6 +201,7 @@ class ConfigManager:
         
         with open(self.config_path, 'w') as f:
             yaml.dump(self.config, f)
+        self._mtime = self._get_mtime()
             
     def get_api_key(self, provider: str) -> Optional[str]:
         """Get API key for provider"""
@@ -135,13 +228,24 @@ class ConfigManager:
         """Get current LLM settings"""
         return self.settings
 
-# Create a default settings instance
-settings = LLMSettings()
+class _LazySettings:
+    """Module-level settings that load the default config file on first access"""
+    
+    def __init__(self, manager: ConfigManager):
+        object.__setattr__(self, '_manager', manager)
+        
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._manager.get_settings(), name)
+        
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._manager.get_settings(), name, value)
+        
+    def __repr__(self) -> str:
+        return repr(self._manager.get_settings())
 
-# Initialize default config manager
+# Default config manager; nothing is read from disk until settings are used
 default_config = ConfigManager()
-if default_config.settings:
-    settings = default_config.settings
+settings = _LazySettings(default_config)
 
 def validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -163,7 +267,7 @@ def validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     # Validate provider if specified
     if 'provider' in config:
         provider = config['provider'].lower()
-        valid_providers = {'openai', 'claude', 'mistral', 'gemini', 'grok'}
+        valid_providers = {'openai', 'claude', 'mistral', 'gemini', 'grok', 'fake'}
         if provider not in valid_providers:
             raise ValueError(f"Invalid provider. Must be one of: {', '.join(valid_providers)}")
             
@@ -223,6 +327,7 @@ def get_api_key(provider: str) -> Optional[str]:
     if provider not in key_mapping:
         return None
         
+    _load_dotenv_once()
     return os.getenv(key_mapping[provider])
 
 def get_default_model(provider: str) -> str:
@@ -0,0 +1,215 @@
+"""
+Hedged requests: race a second request against a slow first one
+
+When a request has not completed (or, for streams, produced its first chunk)
+within the hedging delay, an identical request is sent to the same provider
+or to a backup `LLMEasy`. Whichever finishes first wins and the other is
+cancelled, which closes its HTTP request. The delay defaults to a high
+percentile of recently observed latencies, so only the slowest few percent
+of requests are hedged.
+"""
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from ..core import LLMEasy
+
+class LatencyWindow:
+    """Sliding window of the most recent latency samples"""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None when it is empty"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(int(len(ordered) * percentile / 100 + 0.5) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class HedgePolicy:
+    """
+    When and where to send hedged requests
+
+    Args:
+        delay: Fixed hedging delay in seconds; by default it is derived from
+            recent latencies
+        percentile: Latency percentile used as the delay once `min_samples`
+            requests have completed
+        initial_delay: Delay used until enough samples have been collected
+        min_delay: Lower bound of the derived delay, so fast periods do not
+            hedge every request
+        min_samples: Completed requests needed before the percentile is used
+        window: Number of recent samples kept
+        backup: `LLMEasy` instance receiving hedged requests; the same
+            provider is used when not set
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 95.0,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        backup: Optional["LLMEasy"] = None
+    ):
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.backup = backup
+        self.latencies = LatencyWindow(window)
+        self.first_chunk_latencies = LatencyWindow(window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _delay(self, samples: LatencyWindow) -> float:
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return max(samples.percentile(self.percentile), self.min_delay)
+
+    @property
+    def delay(self) -> float:
+        """Current hedging delay for complete responses"""
+        return self._delay(self.latencies)
+
+    @property
+    def first_chunk_delay(self) -> float:
+        """Current hedging delay for the first chunk of a stream"""
+        return self._delay(self.first_chunk_latencies)
+
+    async def call(
+        self,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        Await `primary()`, racing `hedge()` against it once the delay has passed
+
+        A failure before the hedge is sent is raised right away; afterwards
+        the other request gets the chance to finish, and the first error is
+        raised only if both fail.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.requests += 1
+        tasks: Dict[asyncio.Future, bool] = {asyncio.ensure_future(primary()): False}
+        delay = self.delay
+        hedge_started = False
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                timeout = None if hedge_started else max(delay - (loop.time() - start), 0)
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge_started = True
+                    self.hedged += 1
+                    tasks[asyncio.ensure_future((hedge or primary)())] = True
+                    continue
+                for task in done:
+                    is_hedge = tasks.pop(task)
+                    if task.exception() is None:
+                        self.latencies.add(loop.time() - start)
+                        self.hedge_wins += is_hedge
+                        return task.result()
+                    if not hedge_started:
+                        raise task.exception()
+                    error = error or task.exception()
+                if not tasks:
+                    raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stream(
+        self,
+        open_primary: Callable[[], AsyncIterator[str]],
+        open_hedge: Optional[Callable[[], AsyncIterator[str]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the chunks of whichever stream produces its first chunk first
+
+        A second stream is opened when the first one has not produced a chunk
+        within the delay. The losing stream is cancelled and closed.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.requests += 1
+        streams: Dict[asyncio.Future, AsyncIterator[str]] = {}
+        hedges = set()
+
+        def open_next(open_stream, is_hedge: bool):
+            stream = open_stream()
+            task = asyncio.ensure_future(stream.__anext__())
+            streams[task] = stream
+            if is_hedge:
+                hedges.add(task)
+
+        async def close(task: asyncio.Future):
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await streams[task].aclose()
+
+        open_next(open_primary, False)
+        delay = self.first_chunk_delay
+        winner = None
+        hedge_started = False
+        error: Optional[BaseException] = None
+        try:
+            while winner is None:
+                timeout = None if hedge_started else max(delay - (loop.time() - start), 0)
+                done, _ = await asyncio.wait(
+                    streams, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedge_started = True
+                    self.hedged += 1
+                    open_next(open_hedge or open_primary, True)
+                    continue
+                for task in done:
+                    failure = task.exception()
+                    if failure is None or isinstance(failure, StopAsyncIteration):
+                        winner = task
+                        break
+                    await streams.pop(task).aclose()
+                    if not hedge_started:
+                        raise failure
+                    error = error or failure
+                if winner is None and not streams:
+                    raise error
+        except BaseException:
+            for task in list(streams):
+                await close(task)
+            raise
+
+        self.first_chunk_latencies.add(loop.time() - start)
+        self.hedge_wins += winner in hedges
+        stream = streams.pop(winner)
+        for task in list(streams):
+            await close(task)
+        try:
+            if isinstance(winner.exception(), StopAsyncIteration):
+                return
+            yield winner.result()
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
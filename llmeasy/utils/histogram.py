@@ -0,0 +1,242 @@
+"""
+Latency histograms for provider streams
+
+Every provider stream records its time to first chunk and the gaps between
+later chunks in the `StreamStats` of its provider and model. Gaps only count
+time spent waiting on the provider, not time the consumer spends between
+chunks, so a stuttering upstream (often throttling that never surfaces as
+an error) shows up in the gap percentiles.
+
+Read the histograms with `get_stream_stats`, dump all of them with
+`dump_stream_stats`, or serve `render_prometheus()` from a metrics endpoint.
+"""
+import math
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+# Bucket bounds, in seconds, of the Prometheus exposition
+PROMETHEUS_BOUNDS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) latency histogram with bounded relative error
+
+    Latencies are counted in microseconds: exactly below `2 ** bits`, then in
+    `2 ** (bits - 1)` buckets per power of two, so a value is reported at most
+    `1 / 2 ** (bits - 1)` too high (1.6% with the default 7 bits). Counts
+    live in a preallocated list and recording takes no lock: streams are
+    consumed on the event loop's thread.
+
+    Args:
+        bits: Precision, in bits of the bucket index within a power of two
+        max_seconds: Largest distinguishable latency; longer ones are clamped
+    """
+
+    def __init__(self, bits: int = 7, max_seconds: float = 3600.0):
+        self.bits = bits
+        self._exact = 1 << bits
+        self._half = self._exact >> 1
+        self._max_us = int(max_seconds * 1e6)
+        self.counts: List[int] = [0] * (self._index(self._max_us) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = self._max_us
+        self.max_us = 0
+
+    def _index(self, us: int) -> int:
+        if us < self._exact:
+            return us
+        shift = us.bit_length() - self.bits
+        return self._exact + (shift - 1) * self._half + (us >> shift) - self._half
+
+    def _upper(self, index: int) -> int:
+        """Largest value, in microseconds, counted in a bucket"""
+        if index < self._exact:
+            return index
+        shift, offset = divmod(index - self._exact, self._half)
+        return ((self._half + offset + 1) << (shift + 1)) - 1
+
+    def record_ns(self, ns: int):
+        """Record a latency given in nanoseconds"""
+        us = ns // 1000
+        if us > self._max_us:
+            us = self._max_us
+        self.counts[self._index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+        if us < self.min_us:
+            self.min_us = us
+
+    def record(self, seconds: float):
+        """Record a latency given in seconds"""
+        self.record_ns(int(seconds * 1e9))
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total_us / self.count / 1e6 if self.count else None
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Nearest-rank percentile in seconds, or None while empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper(index), self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> List[int]:
+        """Number of latencies at or below each bound in seconds, for `le` buckets"""
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            bound_us = bound * 1e6
+            while index < len(self.counts) and self._upper(index) <= bound_us:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the counts of a histogram with the same precision and range"""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Histograms differ in precision or range")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.min_us = min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = self._max_us
+        self.max_us = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary statistics in seconds"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min_us / 1e6 if self.count else None,
+            'max': self.max_us / 1e6 if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+class StreamStats:
+    """
+    Time-to-first-chunk and inter-chunk gap histograms of one provider and model
+
+    Attributes:
+        ttft: Seconds from sending the request to the first chunk
+        gaps: Seconds spent waiting on the provider for each later chunk
+        streams: Streams started
+    """
+
+    def __init__(self, provider: str, model: Optional[str]):
+        self.provider = provider
+        self.model = model
+        self.ttft = LatencyHistogram()
+        self.gaps = LatencyHistogram()
+        self.streams = 0
+
+    async def timed(self, stream: AsyncIterator[str], started_ns: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Yield the chunks of `stream`, recording its latencies
+
+        Args:
+            stream: Provider response iterator
+            started_ns: `time.perf_counter_ns()` when the request was sent;
+                defaults to now
+        """
+        clock = time.perf_counter_ns
+        anext = stream.__anext__
+        record = self.ttft.record_ns
+        waiting = clock() if started_ns is None else started_ns
+        self.streams += 1
+        try:
+            while True:
+                try:
+                    chunk = await anext()
+                except StopAsyncIteration:
+                    return
+                record(clock() - waiting)
+                record = self.gaps.record_ns
+                yield chunk
+                waiting = clock()
+        finally:
+            await stream.aclose()
+
+    def reset(self):
+        self.ttft.reset()
+        self.gaps.reset()
+        self.streams = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'provider': self.provider,
+            'model': self.model,
+            'streams': self.streams,
+            'ttft': self.ttft.to_dict(),
+            'gaps': self.gaps.to_dict(),
+        }
+
+_stats: Dict[Tuple[str, Optional[str]], StreamStats] = {}
+_lock = threading.Lock()
+
+def get_stream_stats(provider: str, model: Optional[str]) -> StreamStats:
+    """Get the process-wide stream statistics of a provider and model"""
+    key = (provider, model)
+    stats = _stats.get(key)
+    if stats is None:
+        with _lock:
+            stats = _stats.setdefault(key, StreamStats(provider, model))
+    return stats
+
+def dump_stream_stats() -> List[Dict[str, Any]]:
+    """Summaries of every provider and model that has streamed"""
+    return [stats.to_dict() for stats in list(_stats.values())]
+
+def _label(value: Optional[str]) -> str:
+    return (value or '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_prometheus(namespace: str = 'llmeasy', bounds: Sequence[float] = PROMETHEUS_BOUNDS) -> str:
+    """
+    Render every stream histogram in the Prometheus text exposition format
+
+    Produces `<namespace>_stream_ttft_seconds` and
+    `<namespace>_stream_chunk_gap_seconds`, labelled by provider and model.
+    """
+    lines = []
+    metrics = (
+        ('stream_ttft_seconds', 'Time to the first chunk of provider streams', 'ttft'),
+        ('stream_chunk_gap_seconds', 'Wait for each later chunk of provider streams', 'gaps'),
+    )
+    all_stats = list(_stats.values())
+    for suffix, description, attribute in metrics:
+        name = f"{namespace}_{suffix}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for stats in all_stats:
+            histogram = getattr(stats, attribute)
+            labels = f'provider="{_label(stats.provider)}",model="{_label(stats.model)}"'
+            for bound, count in zip(bounds, histogram.cumulative_counts(bounds)):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total_us / 1e6}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+    return "\n".join(lines) + "\n"
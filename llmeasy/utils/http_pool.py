@@ -0,0 +1,126 @@
+"""
+Process-wide registry of provider SDK clients and their HTTP connection pools
+"""
+import asyncio
+import hashlib
+import threading
+import weakref
+from importlib import import_module
+from importlib.util import find_spec
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple
+from .rate_limit import observe_response
+
+# LLMSettings field -> httpx option
+POOL_SETTINGS = {
+    'http_max_connections': 'max_connections',
+    'http_max_keepalive_connections': 'max_keepalive_connections',
+    'http_keepalive_expiry': 'keepalive_expiry',
+    'http2': 'http2',
+    'timeout': 'timeout',
+    'connect_timeout': 'connect_timeout',
+}
+
+_clients: Dict[Tuple, Tuple[Optional[weakref.ref], Any]] = {}
+_lock = threading.Lock()
+
+def _httpx_module(client_class: type) -> ModuleType:
+    """Find the httpx distribution a client class is built on"""
+    for base in client_class.__mro__:
+        if base.__name__ == 'AsyncClient':
+            return import_module(base.__module__.split('.')[0])
+    return import_module('httpx')
+
+def create_http_client(
+    sdk: ModuleType,
+    max_connections: int = 1000,
+    max_keepalive_connections: int = 100,
+    keepalive_expiry: float = 5.0,
+    http2: bool = False,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None
+) -> Any:
+    """
+    Create an async HTTP client with the given pool limits for an SDK module
+
+    Uses the SDK's own default client class when it has one, so SDK defaults
+    such as redirects are kept. HTTP/2 is only enabled when the `h2` package is
+    installed. Responses are reported to the active rate limiter, if any.
+    `timeout` bounds every socket operation and `connect_timeout` establishing
+    connections; SDK clients built on the returned client inherit both.
+    """
+    client_class = getattr(sdk, 'DefaultAsyncHttpxClient', None)
+    if client_class is None:
+        client_class = import_module('httpx').AsyncClient
+    httpx = _httpx_module(client_class)
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+    options = {'limits': limits, 'event_hooks': {'response': [observe_response]}}
+    if timeout is not None or connect_timeout is not None:
+        options['timeout'] = httpx.Timeout(timeout, connect=connect_timeout)
+    if http2 and find_spec('h2') is not None:
+        options['http2'] = True
+    return client_class(**options)
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+def _prune_closed_loops():
+    """Drop clients bound to event loops that have been closed or collected"""
+    for key, (loop_ref, _) in list(_clients.items()):
+        if loop_ref is not None:
+            loop = loop_ref()
+            if loop is None or loop.is_closed():
+                del _clients[key]
+
+def get_shared_client(
+    provider: str,
+    api_key: str,
+    factory: Callable[[Any], Any],
+    sdk: ModuleType,
+    base_url: Optional[str] = None,
+    **pool_options
+) -> Any:
+    """
+    Get the shared SDK client for a provider, base URL, API key and pool options
+
+    `factory` builds the SDK client from an HTTP client created by
+    `create_http_client`. Connections belong to an event loop, so clients are
+    also keyed by the running loop, if any.
+    """
+    loop = _running_loop()
+    key = (
+        provider,
+        base_url,
+        hashlib.sha256(api_key.encode('utf-8')).hexdigest(),
+        id(loop) if loop is not None else None,
+        tuple(sorted(pool_options.items())),
+    )
+    with _lock:
+        _prune_closed_loops()
+        entry = _clients.get(key)
+        if entry is None:
+            client = factory(create_http_client(sdk, **pool_options))
+            entry = (weakref.ref(loop) if loop is not None else None, client)
+            _clients[key] = entry
+    return entry[1]
+
+async def close_shared_clients():
+    """Close every shared client, e.g. on application shutdown"""
+    with _lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    for _, client in entries:
+        close = getattr(client, 'close', None)
+        if close is not None:
+            await close()
+
+def shared_client_count() -> int:
+    """Number of shared clients currently registered"""
+    return len(_clients)
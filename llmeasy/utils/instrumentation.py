@@ -0,0 +1,240 @@
+"""
+Per-call instrumentation
+
+Every `LLMEasy.query` and `stream` call made while the instance has observers
+produces one `CallMetrics` record: token usage as reported by the provider,
+time to first chunk, total latency, chunk count and the number of provider
+requests made. Observers are plain callables receiving each finished record.
+`OpenTelemetryObserver` and `PrometheusObserver` export records as spans and
+metrics when the optional `opentelemetry-api` or `prometheus_client` package
+is installed.
+
+Providers report usage with `record_usage` on the record returned by
+`current_call()`, which is set while a provider request is being made.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CallMetrics:
+    """
+    Measurements of one `query` or `stream` call
+
+    Attributes:
+        provider: Provider name
+        model: Model name, as reported by the response when the provider does
+        operation: 'query' or 'stream'
+        started_at: Wall-clock start time, in seconds since the epoch
+        input_tokens: Prompt tokens reported by the provider, if any
+        output_tokens: Completion tokens reported by the provider, if any
+        ttft: Seconds until the first chunk of a stream
+        latency: Seconds until the call completed or failed
+        chunks: Chunks yielded by a stream
+        attempts: Provider requests made, including retries and hedges
+        cached: Whether the response came from the cache
+        error: Exception the call failed with
+    """
+    provider: str
+    model: Optional[str]
+    operation: str
+    started_at: float = field(default_factory=time.time)
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    ttft: Optional[float] = None
+    latency: Optional[float] = None
+    chunks: int = 0
+    attempts: int = 0
+    cached: bool = False
+    error: Optional[BaseException] = None
+    _start: float = field(default_factory=time.monotonic, repr=False, compare=False)
+
+    @property
+    def retries(self) -> int:
+        """Provider requests made after the first"""
+        return max(self.attempts - 1, 0)
+
+    def elapsed(self) -> float:
+        """Seconds since the call started"""
+        return time.monotonic() - self._start
+
+Observer = Callable[[CallMetrics], None]
+
+_current_call: ContextVar[Optional[CallMetrics]] = ContextVar('llmeasy_current_call', default=None)
+
+def current_call() -> Optional[CallMetrics]:
+    """The record of the call whose provider request is being made, if it is observed"""
+    return _current_call.get()
+
+@contextmanager
+def recording(metrics: CallMetrics) -> Iterator[CallMetrics]:
+    """
+    Make `metrics` the current call's record
+
+    Only hold this around awaits, never across a `yield`, or the record would
+    leak into the consumer's code.
+    """
+    token = _current_call.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_call.reset(token)
+
+def record_usage(
+    metrics: Optional[CallMetrics],
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    model: Optional[str] = None
+):
+    """Store the usage a provider reported, ignoring unknown values and unobserved calls"""
+    if metrics is None:
+        return
+    if input_tokens is not None:
+        metrics.input_tokens = input_tokens
+    if output_tokens is not None:
+        metrics.output_tokens = output_tokens
+    if model:
+        metrics.model = model
+
+async def record_stream(stream: AsyncIterator[str], metrics: CallMetrics) -> AsyncIterator[str]:
+    """
+    Yield a provider stream, counting it as an attempt of the call
+
+    Providers build their response iterators on the first chunk, so the record
+    is current only then; the iterators keep a reference for later usage events.
+    """
+    metrics.attempts += 1
+    try:
+        with recording(metrics):
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                return
+        yield chunk
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
+
+def notify(observers: Iterable[Observer], metrics: CallMetrics):
+    """Pass a finished record to every observer; a failing observer never fails the call"""
+    for observer in observers:
+        try:
+            observer(metrics)
+        except Exception:
+            logger.exception("Call observer %r failed", observer)
+
+class OpenTelemetryObserver:
+    """
+    Export each call as an OpenTelemetry span
+
+    Spans follow the GenAI semantic conventions (`gen_ai.*` attributes) and
+    carry the stream timings as `llmeasy.*` attributes.
+
+    Args:
+        tracer: Tracer to create spans with, `trace.get_tracer('llmeasy')` by default
+    """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryObserver requires opentelemetry-api: pip install llmeasy[otel]"
+            ) from e
+        self._status = trace.Status
+        self._error = trace.StatusCode.ERROR
+        self.tracer = tracer or trace.get_tracer('llmeasy')
+
+    def __call__(self, metrics: CallMetrics):
+        attributes = {
+            'gen_ai.system': metrics.provider,
+            'gen_ai.operation.name': 'chat',
+            'llmeasy.operation': metrics.operation,
+            'llmeasy.attempts': metrics.attempts,
+            'llmeasy.cached': metrics.cached,
+        }
+        if metrics.model:
+            attributes['gen_ai.request.model'] = metrics.model
+        if metrics.input_tokens is not None:
+            attributes['gen_ai.usage.input_tokens'] = metrics.input_tokens
+        if metrics.output_tokens is not None:
+            attributes['gen_ai.usage.output_tokens'] = metrics.output_tokens
+        if metrics.operation == 'stream':
+            attributes['llmeasy.chunks'] = metrics.chunks
+            if metrics.ttft is not None:
+                attributes['llmeasy.time_to_first_token'] = metrics.ttft
+
+        start = int(metrics.started_at * 1e9)
+        span = self.tracer.start_span(
+            f"chat {metrics.model}" if metrics.model else 'chat',
+            start_time=start,
+            attributes=attributes
+        )
+        if metrics.error is not None:
+            span.record_exception(metrics.error)
+            span.set_status(self._status(self._error, str(metrics.error)))
+        span.end(end_time=start + int((metrics.latency or 0.0) * 1e9))
+
+class PrometheusObserver:
+    """
+    Export calls as Prometheus metrics
+
+    Metrics, labelled by provider, model and operation:
+        `<namespace>_requests_total` (also by status 'ok' or 'error'),
+        `<namespace>_tokens_total` (also by direction 'input' or 'output'),
+        `<namespace>_retries_total`, `<namespace>_latency_seconds` and
+        `<namespace>_time_to_first_token_seconds`
+
+    Args:
+        registry: Collector registry, the default registry if None. Metrics
+            can only be registered once per registry
+        namespace: Prefix of the metric names
+    """
+
+    def __init__(self, registry=None, namespace: str = 'llmeasy'):
+        try:
+            import prometheus_client
+        except ImportError as e:
+            raise ImportError(
+                "PrometheusObserver requires prometheus_client: pip install llmeasy[prometheus]"
+            ) from e
+        options = {'namespace': namespace}
+        if registry is not None:
+            options['registry'] = registry
+        labels = ('provider', 'model', 'operation')
+        self.requests = prometheus_client.Counter(
+            'requests', 'LLM calls', labels + ('status',), **options
+        )
+        self.tokens = prometheus_client.Counter(
+            'tokens', 'Tokens reported by providers', labels + ('direction',), **options
+        )
+        self.retries = prometheus_client.Counter(
+            'retries', 'Provider requests after the first of a call', labels, **options
+        )
+        self.latency = prometheus_client.Histogram(
+            'latency_seconds', 'Call latency', labels, **options
+        )
+        self.ttft = prometheus_client.Histogram(
+            'time_to_first_token_seconds', 'Time to the first chunk of a stream', labels, **options
+        )
+
+    def __call__(self, metrics: CallMetrics):
+        labels = (metrics.provider, metrics.model or '', metrics.operation)
+        status = 'ok' if metrics.error is None else 'error'
+        self.requests.labels(*labels, status).inc()
+        if metrics.input_tokens:
+            self.tokens.labels(*labels, 'input').inc(metrics.input_tokens)
+        if metrics.output_tokens:
+            self.tokens.labels(*labels, 'output').inc(metrics.output_tokens)
+        if metrics.retries:
+            self.retries.labels(*labels).inc(metrics.retries)
+        if metrics.latency is not None:
+            self.latency.labels(*labels).observe(metrics.latency)
+        if metrics.ttft is not None:
+            self.ttft.labels(*labels).observe(metrics.ttft)
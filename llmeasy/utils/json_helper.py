@@ -1,47 +1,431 @@
 import json
 import re
-from typing import AsyncGenerator, Dict, Any, Optional, Union, List
+from typing import AsyncGenerator, Callable, Dict, Any, Iterator, NamedTuple, Optional, Tuple, Union, List
 from collections import defaultdict
+from ..exceptions import JSONResponseError, StreamAbortedError
+from .json_template import JSONTemplate
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast path
+    orjson = None
+
+# Characters the boundary scanner has to stop at, outside and inside string literals
+_STRUCTURAL_SPECIAL = re.compile(r'[{}"\\]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+def json_loads(text: str) -> Any:
+    """
+    Parse JSON text, using orjson when it is installed
+    
+    Note that orjson decodes integers that do not fit in 64 bits as floats.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson rejects some input the stdlib accepts, such as NaN
+            pass
+    return json.loads(text)
+
+def strip_code_fences(text: str) -> str:
+    """Remove surrounding whitespace and markdown code fences from a response"""
+    text = text.strip()
+    if text.startswith('```'):
+        newline = text.find('\n')
+        text = text[newline + 1:] if newline != -1 else text[3:]
+        if text.endswith('```'):
+            text = text[:-3]
+        text = text.strip()
+    return text
+
+def parse_json_response(response: str) -> Any:
+    """
+    Parse a JSON response in a single pass
+    
+    Raises:
+        JSONResponseError: If the response is not valid JSON
+    """
+    try:
+        return json_loads(strip_code_fences(response))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise JSONResponseError(response, e) from e
+
+# Characters the event parser has to stop at, outside of string literals
+_EVENT_SPECIAL = re.compile(r'[{}\[\]",:]')
+_CLOSERS = {'{': '}', '[': ']'}
+
+class JSONEvent(NamedTuple):
+    """
+    Event of `JSONEventParser`
+
+    Attributes:
+        kind: 'item' for a complete element, 'partial' for the element so far,
+            or 'error' for an element that is not valid JSON, whose value is its text
+        path: Keys and array indices leading to the element
+        value: The element
+    """
+    kind: str
+    path: Tuple[Union[str, int], ...]
+    value: Any
+
+def complete_partial_json(text: str) -> Any:
+    """
+    Parse the prefix of a JSON value, closing what is still open
+
+    Unfinished strings are closed, while unfinished keys, numbers and literals
+    are left out, so `{"a": [1, {"b": "x` reads as `{"a": [1, {"b": "x"}]}`.
+    Returns None if nothing complete can be read.
+    """
+    closers: List[str] = []
+    expect_key: List[bool] = []
+    safe, safe_closers = 0, ''
+    in_string = string_is_key = False
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if in_string:
+            if char == '\\':
+                i += 2
+                continue
+            if char == '"':
+                in_string = False
+                if not string_is_key:
+                    safe, safe_closers = i + 1, ''.join(reversed(closers))
+        elif char == '"':
+            in_string = True
+            string_is_key = bool(closers) and closers[-1] == '}' and expect_key[-1]
+        elif char in '{[':
+            closers.append(_CLOSERS[char])
+            expect_key.append(char == '{')
+            safe, safe_closers = i + 1, ''.join(reversed(closers))
+        elif char in '}]':
+            if closers:
+                closers.pop()
+                expect_key.pop()
+            safe, safe_closers = i + 1, ''.join(reversed(closers))
+        elif char == ',':
+            safe, safe_closers = i, ''.join(reversed(closers))
+            if expect_key:
+                expect_key[-1] = closers[-1] == '}'
+        elif char == ':' and expect_key:
+            expect_key[-1] = False
+        i += 1
+
+    candidates = []
+    if in_string and not string_is_key:
+        # Drop a dangling escape before closing the string
+        body = text[:-1] if i > length else text
+        candidates.append(body + '"' + ''.join(reversed(closers)))
+    candidates.append(text[:safe].rstrip().rstrip(',') + safe_closers)
+    for candidate in candidates:
+        try:
+            return json_loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+class JSONEventParser:
+    """
+    Incremental JSON parser emitting the elements at a path as soon as they close
+
+    Paths are dot-separated keys, with `*` matching any key or array index:
+    `items.*` is every element of the `items` array, `*` every element of a
+    top-level array, and '' every top-level value. None selects every outermost
+    object, also inside arrays, like the boundary scanner of `JSONStreamHelper`.
+    Text around top-level values, such as prose or code fences, is skipped,
+    and several top-level values may follow each other.
+
+    Without `partial`, each character is scanned once. Only the text of the
+    element in progress is kept, and complete elements are decoded with
+    `json_loads` in one call.
+
+    Args:
+        path: Path of the elements to emit
+        partial: Also emit 'partial' events with the object or array in
+            progress after every chunk that changed it. Each of them
+            re-parses the element so far with `complete_partial_json`, so an
+            element of n characters arriving in k chunks costs O(n * k);
+            fine for typical elements, but costly for very large ones
+    """
+
+    def __init__(self, path: Optional[str] = '', partial: bool = False):
+        self.objects = path is None
+        self.path = [segment for segment in path.split('.') if segment] if path else []
+        self.partial = partial
+        self._buffer = ''
+        self._pos = 0
+        # Frames of the open containers: [closer, key or index, expecting a key]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._capture: Optional[int] = None
+        self._capture_path: Tuple[Union[str, int], ...] = ()
+        self._last_partial: Any = None
+
+    def _matches(self) -> bool:
+        """Whether the value slot opening in the top frame is on the target path"""
+        if self.objects or len(self._stack) != len(self.path):
+            return False
+        for segment, frame in zip(self.path, self._stack):
+            if segment != '*' and segment != str(frame[1]):
+                return False
+        return True
+
+    def _open_slot(self, start: int):
+        if self._capture is None and self._matches():
+            self._capture = start
+            self._capture_path = tuple(frame[1] for frame in self._stack)
+
+    def _emit(self, end: int, events: List[JSONEvent]):
+        text = self._buffer[self._capture:end].strip()
+        self._capture = None
+        self._last_partial = None
+        if not text:
+            # Empty array or trailing comma
+            return
+        try:
+            events.append(JSONEvent('item', self._capture_path, json_loads(text)))
+        except ValueError:
+            events.append(JSONEvent('error', self._capture_path, text))
+
+    def feed(self, chunk: str) -> List[JSONEvent]:
+        """Parse the next chunk of text, returning the events it completes"""
+        events: List[JSONEvent] = []
+        buffer = self._buffer = self._buffer + chunk
+        pos, length = self._pos, len(buffer)
+        stack = self._stack
+        if self._escape and pos < length:
+            self._escape = False
+            pos += 1
+
+        while pos < length:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = length
+                    break
+                i = match.start()
+                pos = i + 1
+                if buffer[i] == '\\':
+                    if pos < length:
+                        pos += 1
+                    else:
+                        self._escape = True
+                    continue
+                self._in_string = False
+                if self._string_start is not None:
+                    stack[-1][1] = json_loads(buffer[self._string_start:pos])
+                    stack[-1][2] = False
+                    self._string_start = None
+                continue
+
+            match = _EVENT_SPECIAL.search(buffer, pos)
+            if match is None:
+                pos = length
+                break
+            i = match.start()
+            char = buffer[i]
+            pos = i + 1
+            if not stack:
+                # Top level: only objects and arrays start a value
+                if char in '{[':
+                    if self._capture is None and (char == '{' if self.objects else not self.path):
+                        self._capture = i
+                        self._capture_path = ()
+                    stack.append([_CLOSERS[char], 0, char == '{'])
+                    if char == '[':
+                        self._open_slot(pos)
+                continue
+            frame = stack[-1]
+            if char == '"':
+                self._in_string = True
+                if frame[0] == '}' and frame[2]:
+                    self._string_start = i
+            elif char in '{[':
+                if self.objects and char == '{' and self._capture is None:
+                    # Outermost object inside arrays
+                    self._capture = i
+                    self._capture_path = tuple(frame[1] for frame in stack)
+                stack.append([_CLOSERS[char], 0, char == '{'])
+                if char == '[':
+                    self._open_slot(pos)
+            elif char in '}]':
+                depth = len(stack)
+                if self._capture is not None and depth == len(self._capture_path):
+                    # A scalar element ends with its container
+                    self._emit(i, events)
+                stack.pop()
+                if self._capture is not None and len(stack) == len(self._capture_path):
+                    self._emit(pos, events)
+            elif char == ',':
+                if self._capture is not None and len(stack) == len(self._capture_path):
+                    self._emit(i, events)
+                if frame[0] == ']':
+                    frame[1] += 1
+                    self._open_slot(pos)
+                else:
+                    frame[2] = True
+            elif char == ':':
+                if frame[0] == '}':
+                    self._open_slot(pos)
+
+        # Keep only the text still needed: the element or key in progress
+        keep = self._capture if self._capture is not None else self._string_start
+        if keep is None:
+            keep = pos
+        if keep:
+            self._buffer = buffer[keep:]
+            pos -= keep
+            if self._capture is not None:
+                self._capture -= keep
+            if self._string_start is not None:
+                self._string_start -= keep
+        self._pos = pos
+
+        if self.partial and self._capture is not None:
+            text = self._buffer[self._capture:pos].lstrip()
+            if text[:1] in ('{', '['):
+                value = complete_partial_json(text)
+                if value is not None and value != self._last_partial:
+                    self._last_partial = value
+                    events.append(JSONEvent('partial', self._capture_path, value))
+        return events
+
+class StreamAbortPolicy:
+    """
+    When to stop a JSON stream early
+
+    Stopping closes the response stream, which closes the provider's HTTP
+    stream, so no more output tokens are generated or billed.
+
+    Args:
+        max_invalid: Abort once this many elements were invalid JSON or
+            failed the validator
+        max_objects: Stop after yielding this many elements. This is a normal
+            end of the stream and never raises
+        max_bytes: Abort once the response exceeds this many UTF-8 bytes
+        max_tokens: Abort once the response exceeds this many tokens, at four
+            characters per token
+        partial_validator: Callable receiving the element in progress after
+            each chunk that changed it; returning False aborts
+        partial_template: Abort as soon as the element in progress cannot
+            match the stream's template, or with `coerce`, cannot be coerced to it
+        raise_error: Raise `StreamAbortedError` on an abort; otherwise the
+            stream just ends
+    """
+
+    def __init__(
+        self,
+        max_invalid: Optional[int] = None,
+        max_objects: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        partial_validator: Optional[Callable[[Any], bool]] = None,
+        partial_template: bool = False,
+        raise_error: bool = True
+    ):
+        self.max_invalid = max_invalid
+        self.max_objects = max_objects
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.partial_validator = partial_validator
+        self.partial_template = partial_template
+        self.raise_error = raise_error
+
+    def abort(self, reason: str, limit: Optional[int], emitted: int):
+        """End the stream, raising `StreamAbortedError` if configured to"""
+        if self.raise_error:
+            raise StreamAbortedError(reason, limit, emitted)
 
 class JSONStreamHelper:
-    """Enhanced helper class for robust JSON streaming scenarios"""
+    """
+    Enhanced helper class for robust JSON streaming scenarios
+
+    Args:
+        template: Expected shape of each element, e.g. `{"name": "string",
+            "tags": ["string"]}`, a pydantic model class, or a `JSONTemplate`
+            compiled beforehand. Elements that do not match are skipped
+        coerce: Convert elements to the template's types, e.g. "42" to 42 for
+            a 'number', instead of skipping them; with a pydantic model,
+            elements are yielded as model instances
+    """
     
-    def __init__(self, template: Optional[Dict] = None):
+    def __init__(self, template: Optional[Any] = None, coerce: bool = False):
         self.template = template
-        self.buffer = ""
+        self.coerce = coerce
+        if template is None or isinstance(template, JSONTemplate):
+            self.schema = template
+        else:
+            self.schema = JSONTemplate(template)
         self.depth_counter = defaultdict(int)
+        self._reset()
         
-    def _find_json_boundaries(self, text: str) -> List[tuple[int, int]]:
-        """Find potential JSON object boundaries in text"""
-        stack = []
-        boundaries = []
-        in_string = False
-        escape_char = False
-        start_index = None
-        
-        for i, char in enumerate(text):
-            # Handle string literals
-            if char == '"' and not escape_char:
-                in_string = not in_string
-            elif char == '\\' and not escape_char:
-                escape_char = True
-                continue
-            
-            if not in_string:
-                if char == '{':
-                    if not stack:
-                        start_index = i
-                    stack.append(char)
-                elif char == '}':
-                    if stack and stack[-1] == '{':
-                        stack.pop()
-                        if not stack:  # Complete object found
-                            boundaries.append((start_index, i + 1))
-            
-            escape_char = False
-            
-        return boundaries
-    
+    def _reset(self):
+        """Reset the incremental scanner state"""
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape_char = False
+
+    @property
+    def buffer(self) -> str:
+        """Text of the JSON object currently being accumulated"""
+        return ''.join(self._parts)
+
+    def _scan_chunk(self, chunk: str) -> List[str]:
+        """
+        Scan a new chunk and return the text of every top-level object it completes
+
+        The brace depth, in-string and escape state are kept between calls so each
+        character is only looked at once, no matter how the stream is chunked.
+        Text outside of a top-level object is discarded.
+        """
+        completed = []
+        pos = 0
+        length = len(chunk)
+        # Only the text of the object in progress is kept
+        start = 0 if self._depth else None
+
+        if self._escape_char and length:
+            self._escape_char = False
+            pos = 1
+
+        while pos < length:
+            pattern = _STRING_SPECIAL if self._in_string else _STRUCTURAL_SPECIAL
+            match = pattern.search(chunk, pos)
+            if match is None:
+                break
+            i = match.start()
+            char = chunk[i]
+            pos = i + 1
+
+            if char == '\\':
+                # Skip the escaped character, possibly at the start of the next chunk
+                if pos < length:
+                    pos += 1
+                else:
+                    self._escape_char = True
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif char == '{':
+                if not self._depth:
+                    start = i
+                self._depth += 1
+            elif self._depth:  # char == '}'
+                self._depth -= 1
+                if not self._depth:  # Complete object found
+                    self._parts.append(chunk[start:pos])
+                    completed.append(''.join(self._parts))
+                    self._parts = []
+                    start = None
+
+        if start is not None:
+            self._parts.append(chunk[start:])
+
+        return completed
+
     def _clean_json_text(self, text: str) -> str:
         """Clean and normalize JSON text"""
         # Remove common formatting issues
@@ -69,66 +453,173 @@ class JSONStreamHelper:
         
         return text
     
-    async def process_stream(
-        self, 
-        stream: AsyncGenerator[str, None],
+    def _parse_candidate(
+        self,
+        json_str: str,
         validator = None,
         repair_json: bool = True
-    ) -> AsyncGenerator[Dict[Any, Any], None]:
-        """Process a stream of text into JSON objects with enhanced error handling"""
-        
-        async for chunk in stream:
-            self.buffer += chunk
-            self.buffer = self._clean_json_text(self.buffer)
+    ) -> Optional[Dict[Any, Any]]:
+        """Parse a complete object candidate, returning None if it is invalid"""
+        json_str = self._clean_json_text(json_str)
+        try:
+            if repair_json:
+                json_str = self._repair_json(json_str)
             
-            while True:  # Keep trying to process buffer until no valid JSON is found
-                # Find potential JSON objects
-                boundaries = self._find_json_boundaries(self.buffer)
+            json_obj = json_loads(json_str)
+            
+            # Validate object
+            if not isinstance(json_obj, dict):
+                return None
                 
-                if not boundaries:
-                    break  # No complete JSON objects found, wait for more data
-                    
-                found_valid = False
-                for start, end in boundaries:
-                    json_str = self.buffer[start:end]
+            if validator and not validator(json_obj):
+                return None
+            
+            return json_obj
+            
+        except json.JSONDecodeError:
+            if repair_json:
+                # Try one more time with aggressive repair
+                try:
+                    json_str = re.sub(r'[^\x20-\x7E]', '', json_str)
+                    json_str = self._repair_json(json_str)
+                    json_obj = json_loads(json_str)
                     
-                    try:
-                        if repair_json:
-                            json_str = self._repair_json(json_str)
-                        
-                        json_obj = json.loads(json_str)
-                        
-                        # Validate object
-                        if not isinstance(json_obj, dict):
-                            continue
-                            
-                        if validator and not validator(json_obj):
-                            continue
-                        
-                        yield json_obj
-                        self.buffer = self.buffer[end:].lstrip()
-                        found_valid = True
-                        break
-                        
-                    except json.JSONDecodeError as e:
-                        if repair_json:
-                            # Try one more time with aggressive repair
-                            try:
-                                json_str = re.sub(r'[^\x20-\x7E]', '', json_str)
-                                json_str = self._repair_json(json_str)
-                                json_obj = json.loads(json_str)
-                                
-                                if isinstance(json_obj, dict) and \
-                                   (not validator or validator(json_obj)):
-                                    yield json_obj
-                                    self.buffer = self.buffer[end:].lstrip()
-                                    found_valid = True
-                                    break
-                            except:
-                                continue
+                    if isinstance(json_obj, dict) and \
+                       (not validator or validator(json_obj)):
+                        return json_obj
+                except Exception:
+                    pass
+            return None
+        except Exception:
+            return None
+    
+    def _events(
+        self,
+        chunk: str,
+        parser: Optional[JSONEventParser],
+        validator,
+        repair_json: bool
+    ) -> Iterator[JSONEvent]:
+        """Events completed by a chunk; invalid and rejected elements are 'error' events"""
+        if parser is None:
+            for json_str in self._scan_chunk(chunk):
+                json_obj = self._parse_candidate(json_str, None, repair_json)
+                if json_obj is None:
+                    yield JSONEvent('error', (), json_str)
+                else:
+                    yield self._check(JSONEvent('item', (), json_obj), validator)
+            return
+
+        for event in parser.feed(chunk):
+            if event.kind == 'error' and repair_json:
+                value = self._parse_candidate(event.value, None, repair_json)
+                if value is not None:
+                    event = JSONEvent('item', event.path, value)
+            if event.kind == 'item':
+                event = self._check(event, validator)
+            yield event
+
+    def _check(self, event: JSONEvent, validator) -> JSONEvent:
+        """Apply the template and validator to an element, turning a rejected one into an error"""
+        value = event.value
+        try:
+            if self.schema is not None:
+                if self.coerce:
+                    value = self.schema.coerce(value)
+                elif not self.schema(value):
+                    return JSONEvent('error', event.path, value)
+            if validator and not validator(value):
+                return JSONEvent('error', event.path, value)
+        except Exception:
+            return JSONEvent('error', event.path, value)
+        return JSONEvent('item', event.path, value)
+
+    async def process_stream(
+        self, 
+        stream: AsyncGenerator[str, None],
+        validator = None,
+        repair_json: bool = True,
+        path: Optional[str] = None,
+        partial: bool = False,
+        abort: Optional[StreamAbortPolicy] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Process a stream of text into JSON objects with enhanced error handling
+        
+        Each chunk is scanned once by a resumable boundary scanner, so the cost of
+        processing a stream grows linearly with its size. Completed objects that
+        cannot be parsed, do not match the template or fail validation are skipped.
+
+        The stream is closed as soon as processing stops, whether it ended,
+        was aborted or the consumer stopped reading.
+
+        Args:
+            stream: Text chunks
+            validator: Callable returning whether an element is kept
+            repair_json: Try to repair elements that are not valid JSON
+            path: Emit the elements at this path of the response as soon as each
+                closes, e.g. 'items.*' for the elements of an `items` array; see
+                `JSONEventParser`. By default every outermost object is emitted,
+                including the objects of a top-level array
+            partial: Yield `JSONEvent`s, including 'partial' events with the
+                element in progress, instead of complete elements
+            abort: Policy stopping the stream early
+
+        Raises:
+            StreamAbortedError: If the abort policy ends the stream
+        """
+        self._reset()
+        check_partial = abort.partial_validator if abort is not None else None
+        if abort is not None and abort.partial_template and self.schema is not None:
+            schema, coerce = self.schema, self.coerce
+            checks = [lambda value: schema.validate_partial(value, coerce)]
+            if check_partial is not None:
+                checks.append(check_partial)
+            check_partial = lambda value: all(check(value) for check in checks)
+        parser = None
+        if path is not None or partial or check_partial is not None:
+            # Without a path the parser selects the same objects as the boundary scanner
+            parser = JSONEventParser(path, partial=partial or check_partial is not None)
+        count_bytes = abort is not None and abort.max_bytes is not None
+        count_chars = abort is not None and abort.max_tokens is not None
+        invalid = emitted = received_bytes = received_chars = 0
+        
+        try:
+            async for chunk in stream:
+                for event in self._events(chunk, parser, validator, repair_json):
+                    if event.kind == 'partial':
+                        if check_partial is not None and not check_partial(event.value):
+                            abort.abort('schema', None, emitted)
+                            return
+                        if partial:
+                            yield event
                         continue
-                    except Exception:
+                    if event.kind == 'error':
+                        invalid += 1
+                        if abort is not None and abort.max_invalid is not None \
+                           and invalid >= abort.max_invalid:
+                            abort.abort('invalid', abort.max_invalid, emitted)
+                            return
                         continue
-                
-                if not found_valid:
-                    break  # No valid JSON found in any boundary, wait for more data
+                    yield event if partial else event.value
+                    emitted += 1
+                    if abort is not None and abort.max_objects is not None \
+                       and emitted >= abort.max_objects:
+                        return
+                        
+                if count_bytes:
+                    received_bytes += len(chunk.encode('utf-8'))
+                    if received_bytes > abort.max_bytes:
+                        abort.abort('bytes', abort.max_bytes, emitted)
+                        return
+                if count_chars:
+                    received_chars += len(chunk)
+                    # Four characters per token, like `estimate_tokens`
+                    if received_chars // 4 + 1 > abort.max_tokens:
+                        abort.abort('tokens', abort.max_tokens, emitted)
+                        return
+        finally:
+            # Closing the stream cancels the provider request
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
@@ -0,0 +1,268 @@
+"""
+Structural validation of streamed JSON against a template
+
+`stream_json` templates describe the expected shape of each element:
+
+    {"name": "string", "year_created": "number", "paradigm": ["string"]}
+
+Type names are 'string', 'number', 'integer', 'boolean', 'object', 'array',
+'null' and 'any' (or the Python types str, float, int, bool, dict and list).
+A trailing '?' ('string?') makes a key optional and allows null. A list holds
+the template of every array element and a dict the template of an object;
+keys outside the template are allowed.
+
+`JSONTemplate` compiles a template once into nested closures, so checking an
+element is a few type lookups per key. A pydantic model class can be given
+instead of a template; elements are then validated by the model.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Exact types, so booleans are not numbers
+_TYPES: Dict[str, Tuple[type, ...]] = {
+    'string': (str,),
+    'number': (int, float),
+    'integer': (int,),
+    'boolean': (bool,),
+    'object': (dict,),
+    'array': (list,),
+    'null': (type(None),),
+}
+
+_PYTHON_TYPES = {
+    str: 'string',
+    float: 'number',
+    int: 'integer',
+    bool: 'boolean',
+    dict: 'object',
+    list: 'array',
+}
+
+def _to_string(value: Any) -> str:
+    if type(value) in (int, float):
+        return str(value)
+    raise ValueError(f"Expected a string, got {value!r}")
+
+def _to_number(value: Any) -> Any:
+    if type(value) is str:
+        number = float(value)
+        return int(number) if number.is_integer() and '.' not in value else number
+    raise ValueError(f"Expected a number, got {value!r}")
+
+def _to_integer(value: Any) -> int:
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is str:
+        return int(value)
+    raise ValueError(f"Expected an integer, got {value!r}")
+
+def _to_boolean(value: Any) -> bool:
+    if type(value) is str and value.lower() in ('true', 'false'):
+        return value.lower() == 'true'
+    raise ValueError(f"Expected a boolean, got {value!r}")
+
+def _no_coercion(name: str) -> Callable[[Any], Any]:
+    def coerce(value: Any) -> Any:
+        raise ValueError(f"Expected {name}, got {value!r}")
+    return coerce
+
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    'string': _to_string,
+    'number': _to_number,
+    'integer': _to_integer,
+    'boolean': _to_boolean,
+}
+
+_NUMBER_PREFIX = re.compile(r'\s*[-+]?\d*\.?\d*(?:[eE][-+]?\d*)?\Z')
+_INTEGER_PREFIX = re.compile(r'\s*[-+]?\d*\Z')
+
+def _boolean_prefix(text: str) -> bool:
+    text = text.lower()
+    return 'true'.startswith(text) or 'false'.startswith(text)
+
+# Strings still being streamed that the coercer may yet convert
+_COERCIBLE_PREFIXES: Dict[str, Callable[[str], Any]] = {
+    'number': _NUMBER_PREFIX.match,
+    'integer': _INTEGER_PREFIX.match,
+    'boolean': _boolean_prefix,
+}
+
+# Compiled node: check(value, partial, coerce) -> bool and coerce(value) -> value
+Check = Callable[[Any, bool, bool], bool]
+Coerce = Callable[[Any], Any]
+
+def _always(value: Any, partial: bool = False, coerce: bool = False) -> bool:
+    return True
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _compile_type(name: str) -> Tuple[Check, Coerce, bool]:
+    optional = name.endswith('?')
+    name = name.rstrip('?')
+    if name == 'any':
+        return _always, _identity, optional
+    if name not in _TYPES:
+        raise ValueError(f"Unknown JSON template type: {name!r}")
+    types = _TYPES[name] + ((type(None),) if optional else ())
+    convert = _COERCERS.get(name) or _no_coercion(name)
+    coercible_prefix = _COERCIBLE_PREFIXES.get(name)
+
+    def check(value: Any, partial: bool = False, coerce: bool = False) -> bool:
+        if type(value) in types:
+            return True
+        if not coerce:
+            return False
+        if partial and coercible_prefix is not None and type(value) is str:
+            return bool(coercible_prefix(value))
+        try:
+            convert(value)
+        except ValueError:
+            return False
+        return True
+
+    def coerce(value: Any) -> Any:
+        if type(value) in types:
+            return value
+        return convert(value)
+
+    return check, coerce, optional
+
+def _compile_array(template: List[Any]) -> Tuple[Check, Coerce, bool]:
+    if len(template) > 1:
+        raise ValueError("An array template holds a single element template")
+    if not template:
+        return _compile_type('array')
+    check_item, coerce_item, _ = _compile(template[0])
+
+    def check(value: Any, partial: bool = False, coerce: bool = False) -> bool:
+        if type(value) is not list:
+            return False
+        for item in value:
+            if not check_item(item, partial, coerce):
+                return False
+        return True
+
+    def coerce(value: Any) -> Any:
+        if type(value) is not list:
+            raise ValueError(f"Expected an array, got {value!r}")
+        return [coerce_item(item) for item in value]
+
+    return check, coerce, False
+
+def _compile_object(template: Dict[str, Any]) -> Tuple[Check, Coerce, bool]:
+    fields = []
+    required = []
+    for key, spec in template.items():
+        check_field, coerce_field, optional = _compile(spec)
+        fields.append((key, check_field, coerce_field))
+        if not optional:
+            required.append(key)
+    required_keys = frozenset(required)
+
+    def check(value: Any, partial: bool = False, coerce: bool = False) -> bool:
+        if type(value) is not dict:
+            return False
+        if not partial and not required_keys.issubset(value.keys()):
+            return False
+        for key, check_field, _ in fields:
+            if key in value and not check_field(value[key], partial, coerce):
+                return False
+        return True
+
+    def coerce(value: Any) -> Any:
+        if type(value) is not dict:
+            raise ValueError(f"Expected an object, got {value!r}")
+        missing = required_keys.difference(value.keys())
+        if missing:
+            raise ValueError(f"Missing required key: {min(missing)!r}")
+        result = dict(value)
+        for key, _, coerce_field in fields:
+            if key in result:
+                result[key] = coerce_field(result[key])
+        return result
+
+    return check, coerce, False
+
+def _compile(template: Any) -> Tuple[Check, Coerce, bool]:
+    """Compile a template node into its check and coerce functions and optionality"""
+    if isinstance(template, dict):
+        return _compile_object(template)
+    if isinstance(template, list):
+        return _compile_array(template)
+    if isinstance(template, type) and template in _PYTHON_TYPES:
+        return _compile_type(_PYTHON_TYPES[template])
+    if isinstance(template, str):
+        return _compile_type(template.strip().lower())
+    raise ValueError(f"Unsupported JSON template: {template!r}")
+
+def _is_model(template: Any) -> bool:
+    """Whether the template is a pydantic (v2) model class"""
+    return isinstance(template, type) and hasattr(template, 'model_validate')
+
+class JSONTemplate:
+    """
+    Template compiled into a validator and coercer of JSON elements
+
+    Instances are callables returning whether a complete element matches, so
+    they can be passed as a `validator`.
+
+    Args:
+        template: Template dict, list or type name, or a pydantic model class
+
+    Raises:
+        ValueError: If the template uses an unknown type
+    """
+
+    def __init__(self, template: Any):
+        self.template = template
+        self.model: Optional[type] = template if _is_model(template) else None
+        if self.model is not None:
+            self._check, self._coerce = self._model_check, self.model.model_validate
+        else:
+            self._check, self._coerce, _ = _compile(template)
+
+    def _model_check(self, value: Any, partial: bool = False, coerce: bool = False) -> bool:
+        if partial:
+            # Models validate whole objects; of an element in progress only the keys can be checked
+            if not isinstance(value, dict):
+                return False
+            if self.model.model_config.get('extra') == 'forbid':
+                return all(key in self.model.model_fields for key in value)
+            return True
+        try:
+            self.model.model_validate(value)
+        except ValueError:
+            return False
+        return True
+
+    def validate(self, value: Any, partial: bool = False, coerce: bool = False) -> bool:
+        """
+        Whether an element matches the template
+
+        With `partial`, the element is a prefix still being streamed: required
+        keys may be missing, but every value present must match. With
+        `coerce`, values `coerce` would convert are accepted as well, and in
+        partial elements so are strings that may still become convertible.
+        """
+        return self._check(value, partial, coerce)
+
+    def __call__(self, value: Any) -> bool:
+        return self._check(value, False, False)
+
+    def validate_partial(self, value: Any, coerce: bool = False) -> bool:
+        """Whether an element in progress can still match the template"""
+        return self._check(value, True, coerce)
+
+    def coerce(self, value: Any) -> Any:
+        """
+        Convert an element to the template's types
+
+        Numeric and boolean strings become numbers and booleans, numbers
+        become strings and integral floats integers. With a pydantic model the
+        element becomes a model instance.
+
+        Raises:
+            ValueError: If the element cannot match the template
+        """
+        return self._coerce(value)
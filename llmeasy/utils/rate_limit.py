@@ -0,0 +1,258 @@
+"""
+Client-side rate limiting with request and token buckets
+
+A `RateLimiter` holds a requests-per-minute and a tokens-per-minute bucket
+for one provider, model and API key. Callers wait in FIFO order until both
+buckets can cover their request, so concurrent calls run at the sustained
+rate instead of bursting into 429s. Budgets adapt to the rate-limit headers
+of provider responses, which the HTTP clients built by `http_pool` report
+through `observe_response`.
+"""
+import asyncio
+import contextvars
+import email.utils
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+# Response header -> (bucket, field) for OpenAI-compatible and Anthropic APIs
+RATE_LIMIT_HEADERS = {
+    'x-ratelimit-limit-requests': ('requests', 'limit'),
+    'x-ratelimit-remaining-requests': ('requests', 'remaining'),
+    'x-ratelimit-limit-tokens': ('tokens', 'limit'),
+    'x-ratelimit-remaining-tokens': ('tokens', 'remaining'),
+    'anthropic-ratelimit-requests-limit': ('requests', 'limit'),
+    'anthropic-ratelimit-requests-remaining': ('requests', 'remaining'),
+    'anthropic-ratelimit-tokens-limit': ('tokens', 'limit'),
+    'anthropic-ratelimit-tokens-remaining': ('tokens', 'remaining'),
+}
+
+_current_limiter: contextvars.ContextVar[Optional["RateLimiter"]] = contextvars.ContextVar(
+    'llmeasy_rate_limiter', default=None
+)
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count of a text, about four characters per token"""
+    return len(text) // 4 + 1 if text else 0
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to `retry-after-ms` or `retry-after`, if present"""
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute
+
+    A bucket without a limit is unlimited. The bucket starts full and holds at
+    most one minute's worth of tokens.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute or 0)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.per_minute:
+            elapsed = now - self.updated
+            self.tokens = min(self.per_minute, self.tokens + elapsed * self.per_minute / 60)
+        self.updated = now
+
+    def set_limit(self, per_minute: float):
+        """Change the limit, keeping the current level within the new capacity"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.per_minute is None:
+            self.tokens = float(per_minute)
+        self.per_minute = per_minute
+        self.tokens = min(self.tokens, per_minute)
+
+    def observe_remaining(self, remaining: float):
+        """Lower the level to what the server reports as remaining"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, remaining)
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available"""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        # Requests larger than the whole bucket wait for a full bucket
+        missing = min(amount, self.per_minute) - self.tokens
+        return max(missing, 0.0) * 60 / self.per_minute
+
+    def consume(self, amount: float):
+        if self.per_minute:
+            self.tokens -= min(amount, self.per_minute)
+
+    def release(self, amount: float):
+        if self.per_minute:
+            self.tokens = min(self.per_minute, self.tokens + amount)
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter for one provider, model and key
+
+    Limits that are not configured are learned from rate-limit response headers;
+    a configured limit is only ever lowered by them. A `retry-after` on a 429
+    response pauses every caller until it expires.
+
+    Args:
+        requests_per_minute: Request budget, or None to learn it from headers
+        tokens_per_minute: Token budget, or None to learn it from headers
+        adaptive: Adjust budgets from response headers
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        adaptive: bool = True
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.configured = {'requests': requests_per_minute, 'tokens': tokens_per_minute}
+        self.adaptive = adaptive
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio locks belong to one event loop, so each loop gets its own
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _delay(self, tokens: float) -> float:
+        now = time.monotonic()
+        return max(
+            self.paused_until - now,
+            self.requests.delay(1, now),
+            self.tokens.delay(tokens, now),
+        )
+
+    async def acquire(self, tokens: float = 0):
+        """
+        Wait until one request and `tokens` tokens are available, then take them
+
+        Callers are served in arrival order, so a large request is not starved
+        by a stream of small ones.
+        """
+        self.waiting += 1
+        try:
+            async with self._get_lock():
+                # Budgets may change while sleeping, so re-check before taking
+                while True:
+                    delay = self._delay(tokens)
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+        finally:
+            self.waiting -= 1
+
+    def release(self, tokens: float):
+        """Return reserved tokens that a request turned out not to use"""
+        if tokens > 0:
+            self.tokens.release(tokens)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds`"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: Optional[int] = None):
+        """Adapt budgets to the rate-limit headers of a provider response"""
+        if not self.adaptive:
+            return
+        buckets = {'requests': self.requests, 'tokens': self.tokens}
+        for header, (bucket, field) in RATE_LIMIT_HEADERS.items():
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                number = float(value)
+            except ValueError:
+                continue
+            if field == 'limit':
+                configured = self.configured[bucket]
+                limit = number if configured is None else min(number, configured)
+                if limit > 0 and limit != buckets[bucket].per_minute:
+                    buckets[bucket].set_limit(limit)
+            else:
+                buckets[bucket].observe_remaining(number)
+        if status_code == 429:
+            retry_after = parse_retry_after(headers)
+            if retry_after is not None:
+                self.pause(retry_after)
+
+    @contextmanager
+    def observing(self) -> Iterator["RateLimiter"]:
+        """Report responses of requests made inside the block to this limiter"""
+        token = _current_limiter.set(self)
+        try:
+            yield self
+        finally:
+            _current_limiter.reset(token)
+
+async def observe_response(response: Any):
+    """
+    httpx response hook that feeds rate-limit headers to the active limiter
+
+    Installed on every client built by `http_pool.create_http_client`; it does
+    nothing outside a `RateLimiter.observing()` block.
+    """
+    limiter = _current_limiter.get()
+    if limiter is not None:
+        limiter.update_from_headers(response.headers, response.status_code)
+
+_limiters: Dict[Tuple[str, Optional[str], str], RateLimiter] = {}
+_lock = threading.Lock()
+
+def get_rate_limiter(
+    provider: str,
+    model: Optional[str],
+    api_key: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None
+) -> RateLimiter:
+    """
+    Get the process-wide limiter for a provider, model and API key
+
+    Every `LLMEasy` instance using the same account and model draws from the
+    same budget. Limits passed here replace previously configured ones.
+    """
+    key = (provider, model, hashlib.sha256(api_key.encode('utf-8')).hexdigest())
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[key] = limiter
+            return limiter
+    for bucket, limit in (('requests', requests_per_minute), ('tokens', tokens_per_minute)):
+        if limit is not None and limit != limiter.configured[bucket]:
+            limiter.configured[bucket] = limit
+            getattr(limiter, bucket).set_limit(limit)
+    return limiter
@@ -0,0 +1,217 @@
+"""
+Retries with exponential backoff, jitter and a process-wide retry budget
+
+`RetryPolicy` retries calls that failed with a transient error: rate limiting
+(429), overload and server errors (5xx), timeouts and dropped connections.
+Provider SDK errors are recognised through the exception chain, since
+providers wrap them in `ValueError`. Every policy draws on a `RetryBudget`,
+which caps retries at a fraction of recent requests so retries cannot
+multiply load while a provider is failing.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+from .rate_limit import parse_retry_after
+from ..exceptions import JSONResponseError
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+# SDK and HTTP client exceptions for timeouts and failed connections, by class name,
+# so no SDK has to be imported to recognise them
+RETRYABLE_EXCEPTION_NAMES = frozenset({
+    'APITimeoutError',
+    'APIConnectionError',
+    'TimeoutException',
+    'ConnectError',
+    'ReadError',
+    'WriteError',
+    'RemoteProtocolError',
+    'MistralConnectionException',
+    'DeadlineExceeded',
+    'ServiceUnavailable',
+})
+
+def _exception_chain(error: BaseException) -> Iterator[BaseException]:
+    """Yield an exception and the exceptions it was raised from"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an SDK error, if it carries one"""
+    for attribute in ('status_code', 'http_status', 'code'):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int) and 100 <= status < 600:
+            return status
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient, judged by the first informative exception in its chain"""
+    for cause in _exception_chain(error):
+        if isinstance(cause, JSONResponseError):
+            return False
+        status = _status_code(cause)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES
+        if isinstance(cause, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        if any(cls.__name__ in RETRYABLE_EXCEPTION_NAMES for cls in type(cause).__mro__):
+            return True
+    return False
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked to wait before retrying, from `Retry-After` headers"""
+    for cause in _exception_chain(error):
+        headers = getattr(cause, 'headers', None)
+        if headers is None:
+            headers = getattr(getattr(cause, 'response', None), 'headers', None)
+        if headers:
+            retry_after = parse_retry_after(headers)
+            if retry_after is not None:
+                return retry_after
+    return None
+
+class RetryBudget:
+    """
+    Process-wide cap on retries relative to requests
+
+    Over a sliding window of `ttl` seconds, retries are allowed while they stay
+    below `ratio` times the number of requests, with a floor of
+    `min_retries_per_second` so that low-traffic clients can still retry.
+
+    Args:
+        ratio: Retries allowed per request
+        min_retries_per_second: Retries always allowed regardless of traffic
+        ttl: Window in seconds over which requests and retries are counted
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries_per_second: float = 1.0, ttl: float = 10.0):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.ttl = ttl
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        """Count an original, non-retry request"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        """Take a retry from the budget, or return False if it is exhausted"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            allowed = max(self.min_retries_per_second * self.ttl, self.ratio * len(self._requests))
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+default_retry_budget = RetryBudget()
+
+class RetryPolicy:
+    """
+    Retry transient failures with capped exponential backoff and full jitter
+
+    The n-th retry waits a random time between 0 and
+    `min(max_delay, base_delay * 2 ** n)`. A `Retry-After` from the server is
+    honoured instead, and the error is raised right away when it exceeds
+    `max_delay`.
+
+    Args:
+        max_retries: Retries after the first attempt
+        base_delay: Backoff of the first retry, in seconds
+        max_delay: Upper bound of any single wait, in seconds
+        budget: Shared retry budget, the process-wide one by default
+        retryable: Predicate deciding which errors are retried
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        budget: Optional[RetryBudget] = None,
+        retryable: Callable[[BaseException], bool] = is_retryable
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else default_retry_budget
+        self.retryable = retryable
+
+    def next_delay(self, error: BaseException, retry: int) -> Optional[float]:
+        """Seconds to wait before retry number `retry` (from 0), or None to give up"""
+        if retry >= self.max_retries or not self.retryable(error):
+            return None
+        delay = get_retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        elif delay > self.max_delay:
+            return None
+        if not self.budget.try_retry():
+            return None
+        return delay
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Await `func()`, calling it again after transient failures"""
+        self.budget.record_request()
+        retry = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                delay = self.next_delay(e, retry)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            retry += 1
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Yield the chunks of `open_stream()`, reopening it after transient failures
+
+        Only failures before the first chunk are retried; once output has been
+        yielded, a retry would repeat it.
+        """
+        self.budget.record_request()
+        retry = 0
+        while True:
+            stream = open_stream()
+            try:
+                first = await stream.__anext__()
+                break
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                await stream.aclose()
+                delay = self.next_delay(e, retry)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            retry += 1
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
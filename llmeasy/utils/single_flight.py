@@ -0,0 +1,129 @@
+import asyncio
+import copy
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+class _Call:
+    """An in-flight upstream call and the number of callers waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class _StreamFanout:
+    """
+    An in-flight upstream stream shared by several subscribers
+
+    Chunks are kept for the lifetime of the stream, so a subscriber that joins
+    late first replays everything received so far.
+    """
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._updated = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self._notify()
+            aclose = getattr(source, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._updated.wait()
+
+class SingleFlight:
+    """
+    Share one upstream call between concurrent identical requests
+
+    While a call for a key is in flight, further callers with the same key wait
+    for its result instead of starting their own. Once it finishes the key is
+    forgotten, so later callers start a new call. A single instance can be
+    shared between several `LLMEasy` objects.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _StreamFanout] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the result of `func()`, sharing it with concurrent callers of the same key
+
+        The upstream call is cancelled only when every caller waiting on it has
+        been cancelled.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                self._forget(self._calls, key, call)
+                call.task.cancel()
+        # Parsed JSON responses are mutable, so every caller gets its own copy
+        return result if isinstance(result, str) else copy.deepcopy(result)
+
+    async def stream(
+        self,
+        key: str,
+        func: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Yield the chunks of `func()`, fanning one upstream stream out to concurrent callers
+
+        The upstream stream is closed once every subscriber has stopped reading.
+        """
+        fanout = self._streams.get(key)
+        if fanout is None:
+            fanout = _StreamFanout(func())
+            self._streams[key] = fanout
+            fanout.task.add_done_callback(lambda _: self._forget(self._streams, key, fanout))
+        fanout.subscribers += 1
+        try:
+            async for chunk in fanout.subscribe():
+                yield chunk
+        finally:
+            fanout.subscribers -= 1
+            if not fanout.subscribers and not fanout.task.done():
+                self._forget(self._streams, key, fanout)
+                fanout.task.cancel()
+
+    @staticmethod
+    def _forget(registry: Dict[str, Any], key: str, entry: Any):
+        if registry.get(key) is entry:
+            del registry[key]
+
+    def __len__(self) -> int:
+        return len(self._calls) + len(self._streams)
@@ -0,0 +1,69 @@
+"""
+Deadlines for queries and streams
+
+`with_deadline` bounds a whole request. `stream_with_timeouts` bounds the wait
+for a stream's first chunk, the gaps between later chunks and, optionally,
+the whole stream. Expired deadlines raise `LLMTimeoutError`, and the timed-out
+request is cancelled so its HTTP connection is released.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Optional
+from ..exceptions import LLMTimeoutError
+
+# asyncio.timeout (Python 3.11+) avoids the task wait_for creates per call
+_asyncio_timeout = getattr(asyncio, 'timeout', None)
+
+async def with_deadline(aw: Awaitable[Any], timeout: Optional[float], phase: str = 'total') -> Any:
+    """Await `aw`, raising `LLMTimeoutError` if it takes longer than `timeout` seconds"""
+    if timeout is None:
+        return await aw
+    try:
+        if _asyncio_timeout is not None:
+            async with _asyncio_timeout(timeout):
+                return await aw
+        return await asyncio.wait_for(aw, timeout)
+    except LLMTimeoutError:
+        # A deadline of an inner request expired first
+        raise
+    except asyncio.TimeoutError:
+        raise LLMTimeoutError(phase, timeout) from None
+
+async def stream_with_timeouts(
+    stream: AsyncIterator[str],
+    first_token_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    total_timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Yield the chunks of `stream`, enforcing per-phase deadlines
+
+    Time spent by the consumer between chunks does not count towards the
+    first-token and idle timeouts, only towards the total deadline.
+    """
+    if first_token_timeout is None and idle_timeout is None and total_timeout is None:
+        async for chunk in stream:
+            yield chunk
+        return
+
+    deadline = None if total_timeout is None else time.monotonic() + total_timeout
+    phase, timeout = 'first_token', first_token_timeout
+    try:
+        while True:
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0.0)
+                if timeout is None or remaining < timeout:
+                    phase, timeout = 'total', remaining
+            try:
+                chunk = await with_deadline(stream.__anext__(), timeout, phase)
+            except StopAsyncIteration:
+                return
+            except LLMTimeoutError as e:
+                if e.phase == 'total' and deadline is not None:
+                    # Report the configured deadline, not the time that was left
+                    raise LLMTimeoutError('total', total_timeout) from None
+                raise
+            yield chunk
+            phase, timeout = 'idle', idle_timeout
+    finally:
+        await stream.aclose()
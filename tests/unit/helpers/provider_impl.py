@@ -1,6 +1,7 @@
 from llmeasy.base import BaseProvider
 from typing import Optional, Any
 import json
+import asyncio
 
 class MockProvider(BaseProvider):
     """Mock implementation of BaseProvider for testing"""
@@ -37,4 +38,34 @@ class MockProvider(BaseProvider):
                 return True
             except json.JSONDecodeError:
                 return False
-        return True 
\ No newline at end of file
+        return True 
+
+
+class DelayProvider(MockProvider):
+    """Mock provider that sleeps for a per-prompt delay and tracks concurrency"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = kwargs.get('delays', {})
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        
+    async def _wait(self, prompt: str):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(prompt, 0))
+        finally:
+            self.in_flight -= 1
+        if prompt == "fail":
+            raise ValueError("Mock failure")
+        
+    async def query(self, prompt: str, system: Optional[str] = None, **kwargs):
+        await self._wait(prompt)
+        return f"response to {prompt}"
+        
+    async def stream(self, prompt: str, system: Optional[str] = None, **kwargs):
+        yield f"{prompt}:start"
+        await self._wait(prompt)
+        yield f"{prompt}:end"
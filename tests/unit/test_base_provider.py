@@ -3,10 +3,32 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import json
 import logging
 from typing import Optional, Any
+from llmeasy.providers.base import LLMProvider
 from .helpers.provider_impl import MockProvider
 
 logger = logging.getLogger(__name__)
 
+class PlainChunks:
+    """Async iterator without aclose or close, like some SDK streams"""
+    def __init__(self, items):
+        self.items = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.items)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class PlainStreamProvider(LLMProvider):
+    async def _generate_response(self, prompt, system=None, stream=False, output_format=None, **kwargs):
+        return PlainChunks(["chunk1", "chunk2"])
+
+    def _format_prompt(self, prompt, output_format):
+        return prompt
+
 class TestBaseProvider:
     def test_initialization(self):
         """Test provider initialization"""
@@ -60,4 +82,10 @@ class TestBaseProvider:
         # Test JSON format
         formatted = provider._format_prompt("Test prompt", 'json')
         assert "json" in formatted.lower()
-        
\ No newline at end of file
+        
+
+    async def test_stream_without_close(self):
+        """Streams that cannot be closed are read to the end"""
+        provider = PlainStreamProvider(api_key="test_key")
+        chunks = [chunk async for chunk in provider.stream("Test prompt")]
+        assert chunks == ["chunk1", "chunk2"]
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+import time
+from unittest.mock import patch
+from llmeasy import LLMEasy, MemoryCache, SQLiteCache
+from .helpers.provider_impl import DelayProvider
+
+class TestMemoryCache:
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted first"""
+        cache = MemoryCache(max_size=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        assert cache.get("a") == "1"
+        cache.set("c", "3")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert len(cache) == 2
+
+    def test_ttl(self):
+        """Test expired entries are not returned"""
+        cache = MemoryCache(ttl=0.01)
+        cache.set("a", "1")
+        time.sleep(0.02)
+        assert cache.get("a", "missing") == "missing"
+        assert len(cache) == 0
+
+    def test_values_are_copied(self):
+        """Test mutating a returned value does not change the cache"""
+        cache = MemoryCache()
+        cache.set("a", {"items": [1]})
+        cache.get("a")["items"].append(2)
+        assert cache.get("a") == {"items": [1]}
+
+class TestSQLiteCache:
+    def test_persistence(self, tmp_path):
+        """Test entries survive reopening the database"""
+        path = str(tmp_path / "cache.sqlite")
+        cache = SQLiteCache(path=path)
+        cache.set("a", {"test": "response"})
+        cache.close()
+        
+        reopened = SQLiteCache(path=path)
+        assert reopened.get("a") == {"test": "response"}
+        reopened.clear()
+        assert reopened.get("a") is None
+
+    def test_eviction_and_ttl(self, tmp_path):
+        """Test size and TTL eviction"""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite"), max_size=2, trim_interval=1)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        
+        cache.ttl = 0
+        time.sleep(0.01)
+        assert cache.get("c") is None
+
+    def test_periodic_trim(self, tmp_path):
+        """Test eviction only runs every trim_interval writes"""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite"), max_size=2, trim_interval=3)
+        for key in ("a", "b"):
+            cache.set(key, key)
+        cache.set("a", "again")
+        assert len(cache) == 2
+        for key in ("c", "d"):
+            cache.set(key, key)
+        assert len(cache) == 4
+        cache.set("e", "e")
+        assert len(cache) == 2
+        assert cache.get("d") == "d" and cache.get("b") is None
+
+    async def test_async_access(self, tmp_path):
+        """Test the async methods run the database calls off the event loop"""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite"))
+        with patch('llmeasy.utils.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            await cache.aset("a", {"x": 1})
+            assert await cache.aget("a") == {"x": 1}
+            assert await cache.aget("missing", "default") == "default"
+        assert to_thread.call_count == 3
+
+    async def test_query_uses_sqlite_cache(self, tmp_path):
+        """Test LLMEasy answers repeated queries from an SQLite cache"""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite"))
+        with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+            llm = LLMEasy(provider='mock', api_key='test_key', cache=cache)
+        assert await llm.query("prompt") == await llm.query("prompt")
+        assert llm.provider.calls == 1
+
+class TestQueryCache:
+    @pytest.fixture
+    def llm(self):
+        with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+            return LLMEasy(provider='mock', api_key='test_key', cache=MemoryCache())
+
+    async def test_identical_queries_hit_cache(self, llm):
+        """Test identical queries only reach the provider once"""
+        first = await llm.query("prompt", system="system")
+        second = await llm.query("prompt", system="system")
+        
+        assert first == second == "response to prompt"
+        assert llm.provider.calls == 1
+
+    async def test_key_includes_request_parameters(self, llm):
+        """Test different prompts, formats and parameters are cached separately"""
+        await llm.query("prompt")
+        await llm.query("prompt", system="other")
+        await llm.query("prompt", output_format='json')
+        await llm.query("prompt", seed=1)
+        llm.provider.temperature = 0.1
+        await llm.query("prompt")
+        assert llm.provider.calls == 5
+
+    async def test_bypass(self, llm):
+        """Test use_cache=False always calls the provider"""
+        await llm.query("prompt")
+        await llm.query("prompt", use_cache=False)
+        assert llm.provider.calls == 2
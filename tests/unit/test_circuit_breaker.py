@@ -0,0 +1,164 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from llmeasy.exceptions import CircuitOpenError
+from llmeasy.utils.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_circuit_breaker
+)
+from .helpers.provider_impl import DelayProvider
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+class Upstream:
+    """Scripted upstream whose calls succeed or fail with a given status"""
+
+    def __init__(self):
+        self.status = None
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.status is not None:
+            raise ValueError("Error generating Test response") from StatusError(self.status)
+        return "ok"
+
+    async def stream(self):
+        await self()
+        yield "chunk"
+
+class FailingProvider(DelayProvider):
+    """Mock provider whose calls fail with a server error"""
+    async def query(self, prompt: str, system=None, **kwargs):
+        self.calls += 1
+        raise ValueError("Error generating Mock response") from StatusError(503)
+
+    async def stream(self, prompt: str, system=None, **kwargs):
+        self.calls += 1
+        raise ValueError("Error generating Mock response") from StatusError(503)
+        yield
+
+class TestCircuitBreaker:
+    async def test_opens_after_threshold(self):
+        """Test consecutive failures open the circuit and it then fails fast"""
+        breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=60)
+        upstream = Upstream()
+        upstream.status = 503
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                await breaker.call(upstream)
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await breaker.call(upstream)
+        assert upstream.calls == 3
+        assert exc_info.value.retry_after > 59
+
+    async def test_half_open_probe(self):
+        """Test a successful probe closes the circuit and a failed one re-opens it"""
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0.05)
+        upstream = Upstream()
+        upstream.status = 500
+        with pytest.raises(ValueError):
+            await breaker.call(upstream)
+        assert breaker.state == OPEN
+
+        await asyncio.sleep(0.06)
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(ValueError):
+            await breaker.call(upstream)
+        assert breaker.state == OPEN
+
+        await asyncio.sleep(0.06)
+        upstream.status = None
+        assert await breaker.call(upstream) == "ok"
+        assert breaker.state == CLOSED
+
+    async def test_probe_limit(self):
+        """Test only half_open_max_calls probes run at once"""
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0)
+        breaker.trip()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        results = await asyncio.gather(
+            breaker.call(slow), breaker.call(slow), return_exceptions=True
+        )
+        assert results[0] == "ok"
+        assert isinstance(results[1], CircuitOpenError)
+        assert breaker.state == CLOSED
+
+    async def test_client_errors_do_not_count(self):
+        """Test rate limits and invalid requests do not open the circuit"""
+        breaker = CircuitBreaker('test', failure_threshold=1)
+        upstream = Upstream()
+        for status in (400, 429):
+            upstream.status = status
+            with pytest.raises(ValueError):
+                await breaker.call(upstream)
+        assert breaker.state == CLOSED
+
+    async def test_stream(self):
+        """Test streams count as failed when they fail before the first chunk"""
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60)
+        upstream = Upstream()
+        assert [chunk async for chunk in breaker.stream(upstream.stream)] == ["chunk"]
+        upstream.status = 502
+        with pytest.raises(ValueError):
+            async for _ in breaker.stream(upstream.stream):
+                pass
+        with pytest.raises(CircuitOpenError):
+            async for _ in breaker.stream(upstream.stream):
+                pass
+        assert upstream.calls == 2
+
+    def test_shared_registry(self):
+        """Test breakers are shared per provider and model"""
+        breaker = get_circuit_breaker('test', 'model-a', failure_threshold=2)
+        assert get_circuit_breaker('test', 'model-a') is breaker
+        assert get_circuit_breaker('test', 'model-b') is not breaker
+        assert breaker.name == 'test:model-a'
+
+class TestLLMEasyCircuitBreaker:
+    def make_llm(self, provider_class=DelayProvider, **kwargs) -> LLMEasy:
+        with patch('llmeasy.core.get_provider_class', return_value=provider_class):
+            return LLMEasy(provider='mock', api_key='test_key', retry=False, **kwargs)
+
+    async def test_fallback(self):
+        """Test requests go to the fallback while the circuit is open"""
+        fallback = self.make_llm()
+        llm = self.make_llm(
+            FailingProvider,
+            circuit_breaker=CircuitBreaker('mock', failure_threshold=2, recovery_timeout=60),
+            fallback=fallback
+        )
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await llm.query("prompt")
+        assert await llm.query("prompt") == "response to prompt"
+        assert [chunk async for chunk in llm.stream("prompt")] == ["prompt:start", "prompt:end"]
+        assert llm.provider.calls == 2
+        assert fallback.provider.calls == 2
+
+    async def test_fail_fast(self):
+        """Test an open circuit raises without calling the provider"""
+        llm = self.make_llm(
+            FailingProvider,
+            circuit_breaker=CircuitBreaker('mock', failure_threshold=1, recovery_timeout=60)
+        )
+        with pytest.raises(ValueError):
+            await llm.query("prompt")
+        with pytest.raises(CircuitOpenError):
+            await llm.query("prompt")
+        assert llm.provider.calls == 1
+
+    def test_configured_from_settings(self):
+        """Test True uses the shared breaker configured by the circuit settings"""
+        llm = self.make_llm(circuit_breaker=True, circuit_failure_threshold=7)
+        assert llm.circuit_breaker.failure_threshold == 7
+        assert self.make_llm().circuit_breaker is None
@@ -141,4 +141,57 @@ class TestConfiguration:
         
         assert get_api_key("openai") == "test-key"
         assert get_api_key("claude") == "test-key"
-        assert get_api_key("mistral") == "test-key"
\ No newline at end of file
+        assert get_api_key("mistral") == "test-key"
+
+    def test_config_manager_is_lazy(self, temp_config_file):
+        """Test that the config file is only read on first use"""
+        from llmeasy.utils.config import ConfigManager
+        
+        manager = ConfigManager(config_path=temp_config_file)
+        assert manager._config is None
+        
+        assert manager.settings.max_tokens == 2000
+        assert manager._config is not None
+
+    def test_config_auto_reload(self, temp_config_file):
+        """Test settings are reloaded when the config file changes"""
+        from llmeasy.utils.config import ConfigManager
+        
+        manager = ConfigManager(config_path=temp_config_file, auto_reload=True)
+        static_manager = ConfigManager(config_path=temp_config_file)
+        assert manager.settings.max_tokens == 2000
+        assert static_manager.settings.max_tokens == 2000
+        
+        with open(temp_config_file, 'w') as f:
+            yaml.safe_dump({'settings': {'max_tokens': 500}}, f)
+        os.utime(temp_config_file, ns=(0, manager._mtime + 1_000_000_000))
+        
+        assert manager.settings.max_tokens == 500
+        assert static_manager.settings.max_tokens == 2000
+        
+        static_manager.reload()
+        assert static_manager.settings.max_tokens == 500
+
+    def test_import_does_no_config_io(self, tmp_path):
+        """Test that importing llmeasy does not read the config or .env files"""
+        import subprocess
+        import sys
+        
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        config_dir = tmp_path / '.llmeasy'
+        config_dir.mkdir()
+        (config_dir / 'config.yaml').write_text("settings: {max_tokens: 123}\n")
+        code = (
+            "import llmeasy\n"
+            "from llmeasy.utils import config\n"
+            "print(config.default_config._config is None, config._dotenv_loaded)\n"
+            "print(config.settings.max_tokens)"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, 'HOME': str(tmp_path), 'PYTHONPATH': root},
+            check=True
+        )
+        assert result.stdout.split() == ['True', 'False', '123']
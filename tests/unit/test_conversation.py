@@ -0,0 +1,147 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from llmeasy import Conversation, LLMEasy, Message
+from llmeasy.conversation import anthropic_messages, gemini_contents, openai_messages
+from llmeasy.providers import ClaudeProvider, OpenAIProvider
+from .helpers.provider_impl import DelayProvider
+
+class HistoryProvider(DelayProvider):
+    """Mock provider recording the system prompt and history of each request"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    async def query(self, prompt: str, system=None, history=None, **kwargs):
+        self.requests.append((system, list(history or ()), prompt))
+        return f"reply {len(self.requests)}"
+
+    async def stream(self, prompt: str, system=None, history=None, **kwargs):
+        self.requests.append((system, list(history or ()), prompt))
+        yield "streamed "
+        yield "reply"
+
+def make_llm() -> LLMEasy:
+    with patch('llmeasy.core.get_provider_class', return_value=HistoryProvider):
+        return LLMEasy(provider='mock', api_key='test_key', retry=False)
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+class TestConversation:
+    async def test_turns_are_sent_as_history(self):
+        """Test each turn sends the earlier turns and records the reply"""
+        llm = make_llm()
+        conversation = Conversation(system="Be brief")
+        assert await conversation.query(llm, "first") == "reply 1"
+        assert await conversation.query(llm, "second") == "reply 2"
+
+        system, history, prompt = llm.provider.requests[-1]
+        assert system == "Be brief"
+        assert history == [Message('user', 'first'), Message('assistant', 'reply 1')]
+        assert prompt == "second"
+        assert len(conversation) == 4
+
+    async def test_stream_records_completed_turns(self):
+        """Test a streamed reply is recorded only when read to the end"""
+        llm = make_llm()
+        conversation = Conversation()
+        assert [c async for c in conversation.stream(llm, "hi")] == ["streamed ", "reply"]
+        assert conversation.messages[-1] == Message('assistant', "streamed reply")
+
+        stream = conversation.stream(llm, "again")
+        async for _ in stream:
+            break
+        await stream.aclose()
+        assert len(conversation) == 2
+
+    def test_truncation_drops_blocks_of_turns(self):
+        """Test history is cut down to the low-water mark, keeping the prefix stable afterwards"""
+        conversation = Conversation(max_tokens=10, token_counter=count_words, keep_last=2)
+        for index in range(5):
+            conversation.add_user(f"question {index}")
+            conversation.add_assistant("answer")
+        assert conversation.token_count() == 15
+
+        dropped = conversation.truncate(extra=2)
+        assert conversation.token_count() + 2 <= 7.5
+        assert conversation.messages[0].role == 'user'
+        assert len(dropped) + len(conversation) == 10
+
+        prefix = list(conversation.messages)
+        conversation.add_user("short")
+        assert conversation.truncate(extra=1) == []
+        assert conversation.messages[:len(prefix)] == prefix
+
+    def test_keep_last(self):
+        """Test the most recent messages survive even when over budget"""
+        conversation = Conversation(max_tokens=1, token_counter=count_words, keep_last=2)
+        conversation.add_user("a long question here")
+        conversation.add_assistant("a long answer here")
+        assert conversation.truncate(extra=5) == []
+
+    async def test_summarize(self):
+        """Test dropped turns are folded into a summary in the system prompt"""
+        summaries = []
+
+        async def summarizer(messages):
+            summaries.append(messages)
+            return f"{len(messages)} messages"
+
+        conversation = Conversation(
+            system="Be brief",
+            max_tokens=8,
+            policy='summarize',
+            token_counter=count_words,
+            summarizer=summarizer
+        )
+        for index in range(3):
+            conversation.add_user(f"question {index}")
+            conversation.add_assistant("answer")
+        dropped = await conversation.compact(None, extra=2)
+        assert summaries == [dropped]
+        assert conversation.summary == f"{len(dropped)} messages"
+        assert conversation.system_prompt.startswith("Be brief\n\nSummary of the earlier conversation:")
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            Conversation(policy='forget')
+        with pytest.raises(ValueError):
+            Conversation().add('system', "no")
+
+class TestMessageFormats:
+    history = [Message('user', 'hi'), {'role': 'assistant', 'content': 'hello'}]
+
+    def test_formats(self):
+        """Test history maps onto each provider's message format"""
+        assert openai_messages(self.history) == [
+            {'role': 'user', 'content': 'hi'},
+            {'role': 'assistant', 'content': 'hello'},
+        ]
+        assert gemini_contents(self.history)[1] == {'role': 'model', 'parts': ['hello']}
+        cached = anthropic_messages(self.history, cache=True)
+        assert cached[1]['content'][0]['cache_control'] == {'type': 'ephemeral'}
+        assert cached[0] == {'role': 'user', 'content': 'hi'}
+
+    async def test_openai_provider(self):
+        """Test the OpenAI provider sends history between the system prompt and the prompt"""
+        provider = OpenAIProvider(api_key="test_key")
+        provider.client = AsyncMock()
+        provider.client.chat.completions.create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content="reply"))]
+        ))
+        await provider.query("next", system="sys", history=self.history)
+        kwargs = provider.client.chat.completions.create.call_args.kwargs
+        assert [m['role'] for m in kwargs['messages']] == ['system', 'user', 'assistant', 'user']
+        assert 'history' not in kwargs
+
+    async def test_claude_prompt_caching(self):
+        """Test Claude marks the history prefix for prompt caching when enabled"""
+        provider = ClaudeProvider(api_key="test_key", prompt_caching=True)
+        provider.client = AsyncMock()
+        provider.client.messages.create = AsyncMock(return_value=MagicMock(
+            content=[MagicMock(text="reply")]
+        ))
+        await provider.query("next", history=self.history)
+        messages = provider.client.messages.create.call_args.kwargs['messages']
+        assert messages[1]['content'][0]['cache_control'] == {'type': 'ephemeral'}
+        assert messages[-1] == {'role': 'user', 'content': 'next'}
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from .helpers.provider_impl import DelayProvider
+
+class TestBatchProcess:
+    @pytest.fixture
+    def llm(self):
+        delays = {"slow": 0.3, "a": 0.05, "b": 0.05, "c": 0.05, "d": 0.05}
+        with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+            return LLMEasy(provider='mock', api_key='test_key', delays=delays)
+
+    async def test_sliding_window(self, llm):
+        """Test a slow prompt does not hold back the rest of the batch"""
+        results = []
+        async for index, response in llm.batch_process(
+            ["slow", "a", "b", "c", "d"],
+            max_concurrent=2
+        ):
+            results.append((index, response))
+            
+        assert [index for index, _ in results] == [1, 2, 3, 4, 0]
+        assert results[-1] == (0, "response to slow")
+        assert llm.provider.max_in_flight == 2
+
+    async def test_stream_mode(self, llm):
+        """Test stream mode yields indexed chunks as they arrive"""
+        results = []
+        async for item in llm.batch_process(["slow", "a"], mode='stream'):
+            results.append(item)
+            
+        assert sorted(results) == [
+            (0, "slow:end"), (0, "slow:start"), (1, "a:end"), (1, "a:start")
+        ]
+        assert results[-1] == (0, "slow:end")
+
+    async def test_stream_backpressure(self):
+        """Test a slow consumer holds back stream mode instead of buffering every chunk"""
+        llm = LLMEasy(provider='fake', api_key='test_key', response_tokens=100)
+        produced = 0
+        stream = llm.stream
+
+        async def counting_stream(*args, **kwargs):
+            nonlocal produced
+            async for chunk in stream(*args, **kwargs):
+                produced += 1
+                yield chunk
+
+        llm.stream = counting_stream
+        batch = llm.batch_process(["a", "b"], mode='stream', max_concurrent=2)
+        await batch.__anext__()
+        await asyncio.sleep(0.05)
+        # One chunk consumed, two queued and one waiting in each worker
+        assert produced <= 5
+        await batch.aclose()
+
+    async def test_errors(self, llm):
+        """Test failed prompts are raised or yielded"""
+        results = []
+        async for index, result in llm.batch_process(
+            ["a", "fail", "b"],
+            return_exceptions=True
+        ):
+            results.append((index, result))
+            
+        assert len(results) == 3
+        failures = [result for _, result in results if isinstance(result, Exception)]
+        assert len(failures) == 1
+        
+        with pytest.raises(ValueError):
+            async for _ in llm.batch_process(["a", "fail", "b"]):
+                pass
+        assert llm.provider.in_flight == 0
+
+    async def test_invalid_arguments(self, llm):
+        """Test invalid batch arguments are rejected"""
+        with pytest.raises(ValueError):
+            async for _ in llm.batch_process(["a"], mode='unknown'):
+                pass
+        with pytest.raises(ValueError):
+            async for _ in llm.batch_process(["a"], max_concurrent=0):
+                pass
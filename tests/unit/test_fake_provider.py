@@ -0,0 +1,117 @@
+import pytest
+import time
+from llmeasy import LLMEasy
+from llmeasy.testing import FakeBehavior
+
+class TestFakeProvider:
+    async def test_query_and_stream(self):
+        """Test generated responses through LLMEasy"""
+        llm = LLMEasy(provider='fake', api_key='unused', response_tokens=5, seed=1)
+        
+        response = await llm.query("Test prompt")
+        assert len(response.split()) == 5
+        
+        chunks = [chunk async for chunk in llm.stream("Test prompt")]
+        assert len(chunks) == 5
+        
+        parsed = await llm.query("Test prompt", output_format='json')
+        assert len(parsed["text"].split()) == 5
+
+    async def test_fixed_response(self):
+        """Test a fixed response is split into streamed tokens"""
+        llm = LLMEasy(provider='fake', api_key='unused', response='{"name": "test"}')
+        chunks = [chunk async for chunk in llm.stream("Test prompt")]
+        assert "".join(chunks) == '{"name": "test"}'
+        assert len(chunks) > 1
+
+    async def test_timing(self):
+        """Test time-to-first-token and token rate"""
+        llm = LLMEasy(
+            provider='fake',
+            api_key='unused',
+            ttft=0.05,
+            tokens_per_second=100,
+            response_tokens=6
+        )
+        start = time.perf_counter()
+        arrivals = []
+        async for _ in llm.stream("Test prompt"):
+            arrivals.append(time.perf_counter() - start)
+            
+        assert arrivals[0] >= 0.05
+        assert arrivals[-1] >= 0.05 + 5 / 100
+
+    async def test_errors(self):
+        """Test simulated failures"""
+        llm = LLMEasy(provider='fake', api_key='unused', error_rate=1.0, error_status=429, retry=False)
+        with pytest.raises(ValueError) as exc_info:
+            await llm.query("Test prompt")
+        assert "429" in str(exc_info.value)
+
+    def test_behavior_from_kwargs(self):
+        """Test unrelated settings are ignored"""
+        behavior = FakeBehavior.from_kwargs({'ttft': 0.5, 'temperature': 0.7})
+        assert behavior.ttft == 0.5
+
+class TestFakeProviderServer:
+    @pytest.fixture
+    async def server(self):
+        pytest.importorskip('aiohttp')
+        from llmeasy.testing import FakeProviderServer
+        
+        async with FakeProviderServer(response_tokens=5, seed=1) as server:
+            yield server
+
+    async def test_openai_wire_format(self, server):
+        """Test the OpenAI provider against the fake server"""
+        llm = LLMEasy(provider='openai', api_key='unused', base_url=server.openai_base_url)
+        
+        response = await llm.query("Test prompt")
+        assert len(response.split()) == 5
+        
+        chunks = [chunk async for chunk in llm.stream("Test prompt")]
+        assert len(chunks) == 5
+        
+        parsed = await llm.query("Test prompt", output_format='json')
+        assert isinstance(parsed, dict)
+        assert server.requests == 3
+
+    async def test_anthropic_wire_format(self, server):
+        """Test the Anthropic SDK can parse the fake server's responses"""
+        anthropic = pytest.importorskip('anthropic')
+        client = anthropic.AsyncAnthropic(api_key='unused', base_url=server.anthropic_base_url)
+        messages = [{"role": "user", "content": "Test prompt"}]
+        
+        response = await client.messages.create(model='fake', max_tokens=10, messages=messages)
+        assert len(response.content[0].text.split()) == 5
+        assert response.usage.output_tokens == 5
+        
+        stream = await client.messages.create(
+            model='fake',
+            max_tokens=10,
+            messages=messages,
+            stream=True
+        )
+        texts = [event.delta.text async for event in stream if event.type == 'content_block_delta']
+        assert len(texts) == 5
+        await client.close()
+
+    async def test_error_responses(self, server):
+        """Test simulated failures use the provider's error format"""
+        import aiohttp
+        
+        server.behavior.error_rate = 1.0
+        server.behavior.error_status = 429
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{server.openai_base_url}/chat/completions",
+                json={"model": "fake", "messages": []}
+            ) as response:
+                assert response.status == 429
+                assert (await response.json())["error"]["type"] == "rate_limit_error"
+            async with session.post(
+                f"{server.anthropic_base_url}/v1/messages",
+                json={"model": "fake", "messages": []}
+            ) as response:
+                assert response.status == 429
+                assert (await response.json())["type"] == "error"
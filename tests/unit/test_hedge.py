@@ -0,0 +1,131 @@
+import pytest
+import asyncio
+import time
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from llmeasy.utils.hedge import HedgePolicy, LatencyWindow
+from .helpers.provider_impl import DelayProvider
+
+class Request:
+    """Scripted request recording whether it was cancelled"""
+
+    def __init__(self, delay: float, result=None, error: Exception = None):
+        self.delay = delay
+        self.result = result
+        self.error = error
+        self.cancelled = False
+
+    async def __call__(self):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def stream(self):
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            yield f"{self.result}-1"
+            yield f"{self.result}-2"
+        finally:
+            self.cancelled = True
+
+class TestHedgePolicy:
+    def test_percentile(self):
+        """Test nearest-rank percentiles over the sliding window"""
+        window = LatencyWindow(size=100)
+        assert window.percentile(95) is None
+        for value in range(1, 101):
+            window.add(value)
+        assert window.percentile(50) == 50
+        assert window.percentile(95) == 95
+        assert window.percentile(100) == 100
+
+    def test_delay(self):
+        """Test the delay follows recent latencies once enough are known"""
+        policy = HedgePolicy(initial_delay=1.0, min_samples=10, percentile=90, min_delay=0.05)
+        assert policy.delay == 1.0
+        for value in range(1, 11):
+            policy.latencies.add(value / 10)
+        assert policy.delay == pytest.approx(0.9)
+        assert HedgePolicy(delay=0.3).delay == 0.3
+
+    async def test_hedge_wins(self):
+        """Test a stalled request is raced and cancelled"""
+        policy = HedgePolicy(delay=0.05)
+        primary = Request(5, "primary")
+        hedge = Request(0.01, "hedge")
+        start = time.monotonic()
+        assert await policy.call(primary, hedge) == "hedge"
+        assert time.monotonic() - start < 1
+        assert primary.cancelled
+        assert (policy.requests, policy.hedged, policy.hedge_wins) == (1, 1, 1)
+
+    async def test_fast_request_is_not_hedged(self):
+        """Test no hedge is sent when the first request is fast"""
+        policy = HedgePolicy(delay=0.5)
+        hedge = Request(0, "hedge")
+        assert await policy.call(Request(0.01, "primary"), hedge) == "primary"
+        assert policy.hedged == 0
+
+    async def test_failures(self):
+        """Test early failures are raised and late ones fall back to the other request"""
+        policy = HedgePolicy(delay=0.5)
+        with pytest.raises(ValueError, match="early"):
+            await policy.call(Request(0.01, error=ValueError("early")), Request(0, "hedge"))
+        assert policy.hedged == 0
+
+        policy = HedgePolicy(delay=0.02)
+        primary = Request(0.05, error=ValueError("late"))
+        assert await policy.call(primary, Request(0.1, "hedge")) == "hedge"
+
+        with pytest.raises(ValueError, match="first"):
+            await policy.call(
+                Request(0.05, error=ValueError("first")),
+                Request(0.1, error=ValueError("second"))
+            )
+
+    async def test_stream_hedge(self):
+        """Test a stream without a first chunk is raced, and the loser closed"""
+        policy = HedgePolicy(delay=0.05)
+        primary = Request(5, "primary")
+        hedge = Request(0.01, "hedge")
+        chunks = [chunk async for chunk in policy.stream(primary.stream, hedge.stream)]
+        assert chunks == ["hedge-1", "hedge-2"]
+        assert primary.cancelled
+        assert policy.hedge_wins == 1
+
+        fast = Request(0, "fast")
+        chunks = [chunk async for chunk in policy.stream(fast.stream, hedge.stream)]
+        assert chunks == ["fast-1", "fast-2"]
+        assert policy.hedged == 1
+
+class TestLLMEasyHedge:
+    @pytest.fixture
+    def make_llm(self):
+        def make(**kwargs):
+            with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+                return LLMEasy(provider='mock', api_key='test_key', **kwargs)
+        return make
+
+    async def test_backup_provider(self, make_llm):
+        """Test slow queries and streams are hedged to the backup instance"""
+        backup = make_llm()
+        llm = make_llm(delays={"slow": 5}, hedge=HedgePolicy(delay=0.05, backup=backup))
+
+        start = time.monotonic()
+        assert await llm.query("slow") == "response to slow"
+        assert time.monotonic() - start < 1
+        assert backup.provider.calls == 1
+        assert llm.provider.in_flight == 0
+
+        llm.provider.delays["slow"] = 0.1
+        chunks = [chunk async for chunk in llm.stream("slow")]
+        assert chunks == ["slow:start", "slow:end"]
+        # The primary stream produced its first chunk in time, so it was not hedged
+        assert llm.hedge.hedged == 1
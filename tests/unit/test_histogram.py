@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+from llmeasy import LLMEasy
+from llmeasy.utils.histogram import (
+    LatencyHistogram, StreamStats, dump_stream_stats, get_stream_stats, render_prometheus
+)
+
+async def scripted(*delays: float):
+    for index, delay in enumerate(delays):
+        await asyncio.sleep(delay)
+        yield f"chunk-{index}"
+
+class TestLatencyHistogram:
+    def test_relative_error(self):
+        """Test recorded values come back within the histogram's precision"""
+        histogram = LatencyHistogram(bits=7)
+        for seconds in (0.000050, 0.0123, 0.5, 2.75, 90.0):
+            histogram.reset()
+            histogram.record(seconds)
+            assert histogram.percentile(50) == pytest.approx(seconds, rel=1 / 64)
+            assert histogram.percentile(50) >= seconds - 1e-6
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles and summary statistics"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+        assert histogram.count == 100
+        assert histogram.percentile(50) == pytest.approx(0.050, rel=0.02)
+        assert histogram.percentile(99) == pytest.approx(0.099, rel=0.02)
+        assert histogram.percentile(100) == pytest.approx(0.1)
+        assert histogram.mean == pytest.approx(0.0505)
+        summary = histogram.to_dict()
+        assert summary['min'] == pytest.approx(0.001)
+        assert summary['max'] == pytest.approx(0.1)
+        assert LatencyHistogram().percentile(50) is None
+
+    def test_clamped_and_merged(self):
+        """Test latencies past the range are clamped and histograms merge"""
+        first = LatencyHistogram(max_seconds=1)
+        first.record(5)
+        second = LatencyHistogram(max_seconds=1)
+        second.record(0.01)
+        first.merge(second)
+        assert first.count == 2
+        assert first.to_dict()['max'] == 1.0
+        assert first.cumulative_counts([0.005, 0.02, 10]) == [0, 1, 2]
+        with pytest.raises(ValueError):
+            first.merge(LatencyHistogram(bits=5))
+
+class TestStreamStats:
+    async def test_ttft_and_gaps(self):
+        """Test the first chunk counts towards TTFT and later ones towards the gaps"""
+        stats = StreamStats('test', 'model')
+        chunks = [chunk async for chunk in stats.timed(scripted(0.03, 0, 0.02))]
+        assert len(chunks) == 3
+        assert stats.streams == 1
+        assert stats.ttft.count == 1 and stats.ttft.percentile(50) >= 0.03
+        assert stats.gaps.count == 2 and stats.gaps.percentile(100) >= 0.02
+
+    async def test_consumer_time_is_not_a_gap(self):
+        """Test time spent by the consumer between chunks is not recorded"""
+        stats = StreamStats('test', 'model')
+        async for _ in stats.timed(scripted(0, 0, 0)):
+            await asyncio.sleep(0.02)
+        assert stats.gaps.percentile(100) < 0.01
+
+    async def test_closes_stream(self):
+        """Test the provider stream is closed when the consumer stops early"""
+        closed = []
+
+        async def source():
+            try:
+                yield "chunk"
+                yield "chunk"
+            finally:
+                closed.append(True)
+
+        stream = StreamStats('test', 'model').timed(source())
+        async for _ in stream:
+            break
+        await stream.aclose()
+        assert closed == [True]
+
+    async def test_provider_streams_are_recorded(self):
+        """Test provider streams record into the shared stats, which can be dumped and scraped"""
+        llm = LLMEasy(provider='fake', api_key='test_key', model='histogram-test', response_tokens=3)
+        stats = get_stream_stats('fake', 'histogram-test')
+        stats.reset()
+        assert len([chunk async for chunk in llm.stream("prompt")]) == 3
+        assert (stats.streams, stats.ttft.count, stats.gaps.count) == (1, 1, 2)
+
+        [summary] = [s for s in dump_stream_stats() if s['model'] == 'histogram-test']
+        assert summary['gaps']['count'] == 2
+
+        text = render_prometheus()
+        assert '# TYPE llmeasy_stream_ttft_seconds histogram' in text
+        labels = 'provider="fake",model="histogram-test"'
+        assert f'llmeasy_stream_chunk_gap_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+        assert f'llmeasy_stream_ttft_seconds_count{{{labels}}} 1' in text
@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from llmeasy.providers import OpenAIProvider, GrokProvider
+from llmeasy.utils import http_pool
+
+class TestSharedClients:
+    @pytest.fixture(autouse=True)
+    async def cleanup(self):
+        """Close shared clients after each test"""
+        yield
+        await http_pool.close_shared_clients()
+
+    async def test_clients_are_shared(self):
+        """Test providers with the same key and pool options reuse one client"""
+        first = OpenAIProvider(api_key="test_key", share_http_clients=True)
+        second = OpenAIProvider(api_key="test_key", share_http_clients=True)
+        other_key = OpenAIProvider(api_key="other_key", share_http_clients=True)
+        other_pool = OpenAIProvider(
+            api_key="test_key",
+            share_http_clients=True,
+            http_max_connections=10
+        )
+        grok = GrokProvider(api_key="test_key", share_http_clients=True)
+        
+        assert first.client is second.client
+        assert first.client is not other_key.client
+        assert first.client is not other_pool.client
+        assert first.client is not grok.client
+        assert http_pool.shared_client_count() == 4
+        
+        await http_pool.close_shared_clients()
+        assert http_pool.shared_client_count() == 0
+
+    async def test_sharing_is_opt_in(self):
+        """Test providers get their own client by default"""
+        first = OpenAIProvider(api_key="test_key")
+        second = OpenAIProvider(api_key="test_key")
+        assert first.client is not second.client
+        assert http_pool.shared_client_count() == 0
+
+    async def test_pool_options(self):
+        """Test pool settings are passed to the HTTP client"""
+        with patch(
+            'llmeasy.providers.base.create_http_client',
+            wraps=http_pool.create_http_client
+        ) as create:
+            OpenAIProvider(
+                api_key="test_key",
+                http_max_connections=10,
+                http_max_keepalive_connections=5,
+                http_keepalive_expiry=30.0,
+                http2=True,
+                timeout=20,
+                connect_timeout=2.0
+            )
+        _, options = create.call_args
+        assert options == {
+            'max_connections': 10,
+            'max_keepalive_connections': 5,
+            'keepalive_expiry': 30.0,
+            'http2': True,
+            'timeout': 20,
+            'connect_timeout': 2.0,
+        }
@@ -0,0 +1,175 @@
+import pytest
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from llmeasy import LLMEasy, MemoryCache
+from llmeasy.providers import ClaudeProvider
+from llmeasy.utils.instrumentation import (
+    CallMetrics, OpenTelemetryObserver, PrometheusObserver, recording
+)
+from .helpers.provider_impl import DelayProvider
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+class FlakyProvider(DelayProvider):
+    """Mock provider whose first call fails with a server error"""
+    async def query(self, prompt: str, system=None, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("Error generating Mock response") from StatusError(503)
+        return f"response to {prompt}"
+
+class TestLLMEasyObservers:
+    def make_llm(self, provider='fake', **kwargs):
+        records = []
+        llm = LLMEasy(provider=provider, api_key='test_key', observers=[records.append], **kwargs)
+        return llm, records
+
+    async def test_query(self):
+        """Test a query produces one record with the provider's usage"""
+        llm, records = self.make_llm(response_tokens=7)
+        await llm.query("one two three")
+
+        [metrics] = records
+        assert metrics.provider == 'fake'
+        assert metrics.model == 'fake-model'
+        assert metrics.operation == 'query'
+        assert metrics.input_tokens == 3
+        assert metrics.output_tokens == 7
+        assert metrics.attempts == 1 and metrics.retries == 0
+        assert metrics.latency >= 0
+        assert metrics.error is None
+
+    async def test_stream(self):
+        """Test a stream records its chunks and time to first chunk"""
+        llm, records = self.make_llm(response_tokens=4, ttft=0.02)
+        chunks = [chunk async for chunk in llm.stream("prompt")]
+
+        [metrics] = records
+        assert metrics.operation == 'stream'
+        assert metrics.chunks == len(chunks) == 4
+        assert metrics.output_tokens == 4
+        assert 0.02 <= metrics.ttft <= metrics.latency
+
+    async def test_stream_stopped_early(self):
+        """Test a stream the consumer stops reading is recorded without an error"""
+        llm, records = self.make_llm(response_tokens=10)
+        stream = llm.stream("prompt")
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+        [metrics] = records
+        assert metrics.chunks == 1
+        assert metrics.error is None
+
+    async def test_retries_and_errors(self):
+        """Test retries are counted and failures are recorded"""
+        with patch('llmeasy.core.get_provider_class', return_value=FlakyProvider):
+            llm, records = self.make_llm('mock')
+        llm.retry_policy.base_delay = 0
+        assert await llm.query("prompt") == "response to prompt"
+        assert records[0].attempts == 2 and records[0].retries == 1
+
+        llm, records = self.make_llm(error_rate=1.0, retry=False)
+        with pytest.raises(ValueError):
+            await llm.query("prompt")
+        assert isinstance(records[0].error, ValueError)
+
+    async def test_cache_hit(self):
+        """Test answers from the cache are marked and make no attempt"""
+        llm, records = self.make_llm(cache=MemoryCache())
+        await llm.query("prompt")
+        await llm.query("prompt")
+        assert [m.cached for m in records] == [False, True]
+        assert records[1].attempts == 0
+
+    async def test_failing_observer(self):
+        """Test an observer raising does not fail the call"""
+        def broken(metrics):
+            raise RuntimeError("observer bug")
+
+        llm, records = self.make_llm(response='ok')
+        llm.add_observer(broken)
+        assert await llm.query("prompt") == "ok"
+        assert len(records) == 1
+
+    async def test_unobserved(self):
+        """Test calls are not recorded without observers"""
+        llm = LLMEasy(provider='fake', api_key='test_key')
+        assert llm._start_call('query') is None
+        assert await llm.query("prompt")
+
+class TestProviderUsage:
+    async def test_openai_stream_usage(self):
+        """Test the OpenAI provider asks for and records streamed usage"""
+        pytest.importorskip('aiohttp')
+        from llmeasy.testing import FakeProviderServer
+
+        async with FakeProviderServer(response_tokens=5) as server:
+            records = []
+            llm = LLMEasy(
+                provider='openai',
+                api_key='unused',
+                base_url=server.openai_base_url,
+                observers=[records.append]
+            )
+            chunks = [chunk async for chunk in llm.stream("Test prompt")]
+            await llm.query("Test prompt")
+
+        assert len(chunks) == 5
+        assert [m.output_tokens for m in records] == [5, 5]
+        assert all(m.input_tokens == 2 for m in records)
+
+    async def test_claude_usage(self):
+        """Test the Claude provider records usage from responses and stream events"""
+        provider = ClaudeProvider(api_key="test_key")
+        provider.client.messages.create = AsyncMock(return_value=SimpleNamespace(
+            content=[SimpleNamespace(text="response")],
+            usage=SimpleNamespace(input_tokens=11, output_tokens=3),
+            model='claude-test'
+        ))
+        metrics = CallMetrics('claude', None, 'query')
+        with recording(metrics):
+            assert await provider.query("prompt") == "response"
+        assert (metrics.input_tokens, metrics.output_tokens, metrics.model) == (11, 3, 'claude-test')
+
+        async def events():
+            yield SimpleNamespace(type='message_start', message=SimpleNamespace(
+                usage=SimpleNamespace(input_tokens=12), model='claude-test'
+            ))
+            yield SimpleNamespace(type='content_block_delta', delta=SimpleNamespace(text="chunk"))
+            yield SimpleNamespace(type='message_delta', usage=SimpleNamespace(output_tokens=1))
+
+        provider.client.messages.create = AsyncMock(return_value=events())
+        metrics = CallMetrics('claude', None, 'stream')
+        stream = provider.stream("prompt")
+        with recording(metrics):
+            assert await stream.__anext__() == "chunk"
+        assert [chunk async for chunk in stream] == []
+        assert (metrics.input_tokens, metrics.output_tokens) == (12, 1)
+
+class TestExporters:
+    @pytest.mark.parametrize("observer, module", [
+        (OpenTelemetryObserver, 'opentelemetry'),
+        (PrometheusObserver, 'prometheus_client'),
+    ])
+    def test_missing_dependency(self, observer, module):
+        """Test exporters explain which optional package they need"""
+        with patch.dict(sys.modules, {module: None}):
+            with pytest.raises(ImportError, match="pip install llmeasy"):
+                observer()
+
+    def test_prometheus(self):
+        """Test records become Prometheus samples"""
+        prometheus_client = pytest.importorskip('prometheus_client')
+        registry = prometheus_client.CollectorRegistry()
+        observer = PrometheusObserver(registry=registry)
+        observer(CallMetrics('fake', 'm', 'query', input_tokens=3, output_tokens=5, latency=0.1, attempts=2))
+        labels = {'provider': 'fake', 'model': 'm', 'operation': 'query'}
+        assert registry.get_sample_value('llmeasy_tokens_total', {**labels, 'direction': 'output'}) == 5
+        assert registry.get_sample_value('llmeasy_retries_total', labels) == 1
+        assert registry.get_sample_value('llmeasy_requests_total', {**labels, 'status': 'ok'}) == 1
@@ -1,5 +1,11 @@
 import pytest
-from llmeasy.utils.json_helper import JSONStreamHelper
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from llmeasy import JSONTemplate, LLMEasy, StreamAbortPolicy
+from llmeasy.utils.json_helper import (
+    JSONEventParser, JSONStreamHelper, complete_partial_json, parse_json_response
+)
+from llmeasy.exceptions import JSONResponseError, StreamAbortedError
 import json
 import logging
 import asyncio
@@ -201,4 +207,345 @@ class TestJSONStreamHelper:
         
         # Should not process anything due to buffer overflow
         assert len(objects) == 0
-  
\ No newline at end of file
+  
+    @pytest.mark.asyncio
+    async def test_escapes_split_across_chunks(self, helper):
+        """Test scanner state is kept across chunk boundaries"""
+        text = 'noise {"a": "x\\"}{", "b": {"c": "\\\\"}} tail {"d": 1}'
+        
+        objects = []
+        async for obj in helper.process_stream(self.generate_chunks(list(text))):
+            objects.append(obj)
+            
+        assert objects == [{"a": 'x"}{', "b": {"c": "\\"}}, {"d": 1}]
+        assert helper.buffer == ""
+
+    @pytest.mark.asyncio
+    async def test_buffer_holds_only_pending_object(self, helper):
+        """Test that completed objects and surrounding text are not retained"""
+        async def chunks():
+            yield '{"first": 1} some text {"sec'
+            
+        objects = []
+        async for obj in helper.process_stream(chunks()):
+            objects.append(obj)
+            
+        assert objects == [{"first": 1}]
+        assert helper.buffer == '{"sec'
+
+class TestJSONEventParser:
+    DOCUMENT = (
+        'Here you go:\n```json\n{"title": "x", "items": [{"a": 1, "b": "q\\"}"}, '
+        '{"a": [2]}, 3, "s"], "other": {"items": [9]}}\n```'
+    )
+
+    def feed(self, parser, text, size):
+        events = []
+        for i in range(0, len(text), size):
+            events.extend(parser.feed(text[i:i + size]))
+        return events
+
+    @pytest.mark.parametrize("size", [1, 2, 5, 1000])
+    def test_path_elements(self, size):
+        """Test the elements of a path are emitted however the text is chunked"""
+        events = self.feed(JSONEventParser('items.*'), self.DOCUMENT, size)
+        assert [(e.kind, e.path, e.value) for e in events] == [
+            ('item', ('items', 0), {"a": 1, "b": 'q"}'}),
+            ('item', ('items', 1), {"a": [2]}),
+            ('item', ('items', 2), 3),
+            ('item', ('items', 3), "s"),
+        ]
+
+    def test_element_emitted_when_closed(self):
+        """Test an element is emitted as soon as it closes, before the array does"""
+        parser = JSONEventParser('*')
+        assert parser.feed('[{"a": 1') == []
+        [event] = parser.feed('}, {"a"')
+        assert event.value == {"a": 1}
+        assert parser.feed(': 2}')[0].value == {"a": 2}
+        # Scalars end at the next comma or the closing bracket
+        assert parser.feed(', 12') == []
+        assert parser.feed('3]')[0].value == 123
+
+    def test_top_level_values(self):
+        """Test the default path emits each top-level value and skips prose"""
+        events = self.feed(JSONEventParser(), '{"a": 1} text [1, 2] {"b": {"c": []}}', 1)
+        assert [e.value for e in events] == [{"a": 1}, [1, 2], {"b": {"c": []}}]
+
+    def test_invalid_element(self):
+        """Test an element that is not valid JSON is reported as an error"""
+        [event] = JSONEventParser('*').feed('[{a: 1}]')
+        assert event.kind == 'error'
+        assert event.value == '{a: 1}'
+
+    def test_partial_events(self):
+        """Test partial events show the element in progress"""
+        parser = JSONEventParser('items.*', partial=True)
+        events = self.feed(parser, '{"items": [{"name": "Ada", "tags": ["x"', 1)
+        partials = [e.value for e in events if e.kind == 'partial']
+        assert partials[-1] == {"name": "Ada", "tags": ["x"]}
+        assert {"name": "A"} in partials
+        # Unchanged values are not repeated
+        assert all(a != b for a, b in zip(partials, partials[1:]))
+
+    def test_complete_partial_json(self):
+        """Test prefixes are closed at the last complete value"""
+        assert complete_partial_json('{"a": [1, {"b": "x') == {"a": [1, {"b": "x"}]}
+        assert complete_partial_json('{"a": 1, "b": tr') == {"a": 1}
+        assert complete_partial_json('{"ke') == {}
+        assert complete_partial_json('[1, 2') == [1]
+        assert complete_partial_json('') is None
+
+class TestStreamJSONPath:
+    async def generate_chunks(self, text, size=3):
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+    async def test_process_stream_path(self):
+        """Test process_stream yields validated and repaired path elements"""
+        helper = JSONStreamHelper()
+        text = '{"items": [{"a": 1}, {b: 2}, {"a": 3}, 4]}'
+        items = [
+            item async for item in helper.process_stream(
+                self.generate_chunks(text), validator=lambda v: v != {"a": 3}, path='items.*'
+            )
+        ]
+        assert items == [{"a": 1}, {"b": 2}, 4]
+
+    async def test_process_stream_partial(self):
+        """Test process_stream yields events with partial=True"""
+        helper = JSONStreamHelper()
+        text = '[{"a": "long value"}]'
+        events = [e async for e in helper.process_stream(self.generate_chunks(text), partial=True)]
+        assert events[-1].kind == 'item'
+        assert events[-1].value == {"a": "long value"}
+        assert events[-2] == ('partial', (0,), {"a": "long value"})
+
+    async def test_stream_json_path(self):
+        """Test LLMEasy.stream_json emits path elements from the provider stream"""
+        llm = LLMEasy(
+            provider='fake',
+            api_key='test_key',
+            response='{"items": [{"n": 1}, {"n": 2}]}'
+        )
+        items = [item async for item in llm.stream_json("prompt", path='items.*')]
+        assert items == [{"n": 1}, {"n": 2}]
+
+class TestStreamTemplate:
+    TEMPLATE = {"name": "string", "year_created": "number", "paradigm": ["string"]}
+
+    async def generate_chunks(self, text, size=5):
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+    async def test_template_skips_mismatches(self):
+        """Test elements not matching the template are skipped"""
+        helper = JSONStreamHelper(template=self.TEMPLATE)
+        text = (
+            '{"name": "C", "year_created": 1972, "paradigm": ["imperative"]}'
+            '{"name": "Go", "year_created": "2009", "paradigm": []}'
+            '{"name": "Lisp", "paradigm": ["functional"]}'
+        )
+        objects = [obj async for obj in helper.process_stream(self.generate_chunks(text))]
+        assert [obj["name"] for obj in objects] == ["C"]
+
+    async def test_template_coerce(self):
+        """Test coerce converts elements instead of skipping them"""
+        helper = JSONStreamHelper(template=JSONTemplate(self.TEMPLATE), coerce=True)
+        text = '{"items": [{"name": "Go", "year_created": "2009", "paradigm": []}, {"name": "?"}]}'
+        objects = [
+            obj async for obj in helper.process_stream(self.generate_chunks(text), path='items.*')
+        ]
+        assert objects == [{"name": "Go", "year_created": 2009, "paradigm": []}]
+
+    async def test_partial_template_abort(self):
+        """Test an element in progress violating the template aborts the stream"""
+        helper = JSONStreamHelper(template=self.TEMPLATE)
+        source = SourceStream(['{"name": "C", "year_created": 1972, "paradigm": [1, ', '2]}'])
+        with pytest.raises(StreamAbortedError) as exc_info:
+            async for _ in helper.process_stream(
+                source.generate(), abort=StreamAbortPolicy(partial_template=True)
+            ):
+                pass
+        assert exc_info.value.reason == 'schema'
+        assert source.sent == 1 and source.closed
+
+    async def test_partial_template_with_coerce(self):
+        """Test the partial check accepts values the coercer will convert"""
+        template = {"name": "string", "year": "number"}
+        chunks = ['[{"name": "Py", "year": "19', '91"}, {"name": "C", "year": 1972}]']
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        helper = JSONStreamHelper(template=template, coerce=True)
+        objects = [
+            obj async for obj in helper.process_stream(
+                stream(), path='*', abort=StreamAbortPolicy(partial_template=True)
+            )
+        ]
+        assert objects == [{"name": "Py", "year": 1991}, {"name": "C", "year": 1972}]
+
+        helper = JSONStreamHelper(template=template, coerce=True)
+        with pytest.raises(StreamAbortedError):
+            async for _ in helper.process_stream(
+                self.generate_chunks('[{"name": "Py", "year": "soon"}]', size=30),
+                abort=StreamAbortPolicy(partial_template=True)
+            ):
+                pass
+
+    async def test_partial_template_top_level_array(self):
+        """Test objects of a top-level array are checked and emitted one by one"""
+        helper = JSONStreamHelper(template={"name": "string", "year": "number"})
+        objects = [
+            obj async for obj in helper.process_stream(
+                self.generate_chunks('[{"name": "Py", "year": 1991}, {"name": "C", "year": 1972}]'),
+                abort=StreamAbortPolicy(partial_template=True)
+            )
+        ]
+        assert objects == [{"name": "Py", "year": 1991}, {"name": "C", "year": 1972}]
+
+class SourceStream:
+    """Endless stream of chunks that records whether it was closed"""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    async def generate(self):
+        try:
+            while True:
+                for chunk in self.chunks:
+                    self.sent += 1
+                    yield chunk
+        finally:
+            self.closed = True
+
+class SDKStream:
+    """Provider SDK stream with an async `close`, like Anthropic's `AsyncStream`"""
+    def __init__(self, texts):
+        self.texts = texts
+        self.closed = False
+
+    async def __aiter__(self):
+        for text in self.texts:
+            yield SimpleNamespace(type='content_block_delta', delta=SimpleNamespace(text=text))
+
+    async def close(self):
+        self.closed = True
+
+class TestStreamAbort:
+    async def collect(self, source, **kwargs):
+        helper = JSONStreamHelper()
+        return [obj async for obj in helper.process_stream(source.generate(), **kwargs)]
+
+    async def test_max_invalid(self):
+        """Test the stream is aborted and closed after too many invalid objects"""
+        source = SourceStream(['{"a": 1}', '{"a": }', '{"b": }'])
+        items = []
+        with pytest.raises(StreamAbortedError) as exc_info:
+            async for obj in JSONStreamHelper().process_stream(
+                source.generate(), repair_json=False, abort=StreamAbortPolicy(max_invalid=2)
+            ):
+                items.append(obj)
+        assert items == [{"a": 1}]
+        assert exc_info.value.reason == 'invalid'
+        assert exc_info.value.emitted == 1
+        assert source.closed and source.sent == 3
+
+    async def test_validator_failures_count_as_invalid(self):
+        """Test objects rejected by the validator count towards max_invalid"""
+        source = SourceStream(['{"a": 1}', '{"a": -1}'])
+        with pytest.raises(StreamAbortedError):
+            await self.collect(
+                source,
+                validator=lambda obj: obj["a"] > 0,
+                abort=StreamAbortPolicy(max_invalid=3)
+            )
+        assert source.sent == 6
+
+    async def test_max_objects(self):
+        """Test the stream ends without an error after max_objects"""
+        source = SourceStream(['{"items": [{"n": 1}, ', '{"n": 2}, {"n": 3}'])
+        items = await self.collect(source, path='items.*', abort=StreamAbortPolicy(max_objects=2))
+        assert items == [{"n": 1}, {"n": 2}]
+        assert source.closed
+
+    async def test_budgets(self):
+        """Test byte and token budgets end the stream"""
+        source = SourceStream(['{"text": "\u00e9\u00e9"}'])
+        with pytest.raises(StreamAbortedError, match="byte budget"):
+            await self.collect(source, abort=StreamAbortPolicy(max_bytes=45))
+        assert source.sent == 3
+
+        source = SourceStream(['{"text": "abcdefgh"}'])
+        items = await self.collect(source, abort=StreamAbortPolicy(max_tokens=10, raise_error=False))
+        assert len(items) == 2
+        assert source.closed
+
+    async def test_partial_validator(self):
+        """Test an element in progress failing the partial validator aborts the stream"""
+        source = SourceStream(['[{"name": "ok"}, {"name": 42, "more": "nev', 'er read"}]'])
+        with pytest.raises(StreamAbortedError) as exc_info:
+            await self.collect(
+                source,
+                path='*',
+                abort=StreamAbortPolicy(partial_validator=lambda obj: isinstance(obj.get("name", ""), str))
+            )
+        assert exc_info.value.reason == 'schema'
+        assert source.sent == 1 and source.closed
+
+    @pytest.mark.parametrize("text", [
+        'Here: [{"a": 1}, {"a": 2}]',
+        '{"a": {"b": [1]}} text {"c": 2}',
+        '```json\n[[{"a": 1}], 3, "x", {"b": [{"c": 1}]}]\n```',
+        '{"a": 1} {broken: 2} [1, 2]',
+    ])
+    async def test_policy_keeps_elements(self, text):
+        """Test an abort policy does not change which elements are emitted"""
+        async def chunks():
+            for i in range(0, len(text), 3):
+                yield text[i:i + 3]
+
+        seen = []
+        policy = StreamAbortPolicy(partial_validator=lambda value: seen.append(value) or True)
+        plain = [obj async for obj in JSONStreamHelper().process_stream(chunks())]
+        checked = [obj async for obj in JSONStreamHelper().process_stream(chunks(), abort=policy)]
+        assert checked == plain
+        assert plain and all(isinstance(obj, dict) for obj in plain)
+        # The partial validator sees the objects in progress, never a whole array
+        assert seen and all(isinstance(value, dict) for value in seen)
+
+    async def test_provider_stream_closed(self):
+        """Test an abort closes the provider's HTTP stream through every layer"""
+        llm = LLMEasy(provider='claude', api_key='test_key')
+        response = SDKStream(['[{"n": 1}, ', '{"n": 2}, ', '{"n": 3}]'])
+        llm.provider.client.messages.create = AsyncMock(return_value=response)
+        items = [
+            item async for item in llm.stream_json(
+                "prompt", path='*', abort=StreamAbortPolicy(max_objects=1)
+            )
+        ]
+        assert items == [{"n": 1}]
+        assert response.closed
+
+class TestParseJSONResponse:
+    def test_code_fences(self):
+        """Test markdown fences are stripped before parsing"""
+        assert parse_json_response('```json\n{"a": 1}\n```') == {"a": 1}
+        assert parse_json_response('```\n[1, 2]\n```') == [1, 2]
+        assert parse_json_response(' null ') is None
+
+    def test_invalid_json(self):
+        """Test invalid JSON raises a structured error"""
+        with pytest.raises(JSONResponseError) as exc_info:
+            parse_json_response('not json')
+        assert isinstance(exc_info.value, ValueError)
+        assert exc_info.value.response == 'not json'
+        assert exc_info.value.error is not None
+
+    def test_stdlib_fallback(self):
+        """Test values orjson rejects are still parsed"""
+        result = parse_json_response('{"value": NaN}')
+        assert result["value"] != result["value"]
@@ -0,0 +1,115 @@
+import pytest
+from pydantic import BaseModel, ConfigDict
+from llmeasy.utils.json_template import JSONTemplate
+
+LANGUAGE = {
+    "name": "string",
+    "year_created": "number",
+    "creator": "string?",
+    "paradigm": ["string"],
+    "details": {"typed": bool, "rank": "integer"},
+}
+
+PYTHON = {
+    "name": "Python",
+    "year_created": 1991,
+    "creator": "Guido van Rossum",
+    "paradigm": ["object-oriented", "imperative"],
+    "details": {"typed": False, "rank": 1},
+}
+
+class Language(BaseModel):
+    name: str
+    year_created: int
+
+class StrictLanguage(Language):
+    model_config = ConfigDict(extra='forbid')
+
+class TestJSONTemplate:
+    def test_valid(self):
+        """Test matching elements pass, with extra keys and optional keys left out"""
+        template = JSONTemplate(LANGUAGE)
+        assert template(PYTHON)
+        assert template({**PYTHON, "extra": [1]})
+        assert template({k: v for k, v in PYTHON.items() if k != "creator"})
+        assert template({**PYTHON, "creator": None})
+
+    @pytest.mark.parametrize("change", [
+        {"name": 3},
+        {"year_created": "1991"},
+        {"year_created": True},
+        {"paradigm": ["imperative", 2]},
+        {"paradigm": "imperative"},
+        {"details": {"typed": 0, "rank": 1}},
+        {"details": {"typed": True, "rank": 1.5}},
+    ])
+    def test_type_mismatch(self, change):
+        """Test a value of the wrong type fails, booleans are not numbers"""
+        assert not JSONTemplate(LANGUAGE)({**PYTHON, **change})
+
+    def test_required_keys(self):
+        """Test missing required keys fail complete but not partial elements"""
+        template = JSONTemplate(LANGUAGE)
+        element = {"name": "Pyth", "paradigm": ["object"]}
+        assert not template(element)
+        assert template.validate_partial(element)
+        assert not template.validate_partial({"name": 1})
+        assert not template.validate_partial(["not", "an", "object"])
+
+    def test_coerce(self):
+        """Test values are converted to the template's types"""
+        template = JSONTemplate(LANGUAGE)
+        element = {
+            "name": 42,
+            "year_created": "1991",
+            "paradigm": [],
+            "details": {"typed": "TRUE", "rank": 2.0},
+        }
+        assert template.coerce(element) == {
+            "name": "42",
+            "year_created": 1991,
+            "paradigm": [],
+            "details": {"typed": True, "rank": 2},
+        }
+        assert template.coerce({**element, "year_created": "19.5"})["year_created"] == 19.5
+        assert element["name"] == 42
+
+    def test_coercible_partial(self):
+        """Test checks with coerce accept convertible values and strings still streaming"""
+        template = JSONTemplate({"year": "number", "typed": "boolean", "rank": "integer"})
+        element = {"year": "19", "typed": "tr", "rank": "-"}
+        assert not template.validate_partial(element)
+        assert template.validate_partial(element, coerce=True)
+        assert not template.validate_partial({"year": "19x"}, coerce=True)
+        assert not template.validate_partial({"typed": "yes"}, coerce=True)
+        assert template.validate({"year": "1991", "typed": "true", "rank": 2.0}, coerce=True)
+        assert not template.validate({"year": "19", "typed": "tr", "rank": 1}, coerce=True)
+
+    @pytest.mark.parametrize("element", [
+        {"year_created": 1, "paradigm": [], "details": {"typed": True, "rank": 1}},
+        {**PYTHON, "year_created": "soon"},
+        {**PYTHON, "details": {"typed": "yes", "rank": 1}},
+        {**PYTHON, "paradigm": {"a": 1}},
+    ])
+    def test_coerce_failure(self, element):
+        """Test elements that cannot be converted raise ValueError"""
+        with pytest.raises(ValueError):
+            JSONTemplate(LANGUAGE).coerce(element)
+
+    def test_invalid_template(self):
+        """Test unknown types are reported when the template is compiled"""
+        with pytest.raises(ValueError, match="Unknown JSON template type"):
+            JSONTemplate({"name": "text"})
+        with pytest.raises(ValueError):
+            JSONTemplate({"tags": ["string", "number"]})
+
+    def test_pydantic_model(self):
+        """Test a pydantic model validates complete elements and coerces to instances"""
+        template = JSONTemplate(Language)
+        assert template({"name": "Python", "year_created": 1991})
+        assert not template({"name": "Python"})
+        assert template.validate_partial({"name": "Py", "other": 1})
+        assert not JSONTemplate(StrictLanguage).validate_partial({"name": "Py", "other": 1})
+        assert template.coerce({"name": "Python", "year_created": "1991"}) == Language(
+            name="Python", year_created=1991
+        )
@@ -0,0 +1,42 @@
+import pytest
+import subprocess
+import sys
+import os
+import llmeasy
+from llmeasy import providers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class TestLazyImports:
+    def test_import_does_not_load_sdks(self):
+        """Test that importing llmeasy does not import any provider SDK"""
+        code = (
+            "import sys, llmeasy\n"
+            "sdks = ['anthropic', 'openai', 'google.generativeai', 'mistralai']\n"
+            "print(','.join(m for m in sdks if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            check=True
+        )
+        assert result.stdout.strip() == ""
+
+    def test_provider_class_resolution(self):
+        """Test provider classes are resolved by name and attribute access"""
+        from llmeasy.providers.openai import OpenAIProvider
+        
+        assert providers.get_provider_class('openai') is OpenAIProvider
+        assert providers.OpenAIProvider is OpenAIProvider
+        assert llmeasy.OpenAIProvider is OpenAIProvider
+
+    def test_unknown_provider(self):
+        """Test unknown providers and attributes are rejected"""
+        with pytest.raises(ValueError) as exc_info:
+            providers.get_provider_class('unknown')
+        assert "Unsupported provider" in str(exc_info.value)
+        
+        with pytest.raises(AttributeError):
+            providers.UnknownProvider
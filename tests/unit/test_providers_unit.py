@@ -2,6 +2,8 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from tests.unit.test_base import BaseLLMTest
 from llmeasy.providers import OpenAIProvider, ClaudeProvider, MistralProvider
+from llmeasy.utils.json_helper import json_loads
+from llmeasy.exceptions import JSONResponseError
 import logging
 import json
 from typing import AsyncIterator
@@ -73,6 +75,25 @@ class TestOpenAIProvider(BaseLLMTest):
         assert isinstance(response, dict)
         assert response == test_json
 
+    async def test_json_output_parsed_once(self, provider, mock_openai_client):
+        mock_openai_client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content='```json\n{"test": "response"}\n```'))]
+        )
+        
+        with patch('llmeasy.utils.json_helper.json_loads', wraps=json_loads) as loads:
+            response = await provider.query("Test prompt", output_format='json')
+        assert response == {"test": "response"}
+        assert loads.call_count == 1
+
+    async def test_invalid_json_output(self, provider, mock_openai_client):
+        mock_openai_client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content="not json"))]
+        )
+        
+        with pytest.raises(JSONResponseError) as exc_info:
+            await provider.query("Test prompt", output_format='json')
+        assert exc_info.value.response == "not json"
+
     @pytest.fixture(autouse=True)
     async def cleanup(self, provider):
         """Cleanup after each test"""
@@ -125,6 +146,15 @@ class TestClaudeProvider(BaseLLMTest):
         assert isinstance(response, str)
         assert response == "Test response"
 
+    async def test_invalid_json_output(self, provider, mock_claude_client):
+        mock_claude_client.messages.create.return_value = AsyncMock(
+            content=[MagicMock(text="not json")]
+        )
+        
+        with pytest.raises(JSONResponseError) as exc_info:
+            await provider.query("Test prompt", output_format='json')
+        assert exc_info.value.response == "not json"
+
     async def test_streaming(self, provider, mock_claude_client):
         """Test streaming for Claude"""
         mock_chunks = [
@@ -183,16 +213,16 @@ class TestMistralProvider(BaseLLMTest):
     @pytest.fixture
     def mock_mistral_client(self, mock_mistral_response):
         client = MagicMock()
-        client.chat = MagicMock(return_value=mock_mistral_response)
-        client.chat_stream = MagicMock(return_value=[
+        client.chat = AsyncMock(return_value=mock_mistral_response)
+        client.chat_stream = MagicMock(return_value=AsyncMockIterator([
             MagicMock(choices=[MagicMock(delta=MagicMock(content="chunk1"))]),
             MagicMock(choices=[MagicMock(delta=MagicMock(content="chunk2"))])
-        ])
+        ]).__aiter__())
         return client
 
     @pytest.fixture
     def provider(self, mock_mistral_client):
-        with patch('mistralai.client.MistralClient', return_value=mock_mistral_client):
+        with patch('mistralai.async_client.MistralAsyncClient', return_value=mock_mistral_client):
             provider = MistralProvider(api_key="test_key")
             provider.client = mock_mistral_client
             return provider
@@ -211,7 +241,7 @@ class TestMistralProvider(BaseLLMTest):
         ]
         
         # Set up mock stream
-        mock_mistral_client.chat_stream.return_value = mock_chunks
+        mock_mistral_client.chat_stream.return_value = AsyncMockIterator(mock_chunks).__aiter__()
         
         chunks = []
         async for chunk in provider.stream("Test prompt"):
@@ -232,10 +262,6 @@ class TestMistralProvider(BaseLLMTest):
             output_format='json'
         )
         
-        # For Mistral, the response might be returned as a string
-        if isinstance(response, str):
-            response = json.loads(response)
-        
         assert isinstance(response, dict)
         assert response == test_json
 
@@ -249,6 +275,31 @@ class TestMistralProvider(BaseLLMTest):
         except Exception as e:
             logger.warning(f"Error during cleanup: {e}")
 
+    async def test_stream_does_not_block_event_loop(self, provider, mock_mistral_client):
+        """Test other coroutines keep running while a Mistral stream is read"""
+        ticks = []
+        
+        async def slow_stream():
+            for content in ["chunk1", "chunk2"]:
+                await asyncio.sleep(0.02)
+                yield MagicMock(choices=[MagicMock(delta=MagicMock(content=content))])
+                
+        async def ticker():
+            for _ in range(3):
+                ticks.append(len(chunks))
+                await asyncio.sleep(0.01)
+                
+        mock_mistral_client.chat_stream.return_value = slow_stream()
+        chunks = []
+        
+        async def consume():
+            async for chunk in provider.stream("Test prompt"):
+                chunks.append(chunk)
+                
+        await asyncio.gather(consume(), ticker())
+        assert chunks == ["chunk1", "chunk2"]
+        assert ticks[:2] == [0, 0]
+
     @pytest.mark.asyncio
     async def test_error_handling(self, provider, mock_mistral_client):
         """Test error handling"""
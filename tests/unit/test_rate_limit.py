@@ -0,0 +1,157 @@
+import pytest
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from llmeasy.utils.rate_limit import (
+    RateLimiter, TokenBucket, get_rate_limiter, observe_response, parse_retry_after
+)
+from .helpers.provider_impl import DelayProvider
+
+def drained(requests_per_minute=None, tokens_per_minute=None) -> RateLimiter:
+    """Limiter with empty buckets, so every caller waits for a refill"""
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    limiter.requests.tokens = 0
+    limiter.tokens.tokens = 0
+    return limiter
+
+class TestTokenBucket:
+    def test_delay_and_refill(self):
+        """Test the wait for tokens follows the per-minute rate"""
+        bucket = TokenBucket(600)
+        now = time.monotonic()
+        assert bucket.delay(1, now) == 0
+        bucket.tokens = 0
+        bucket.updated = now
+        assert bucket.delay(1, now) == pytest.approx(0.1)
+        assert bucket.delay(1, now + 0.1) == pytest.approx(0)
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        assert bucket.delay(10_000, now + 0.1) == pytest.approx(60 - 0.1, rel=1e-3)
+
+    def test_unlimited(self):
+        """Test a bucket without a limit never waits"""
+        bucket = TokenBucket()
+        bucket.consume(10 ** 9)
+        assert bucket.delay(10 ** 9, time.monotonic()) == 0
+
+class TestRateLimiter:
+    async def test_sustained_rate(self):
+        """Test callers are spread out at the request rate"""
+        limiter = drained(requests_per_minute=1200)
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(4)])
+        assert time.monotonic() - start >= 0.19
+
+    async def test_fifo_order(self):
+        """Test a large request is not overtaken by later small ones"""
+        limiter = drained(tokens_per_minute=60_000)
+        order = []
+
+        async def call(name, tokens):
+            await limiter.acquire(tokens)
+            order.append(name)
+
+        first = asyncio.create_task(call("large", 100))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, call("small-1", 1), call("small-2", 1))
+        assert order == ["large", "small-1", "small-2"]
+
+    def test_learns_limits_from_headers(self):
+        """Test OpenAI and Anthropic rate-limit headers set the budgets"""
+        limiter = RateLimiter()
+        limiter.update_from_headers({
+            'x-ratelimit-limit-requests': '500',
+            'x-ratelimit-remaining-requests': '10',
+            'x-ratelimit-limit-tokens': '30000',
+            'x-ratelimit-remaining-tokens': '29000',
+        })
+        assert limiter.requests.per_minute == 500
+        assert limiter.requests.tokens <= 10
+        assert limiter.tokens.per_minute == 30000
+        assert limiter.tokens.tokens <= 29000
+
+        limiter = RateLimiter(requests_per_minute=100)
+        limiter.update_from_headers({
+            'anthropic-ratelimit-requests-limit': '1000',
+            'anthropic-ratelimit-tokens-limit': '80000',
+        })
+        # Configured limits are only lowered by headers
+        assert limiter.requests.per_minute == 100
+        assert limiter.tokens.per_minute == 80000
+
+    def test_retry_after_pauses(self):
+        """Test a 429 with retry-after holds back every caller"""
+        limiter = RateLimiter(requests_per_minute=1000)
+        limiter.update_from_headers({'retry-after': '2'}, status_code=429)
+        assert limiter._delay(0) == pytest.approx(2, abs=0.1)
+
+        limiter = RateLimiter(adaptive=False)
+        limiter.update_from_headers({'retry-after': '2'}, status_code=429)
+        assert limiter._delay(0) == 0
+
+    def test_parse_retry_after(self):
+        """Test retry-after in seconds, milliseconds and HTTP date form"""
+        assert parse_retry_after({'retry-after': '1.5'}) == 1.5
+        assert parse_retry_after({'retry-after-ms': '250', 'retry-after': '9'}) == 0.25
+        assert parse_retry_after({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0
+        assert parse_retry_after({'retry-after': 'soon'}) is None
+        assert parse_retry_after({}) is None
+
+    async def test_response_hook(self):
+        """Test the HTTP response hook only reports inside an observing block"""
+        limiter = RateLimiter()
+        response = SimpleNamespace(
+            headers={'x-ratelimit-limit-requests': '42'},
+            status_code=200
+        )
+        await observe_response(response)
+        assert limiter.requests.per_minute is None
+        with limiter.observing():
+            await observe_response(response)
+        assert limiter.requests.per_minute == 42
+
+    def test_shared_registry(self):
+        """Test limiters are shared per provider, model and key"""
+        limiter = get_rate_limiter('test', 'model-a', 'key-1', requests_per_minute=10)
+        assert get_rate_limiter('test', 'model-a', 'key-1') is limiter
+        assert get_rate_limiter('test', 'model-b', 'key-1') is not limiter
+        assert get_rate_limiter('test', 'model-a', 'key-2') is not limiter
+        get_rate_limiter('test', 'model-a', 'key-1', requests_per_minute=5)
+        assert limiter.requests.per_minute == 5
+
+class TestLLMEasyRateLimit:
+    @pytest.fixture
+    def make_llm(self):
+        def make(**kwargs):
+            with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+                return LLMEasy(provider='mock', api_key='test_key', **kwargs)
+        return make
+
+    def test_enabled_by_configured_limits(self, make_llm):
+        """Test rate limiting is on when a limit is configured, unless disabled"""
+        assert make_llm().rate_limiter is None
+        assert make_llm(rate_limit_requests_per_minute=60).rate_limiter is not None
+        assert make_llm(rate_limit_requests_per_minute=60, rate_limit=False).rate_limiter is None
+        limiter = RateLimiter()
+        assert make_llm(rate_limit=limiter).rate_limiter is limiter
+
+    async def test_batch_is_paced(self, make_llm):
+        """Test batch_process runs at the limiter's rate"""
+        llm = make_llm(rate_limit=drained(requests_per_minute=1200))
+        start = time.monotonic()
+        results = [item async for item in llm.batch_process(["a", "b", "c", "d"], max_concurrent=4)]
+        assert len(results) == 4
+        assert time.monotonic() - start >= 0.19
+
+    async def test_unused_tokens_are_released(self, make_llm):
+        """Test the completion budget is reserved up front and returned afterwards"""
+        limiter = RateLimiter(tokens_per_minute=100_000)
+        llm = make_llm(rate_limit=limiter, max_tokens=1000)
+
+        await llm.query("prompt")
+        assert 100_000 - limiter.tokens.tokens < 50
+
+        chunks = [chunk async for chunk in llm.stream("prompt")]
+        assert chunks == ["prompt:start", "prompt:end"]
+        assert 100_000 - limiter.tokens.tokens < 50
@@ -0,0 +1,170 @@
+import pytest
+import asyncio
+import httpx
+import openai
+from llmeasy import LLMEasy
+from llmeasy.exceptions import JSONResponseError
+from llmeasy.testing import FakeProviderServer
+from llmeasy.utils.retry import RetryBudget, RetryPolicy, get_retry_after, is_retryable
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class APIConnectionError(Exception):
+    """Stand-in named like the SDK connection errors"""
+
+def wrapped(error: Exception) -> ValueError:
+    """Wrap an error the way providers do"""
+    try:
+        raise ValueError(f"Error generating Test response: {error}") from error
+    except ValueError as e:
+        return e
+
+def policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(base_delay=0, budget=RetryBudget(min_retries_per_second=100), **kwargs)
+
+class TestClassification:
+    @pytest.mark.parametrize("error, expected", [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(529), True),
+        (StatusError(400), False),
+        (StatusError(401), False),
+        (asyncio.TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (APIConnectionError(), True),
+        (ValueError("bad prompt"), False),
+        (JSONResponseError("not json"), False),
+    ])
+    def test_is_retryable(self, error, expected):
+        """Test transient errors are recognised directly and through provider wrapping"""
+        assert is_retryable(error) is expected
+        assert is_retryable(wrapped(error)) is expected
+
+    def test_sdk_errors(self):
+        """Test SDK status errors and their Retry-After header"""
+        request = httpx.Request('POST', 'http://test/v1/chat/completions')
+        response = httpx.Response(429, headers={'retry-after': '3'}, request=request)
+        error = openai.RateLimitError("rate limited", response=response, body=None)
+        assert is_retryable(wrapped(error))
+        assert get_retry_after(wrapped(error)) == 3
+
+        response = httpx.Response(400, request=request)
+        assert not is_retryable(openai.BadRequestError("bad", response=response, body=None))
+        assert is_retryable(openai.APITimeoutError(request=request))
+
+class TestRetryPolicy:
+    async def test_retries_until_success(self):
+        """Test transient failures are retried up to max_retries"""
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise wrapped(StatusError(503))
+            return "ok"
+
+        assert await policy(max_retries=2).call(flaky) == "ok"
+        assert len(attempts) == 3
+
+        attempts.clear()
+        with pytest.raises(ValueError):
+            await policy(max_retries=1).call(flaky)
+        assert len(attempts) == 2
+
+    async def test_permanent_errors_are_not_retried(self):
+        """Test non-transient errors are raised on the first attempt"""
+        attempts = []
+
+        async def invalid():
+            attempts.append(1)
+            raise wrapped(StatusError(400))
+
+        with pytest.raises(ValueError):
+            await policy().call(invalid)
+        assert len(attempts) == 1
+
+    def test_backoff(self):
+        """Test full-jitter backoff and Retry-After handling"""
+        retry = RetryPolicy(base_delay=1, max_delay=5, budget=RetryBudget(min_retries_per_second=100), max_retries=10)
+        error = StatusError(503)
+        for attempt in range(6):
+            assert 0 <= retry.next_delay(error, attempt) <= min(5, 2 ** attempt)
+        assert retry.next_delay(StatusError(429, {'retry-after': '2'}), 0) == 2
+        # A server asking for a longer wait than max_delay is not retried
+        assert retry.next_delay(StatusError(429, {'retry-after': '60'}), 0) is None
+        assert retry.next_delay(error, 10) is None
+
+    def test_budget(self):
+        """Test the budget caps retries relative to requests"""
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0.1, ttl=10)
+        assert budget.try_retry()
+        assert not budget.try_retry()
+        for _ in range(4):
+            budget.record_request()
+        assert budget.try_retry()
+        assert not budget.try_retry()
+
+    async def test_budget_stops_retries(self):
+        """Test an exhausted budget raises instead of retrying"""
+        budget = RetryBudget(ratio=0, min_retries_per_second=0)
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            raise StatusError(503)
+
+        with pytest.raises(StatusError):
+            await RetryPolicy(base_delay=0, budget=budget).call(failing)
+        assert len(attempts) == 1
+
+    async def test_stream_retries_before_first_chunk(self):
+        """Test streams are reopened only until output has been yielded"""
+        opened = []
+
+        async def stream():
+            opened.append(1)
+            if len(opened) == 1:
+                raise StatusError(503)
+            yield "a"
+            if len(opened) == 2:
+                raise StatusError(503)
+            yield "b"
+
+        chunks = []
+        with pytest.raises(StatusError):
+            async for chunk in policy().stream(stream):
+                chunks.append(chunk)
+        assert chunks == ["a"]
+        assert len(opened) == 2
+
+class TestLLMEasyRetry:
+    async def test_retries_through_sdk(self):
+        """Test LLMEasy retries server errors itself, with SDK retries disabled"""
+        async with FakeProviderServer(error_rate=1.0, error_status=503) as server:
+            llm = LLMEasy(
+                provider='openai',
+                api_key='test_key',
+                base_url=server.openai_base_url,
+                retry=policy(max_retries=2)
+            )
+            with pytest.raises(ValueError):
+                await llm.query("prompt")
+            assert server.requests == 3
+
+            server.requests = 0
+            server.behavior.error_status = 400
+            with pytest.raises(ValueError):
+                await llm.query("prompt")
+            assert server.requests == 1
+
+    def test_configuration(self):
+        """Test retries follow the retry settings and can be disabled"""
+        assert LLMEasy(provider='fake', api_key='test_key').retry_policy.max_retries == 2
+        assert LLMEasy(provider='fake', api_key='test_key', retry_attempts=0).retry_policy is None
+        assert LLMEasy(provider='fake', api_key='test_key', retry=False).retry_policy is None
+        custom = policy()
+        assert LLMEasy(provider='fake', api_key='test_key', retry=custom).retry_policy is custom
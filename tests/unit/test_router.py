@@ -0,0 +1,118 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from llmeasy import LLMEasy, Router
+from llmeasy.router import Backend
+from .helpers.provider_impl import DelayProvider
+
+class TransientError(Exception):
+    status_code = 503
+
+class FailingProvider(DelayProvider):
+    """Mock provider whose calls fail with a server error"""
+    async def query(self, prompt: str, system=None, **kwargs):
+        self.calls += 1
+        raise ValueError("Error generating Mock response") from TransientError()
+
+    async def stream(self, prompt: str, system=None, **kwargs):
+        self.calls += 1
+        raise ValueError("Error generating Mock response") from TransientError()
+        yield
+
+def make_llm(provider_class=DelayProvider, **kwargs) -> LLMEasy:
+    with patch('llmeasy.core.get_provider_class', return_value=provider_class):
+        return LLMEasy(provider='mock', api_key='test_key', retry=False, **kwargs)
+
+class TestRouter:
+    def test_invalid_arguments(self):
+        """Test routers need backends and a known policy"""
+        with pytest.raises(ValueError):
+            Router([])
+        with pytest.raises(ValueError):
+            Router([make_llm()], policy='fastest')
+
+    async def test_round_robin(self):
+        """Test requests take turns"""
+        a, b = Backend(make_llm(), name='a'), Backend(make_llm(), name='b')
+        router = Router([a, b], policy='round_robin')
+        for _ in range(4):
+            assert await router.query("prompt") == "response to prompt"
+        assert (a.requests, b.requests) == (2, 2)
+
+    async def test_least_outstanding(self):
+        """Test requests go to the backend with fewest requests in flight"""
+        a = Backend(make_llm(delays={"prompt": 0.1}), name='a')
+        b = Backend(make_llm(delays={"prompt": 0.1}), name='b')
+        router = Router([a, b], policy='least_outstanding')
+        await asyncio.gather(*[router.query("prompt") for _ in range(6)])
+        assert a.llm.provider.max_in_flight == 3
+        assert b.llm.provider.max_in_flight == 3
+
+    async def test_ewma_prefers_fastest(self):
+        """Test traffic shifts to the backend that is fastest right now"""
+        slow = Backend(make_llm(delays={"prompt": 0.05}), name='slow')
+        fast = Backend(make_llm(delays={"prompt": 0.001}), name='fast')
+        router = Router([slow, fast], policy='ewma')
+        for _ in range(10):
+            await router.query("prompt")
+        assert fast.requests >= 8
+        assert slow.requests >= 1
+
+        # Once the fast backend slows down, traffic moves back
+        fast.llm.provider.delays["prompt"] = 0.2
+        for _ in range(10):
+            await router.query("prompt")
+        assert slow.requests >= 6
+
+    def test_latency_decays_while_idle(self):
+        """Test idle backends become attractive again over time"""
+        backend = Backend(make_llm())
+        backend.ewma = 1.0
+        backend.last_sample = 100.0
+        assert backend.latency(100.0, half_life=10) == 1.0
+        assert backend.latency(110.0, half_life=10) == pytest.approx(0.5)
+
+    def test_cost_weighted(self):
+        """Test cheaper backends get proportionally more traffic"""
+        cheap = Backend(make_llm(), name='cheap', cost=1.0)
+        pricey = Backend(make_llm(), name='pricey', cost=4.0)
+        router = Router([cheap, pricey], policy='cost', seed=1)
+        picks = [router.select().name for _ in range(1000)]
+        assert 750 < picks.count('cheap') < 850
+
+    async def test_failover_and_ejection(self):
+        """Test failing backends are skipped and ejected after repeated failures"""
+        broken = Backend(make_llm(FailingProvider), name='broken')
+        healthy = Backend(make_llm(), name='healthy')
+        router = Router([broken, healthy], policy='round_robin', max_failures=2)
+
+        for _ in range(4):
+            assert await router.query("prompt") == "response to prompt"
+        assert broken.llm.provider.calls == 2
+        assert broken.ejections == 1
+        assert router.select() is healthy
+
+        chunks = [chunk async for chunk in router.stream("prompt")]
+        assert chunks == ["prompt:start", "prompt:end"]
+
+    async def test_no_failover(self):
+        """Test errors are raised when failover is disabled"""
+        router = Router([make_llm(FailingProvider), make_llm()], policy='round_robin', failover=False)
+        with pytest.raises(ValueError):
+            await router.query("prompt")
+
+    def test_ejection_limit(self):
+        """Test at most max_ejection_percent of the backends are ejected"""
+        backends = [Backend(make_llm(), name=str(i)) for i in range(2)]
+        router = Router(backends, max_ejection_percent=50)
+        router._eject(backends[0])
+        router._eject(backends[1])
+        assert router.select() is backends[1]
+
+    async def test_batch_process(self):
+        """Test batches are spread across backends"""
+        a, b = Backend(make_llm(), name='a'), Backend(make_llm(), name='b')
+        router = Router([a, b], policy='round_robin')
+        results = [item async for item in router.batch_process(["x", "y", "z", "w"])]
+        assert len(results) == 4
+        assert a.requests == b.requests == 2
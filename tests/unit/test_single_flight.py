@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from llmeasy import LLMEasy, SingleFlight
+from .helpers.provider_impl import DelayProvider
+
+class TestSingleFlight:
+    @pytest.fixture
+    def make_llm(self):
+        def make(**kwargs):
+            with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+                return LLMEasy(
+                    provider='mock',
+                    api_key='test_key',
+                    delays={"prompt": 0.05, "other": 0.05},
+                    **kwargs
+                )
+        return make
+
+    async def test_concurrent_queries_share_call(self, make_llm):
+        """Test identical in-flight queries reach the provider once"""
+        llm = make_llm(single_flight=True)
+        responses = await asyncio.gather(*[llm.query("prompt") for _ in range(5)])
+        
+        assert responses == ["response to prompt"] * 5
+        assert llm.provider.calls == 1
+        assert len(llm.single_flight) == 0
+        
+        await asyncio.gather(llm.query("prompt"), llm.query("other"))
+        assert llm.provider.calls == 3
+
+    async def test_disabled_by_default(self, make_llm):
+        """Test queries are not coalesced unless enabled"""
+        llm = make_llm()
+        await asyncio.gather(llm.query("prompt"), llm.query("prompt"))
+        assert llm.provider.calls == 2
+
+    async def test_shared_between_instances(self, make_llm):
+        """Test a SingleFlight can be shared between LLMEasy instances"""
+        group = SingleFlight()
+        first = make_llm(single_flight=group)
+        second = make_llm(single_flight=group)
+        await asyncio.gather(first.query("prompt"), second.query("prompt"))
+        assert first.provider.calls + second.provider.calls == 1
+
+    async def test_cancelled_waiter(self, make_llm):
+        """Test cancelling one caller does not cancel the shared call"""
+        llm = make_llm(single_flight=True)
+        first = asyncio.ensure_future(llm.query("prompt"))
+        second = asyncio.ensure_future(llm.query("prompt"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        assert await second == "response to prompt"
+        assert first.cancelled()
+
+    async def test_stream_fanout(self, make_llm):
+        """Test late stream subscribers replay chunks already received"""
+        llm = make_llm(single_flight=True)
+        
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [chunk async for chunk in llm.stream("prompt")]
+            
+        early, late = await asyncio.gather(collect(0), collect(0.02))
+        
+        assert early == late == ["prompt:start", "prompt:end"]
+        assert llm.provider.calls == 1
+
+    async def test_stream_errors_reach_all_subscribers(self, make_llm):
+        """Test upstream stream errors are raised to every subscriber"""
+        llm = make_llm(single_flight=True)
+        
+        async def collect():
+            return [chunk async for chunk in llm.stream("fail")]
+            
+        results = await asyncio.gather(collect(), collect(), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert llm.provider.calls == 1
@@ -1,9 +1,21 @@
 import pytest
-from llmeasy.templates.template_parser import PromptTemplate
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from llmeasy.templates.template_parser import PromptTemplate, compile_template, render_template
+from .helpers.provider_impl import MockProvider
 import logging
 
 logger = logging.getLogger(__name__)
 
+class SystemEchoProvider(MockProvider):
+    """Mock provider answering with the system prompt and prompt it received"""
+    async def query(self, prompt: str, system=None, **kwargs):
+        assert 'template' not in kwargs and 'variables' not in kwargs
+        return f"{system}|{prompt}"
+
+    async def stream(self, prompt: str, system=None, **kwargs):
+        yield f"{system}|{prompt}"
+
 class TestTemplateParser:
     def test_basic_template(self):
         """Test basic template substitution"""
@@ -115,4 +127,105 @@ class TestTemplateParser:
         # Test nested dict access - should work with simple string substitution
         template = PromptTemplate("$name is $age years old")
         result = template.format(name="Alice", age=30)
-        assert result == "Alice is 30 years old"
\ No newline at end of file
+        assert result == "Alice is 30 years old"
+
+    def test_compiled_once(self):
+        """Test templates are parsed up front and compiled templates are cached"""
+        template = PromptTemplate("Hi $name, ${name} owes $$${amount}")
+        assert template.variables == {"name", "amount"}
+        assert template.render({"name": "Bo", "amount": 3}) == "Hi Bo, Bo owes $3"
+        assert compile_template("Hi $name") is compile_template("Hi $name")
+
+    def test_invalid_placeholder_at_compile_time(self):
+        """Test invalid placeholders are reported when the template is compiled"""
+        with pytest.raises(ValueError, match="line 2, col 4"):
+            PromptTemplate("ok\nab $ c")
+
+    def test_render_template(self):
+        """Test template strings and system/prompt dicts render with their variables"""
+        template = {"system": "You are a $role", "prompt": "Explain $topic"}
+        variables = {"role": "teacher", "topic": "sets"}
+        assert render_template(template, variables) == ("Explain sets", "You are a teacher")
+        assert render_template("Explain $topic", variables, "sys") == ("Explain sets", "sys")
+        assert render_template({"prompt": "Hi"}, None, "sys") == ("Hi", "sys")
+        with pytest.raises(ValueError):
+            render_template({"system": "x"})
+
+class TestBatchRendering:
+    template = PromptTemplate("{\"id\": $id} $name likes ${thing}, $name!")
+
+    def test_columns(self):
+        """Test columns render lazily, row by row, like format"""
+        rendered = self.template.format_many(id=[1, 2], name=["Ann", "Bo"], thing=("tea", None))
+        assert not isinstance(rendered, list)
+        assert list(rendered) == [
+            self.template.format(id=1, name="Ann", thing="tea"),
+            '{"id": 2} Bo likes , Bo!',
+        ]
+
+    def test_rows_and_iterators(self):
+        """Test row dicts and lazily produced columns"""
+        rows = [{"id": 1, "name": "Ann", "thing": "tea", "extra": 0}]
+        assert list(self.template.render_batch(rows)) == ['{"id": 1} Ann likes tea, Ann!']
+        columns = {"id": iter(range(3)), "name": ["A", "B", "C"], "thing": ["x"] * 3}
+        assert len(list(self.template.render_batch(columns))) == 3
+
+    def test_iterator_length_mismatch(self):
+        """Test iterator columns running out early raise instead of truncating"""
+        rendered = self.template.render_batch(
+            {"id": iter(range(2)), "name": ["A", "B", "C"], "thing": iter("xyz")}
+        )
+        assert next(rendered) == '{"id": 0} A likes x, A!'
+        with pytest.raises(ValueError, match="differ in length"):
+            list(rendered)
+
+    def test_constant_template_with_iterators(self):
+        """Test a template without variables renders one row per iterator row"""
+        template = PromptTemplate("hello")
+        assert list(template.render_batch({"x": iter([1, 2])})) == ["hello", "hello"]
+        with pytest.raises(ValueError, match="differ in length"):
+            list(template.render_batch({"x": iter([1, 2]), "y": [1, 2, 3]}))
+
+    def test_checked_once_per_column(self):
+        """Test missing columns and mismatched lengths fail before any row is rendered"""
+        with pytest.raises(KeyError, match="thing"):
+            self.template.format_many(id=[1], name=["Ann"])
+        with pytest.raises(ValueError):
+            self.template.format_many(id=[1], name=["Ann"], thing=["tea", "cake"])
+        with pytest.raises(KeyError):
+            list(self.template.render_batch([{"id": 1}]))
+
+    def test_dataframe(self):
+        """Test pandas DataFrames are rendered column-wise"""
+        pandas = pytest.importorskip('pandas')
+        frame = pandas.DataFrame({"id": [1], "name": ["Ann"], "thing": ["tea"]})
+        assert list(self.template.render_batch(frame)) == ['{"id": 1} Ann likes tea, Ann!']
+
+    def test_arrow(self):
+        """Test pyarrow tables are rendered batch by batch"""
+        pyarrow = pytest.importorskip('pyarrow')
+        table = pyarrow.table({"id": [1, 2], "name": ["Ann", "Bo"], "thing": ["tea", "jam"]})
+        assert list(self.template.render_batch(table))[1] == '{"id": 2} Bo likes jam, Bo!'
+
+class TestLLMEasyTemplates:
+    @pytest.fixture
+    def llm(self):
+        with patch('llmeasy.core.get_provider_class', return_value=SystemEchoProvider):
+            return LLMEasy(provider='mock', api_key='test_key', retry=False)
+
+    async def test_query_and_stream(self, llm):
+        """Test query and stream render templates instead of passing them to the provider"""
+        template = {"system": "Act as $role", "prompt": "Summarize $text"}
+        variables = {"role": "editor", "text": "this"}
+        assert await llm.query(template=template, variables=variables) == "Act as editor|Summarize this"
+        chunks = [c async for c in llm.stream(template="Summarize $text", variables=variables)]
+        assert chunks == ["None|Summarize this"]
+
+    async def test_prompt_or_template(self, llm):
+        """Test exactly one of prompt and template is required"""
+        with pytest.raises(ValueError):
+            await llm.query()
+        with pytest.raises(ValueError):
+            await llm.query("prompt", template="Hi")
+        with pytest.raises(KeyError):
+            await llm.query(template="Hi $name")
@@ -0,0 +1,118 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from llmeasy import LLMEasy
+from llmeasy.exceptions import LLMTimeoutError
+from llmeasy.providers.openai import OpenAIProvider
+from llmeasy.utils.retry import is_retryable
+from llmeasy.utils.timeouts import stream_with_timeouts, with_deadline
+from .helpers.provider_impl import DelayProvider
+
+class Stream:
+    """Async stream with scripted delays before each chunk, recording whether it was closed"""
+
+    def __init__(self, *delays: float):
+        self.delays = delays
+        self.closed = False
+
+    async def __call__(self):
+        try:
+            for index, delay in enumerate(self.delays):
+                await asyncio.sleep(delay)
+                yield f"chunk-{index}"
+        finally:
+            self.closed = True
+
+class TestDeadlines:
+    async def test_with_deadline(self):
+        """Test the deadline raises LLMTimeoutError and passes results through"""
+        assert await with_deadline(asyncio.sleep(0, "done"), 1) == "done"
+        assert await with_deadline(asyncio.sleep(0, "done"), None) == "done"
+        with pytest.raises(LLMTimeoutError) as exc_info:
+            await with_deadline(asyncio.sleep(1), 0.02)
+        assert exc_info.value.phase == 'total'
+        assert exc_info.value.timeout == 0.02
+        assert isinstance(exc_info.value, TimeoutError)
+        assert is_retryable(exc_info.value)
+
+    @pytest.mark.parametrize("delays, options, phase, received", [
+        ((1,), {'first_token_timeout': 0.02}, 'first_token', 0),
+        ((0, 1), {'first_token_timeout': 0.5, 'idle_timeout': 0.02}, 'idle', 1),
+        ((0, 0.03, 0.03, 0.03), {'idle_timeout': 0.5, 'total_timeout': 0.05}, 'total', 2),
+    ])
+    async def test_stream_phases(self, delays, options, phase, received):
+        """Test each phase of a stream has its own deadline"""
+        source = Stream(*delays)
+        chunks = []
+        with pytest.raises(LLMTimeoutError) as exc_info:
+            async for chunk in stream_with_timeouts(source(), **options):
+                chunks.append(chunk)
+        assert exc_info.value.phase == phase
+        assert len(chunks) == received
+        assert source.closed
+
+    async def test_consumer_time_is_not_idle_time(self):
+        """Test time spent by the consumer does not count as stream idle time"""
+        chunks = []
+        async for chunk in stream_with_timeouts(Stream(0, 0, 0)(), idle_timeout=0.02):
+            await asyncio.sleep(0.03)
+            chunks.append(chunk)
+        assert len(chunks) == 3
+
+class TestLLMEasyTimeouts:
+    def make_llm(self, **kwargs) -> LLMEasy:
+        with patch('llmeasy.core.get_provider_class', return_value=DelayProvider):
+            return LLMEasy(provider='mock', api_key='test_key', retry=False, **kwargs)
+
+    async def test_query_timeout(self):
+        """Test the configured timeout applies to queries and can be set per call"""
+        llm = self.make_llm(delays={"slow": 0.2}, timeout=0.02)
+        with pytest.raises(LLMTimeoutError):
+            await llm.query("slow")
+        assert llm.provider.in_flight == 0
+        assert await llm.query("slow", timeout=None) == "response to slow"
+        assert await llm.query("slow", timeout=1) == "response to slow"
+
+    async def test_stream_timeouts(self):
+        """Test stream deadlines are taken from settings and per-call options"""
+        llm = self.make_llm(delays={"slow": 0.2}, idle_timeout=0.02)
+        chunks = []
+        with pytest.raises(LLMTimeoutError) as exc_info:
+            async for chunk in llm.stream("slow"):
+                chunks.append(chunk)
+        assert exc_info.value.phase == 'idle'
+        assert chunks == ["slow:start"]
+
+        chunks = [chunk async for chunk in llm.stream("slow", idle_timeout=None)]
+        assert chunks == ["slow:start", "slow:end"]
+
+        with pytest.raises(LLMTimeoutError) as exc_info:
+            async for _ in llm.stream("slow", idle_timeout=None, timeout=0.05):
+                pass
+        assert exc_info.value.phase == 'total'
+
+    async def test_first_token_timeout_is_retried(self):
+        """Test a stream without a first chunk in time is retried"""
+        llm = LLMEasy(provider='fake', api_key='test_key', ttft=1, first_token_timeout=0.02)
+        llm.retry_policy.base_delay = 0
+        with pytest.raises(LLMTimeoutError) as exc_info:
+            async for _ in llm.stream("prompt"):
+                pass
+        assert exc_info.value.phase == 'first_token'
+
+class TestClientTimeouts:
+    def test_client_timeouts(self):
+        """Test timeout settings reach the SDK client"""
+        provider = OpenAIProvider(api_key="test_key", timeout=12, connect_timeout=3.0)
+        assert provider.client.timeout.connect == 3.0
+        assert provider.client.timeout.read == 12
+
+    def test_per_call_connect_timeout(self):
+        """Test a per-call connect timeout becomes an SDK request option"""
+        provider = OpenAIProvider(api_key="test_key", timeout=12, connect_timeout=3.0)
+        kwargs = {'connect_timeout': 0.5, 'top_p': 0.9}
+        options = provider._request_timeout(kwargs)
+        assert options['timeout'].connect == 0.5
+        assert options['timeout'].read == 12
+        assert kwargs == {'top_p': 0.9}
+        assert provider._request_timeout({}) == {}